@@ -0,0 +1,112 @@
+"""
+Micro-benchmarks of the game infrastructure, independent from the strength of the agents.
+
+Example:
+    python benchmark.py --games 2000 --boards 20 --depth 4
+"""
+import argparse
+from random import seed, Random
+from timeit import default_timer
+from typing import Callable, List
+
+import features
+import heuristics
+from game_agent import CustomPlayer
+from isolation import Board
+from sample_players import RandomPlayer
+
+
+def games_per_second(play: Callable[[Board], None], nb_games: int) -> float:
+    """
+    :param play:     A function playing a game on a new board until the end
+    :param nb_games: Number of games to play
+    :return: The number of games played per second
+    """
+    start = default_timer()
+    for _ in range(nb_games):
+        play(Board(RandomPlayer(), RandomPlayer()))
+    return nb_games / (default_timer() - start)
+
+
+def bench_match_loop(nb_games: int):
+    """Compare the throughput of Board.play() and Board.play_fast() on games between random players."""
+    loops = [('play', lambda board: board.play()),
+             ('play_fast', lambda board: board.play_fast()),
+             ('play_fast (no snapshot)', lambda board: board.play_fast(snapshot=False))]
+
+    print('{:<25}{:>12}'.format('Match loop', 'Games/sec'))
+    baseline = None
+    for name, play in loops:
+        seed(0)
+        throughput = games_per_second(play, nb_games)
+        baseline = baseline or throughput
+        print('{:<25}{:>12.0f}   x{:.2f}'.format(name, throughput, throughput / baseline))
+
+
+def random_positions(nb_boards: int, seed_value: int = 0) -> List[Board]:
+    """
+    :param nb_boards:  Number of positions to generate
+    :param seed_value: Seed of the random moves
+    :return: Positions reached by random play, in which both players have moved and the active one is not stuck
+    """
+    rng = Random(seed_value)
+    boards = []
+    while len(boards) < nb_boards:
+        board = Board(RandomPlayer(), RandomPlayer())
+        for _ in range(rng.randint(2, 20)):
+            legal_moves = board.get_legal_moves()
+            if not legal_moves:
+                break
+            board.apply_move(rng.choice(legal_moves))
+        if board.get_legal_moves():
+            boards.append(board)
+    return boards
+
+
+def alphabeta_time(boards: List[Board], score_fn: heuristics.Score_Function, depth: int,
+                   batch_frontier: bool) -> float:
+    """
+    :return: The number of seconds taken by fixed-depth alphabeta searches of all the boards
+    """
+    elapsed = 0.
+    for board in boards:
+        agent = CustomPlayer(score_fn=score_fn, method='alphabeta', batch_frontier=batch_frontier)
+        agent.time_left = lambda: 1e9
+        game = Board(agent, board.inactive_player, board.width, board.height)
+        game.board_state, game.move_count = board.board_state, board.move_count
+        game.locations = {agent: board.locations[board.active_player],
+                          board.inactive_player: board.locations[board.inactive_player]}
+        start = default_timer()
+        agent.alphabeta(game, depth)
+        elapsed += default_timer() - start
+    return elapsed
+
+
+def bench_frontier_batching(nb_boards: int, depth: int):
+    """Compare fixed-depth alphabeta with scalar evaluation of the leaves and with frontier batching."""
+    boards = random_positions(nb_boards)
+    score_fns = [('improved_score', heuristics.improved_score),
+                 ('differential_reach_score', heuristics.differential_reach_score),
+                 ('linear_score', heuristics.linear_score([1.] * len(features.FEATURE_NAMES)))]
+
+    print('{:<25}{:>12}{:>12}'.format('Heuristic', 'Scalar (s)', 'Batched (s)'))
+    for name, score_fn in score_fns:
+        scalar = alphabeta_time(boards, score_fn, depth, batch_frontier=False)
+        batched = alphabeta_time(boards, score_fn, depth, batch_frontier=True)
+        print('{:<25}{:>12.3f}{:>12.3f}   x{:.2f}'.format(name, scalar, batched, scalar / batched))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the game infrastructure.')
+    parser.add_argument('--games', type=int, default=2000, help='number of games per measure')
+    parser.add_argument('--boards', type=int, default=20, help='number of positions searched per heuristic')
+    parser.add_argument('--depth', type=int, default=4, help='depth of the searches')
+    args = parser.parse_args()
+
+    bench_match_loop(args.games)
+    print()
+    bench_frontier_batching(args.boards, args.depth)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Feature vectors describing a game state from a player's perspective, used to tune linear heuristics on game corpora.
+
+Features are, for the player and then for his opponent, the number of cells reachable in 1 move (mobility), 2 moves,
+..., and NB_LAYERS moves or more, followed by the partition status (whether the players can no longer reach any common
+cell) and the difference of reachable cells when partitioned (which usually decides the game).
+"""
+from typing import List
+
+import numpy as np
+
+from frontier import Frontier, reach
+from isolation import Board, Player
+
+NB_LAYERS = 6
+
+FEATURE_NAMES = (['own_mobility'] + ['own_reach_{}'.format(k) for k in range(2, NB_LAYERS + 1)] +
+                 ['opp_mobility'] + ['opp_reach_{}'.format(k) for k in range(2, NB_LAYERS + 1)] +
+                 ['partitioned', 'partitioned_advantage'])
+
+
+def fold_layers(layers: np.ndarray) -> np.ndarray:
+    """
+    :param layers: (N, L) numbers of cells reachable in k + 1 moves
+    :return: (N, NB_LAYERS) array in which the cells reachable in NB_LAYERS moves or more are counted together
+    """
+    folded = np.zeros((len(layers), NB_LAYERS), dtype=float)
+    nb_columns = min(layers.shape[1], NB_LAYERS)
+    folded[:, :nb_columns] = layers[:, :nb_columns]
+    folded[:, NB_LAYERS - 1] += layers[:, NB_LAYERS:].sum(axis=1)
+    return folded
+
+
+def features_batch(frontier: Frontier) -> np.ndarray:
+    """
+    :param frontier: A batch of game states
+    :return: (N, len(FEATURE_NAMES)) array of the feature vectors of the states
+    """
+    own_layers, own_reached = reach(frontier, frontier.own)
+    opp_layers, opp_reached = reach(frontier, frontier.opp)
+    own_layers, opp_layers = fold_layers(own_layers), fold_layers(opp_layers)
+
+    partitioned = ~(own_reached & opp_reached).any(axis=1)
+    advantage = partitioned * (own_layers.sum(axis=1) - opp_layers.sum(axis=1))
+    return np.hstack([own_layers, opp_layers, partitioned[:, np.newaxis], advantage[:, np.newaxis]])
+
+
+def features(board: Board, player: Player) -> List[float]:
+    """
+    :param board: The current state of the game
+
+    :param player: One of the registered player of the current game
+
+    :return: The feature vector of the game state for the player, as features_batch() would compute it
+    """
+    vector = []
+    reached = []
+    for pawn in (player, board.get_opponent(player)):
+        reachable = board.get_reachable_locations(pawn)
+        layers = [len(reachable.get(depth, [])) for depth in range(1, NB_LAYERS)]
+        layers.append(sum(len(cells) for depth, cells in reachable.items() if depth >= NB_LAYERS))
+        vector.extend(layers)
+        reached.append({cell for cells in reachable.values() for cell in cells})
+
+    partitioned = not (reached[0] & reached[1])
+    vector.append(float(partitioned))
+    vector.append(float(len(reached[0]) - len(reached[1])) if partitioned else 0.)
+    return [float(value) for value in vector]
@@ -0,0 +1,163 @@
+"""
+Vectorized evaluation of the last ply of the game tree.
+
+Instead of scoring the children of a depth 1 node one at a time, their occupancy masks and player locations are
+gathered into NumPy arrays, and a batched heuristic scores all of them in a single call.
+Cells are indexed by r * width + c. An extra sentinel cell (index width * height) is always blocked and is used to pad
+the knight moves leaving the board, so that every cell has exactly 8 neighbours in the lookup table.
+"""
+from collections import namedtuple
+from functools import lru_cache
+from typing import List, Callable, Sequence, Tuple
+
+import numpy as np
+
+from isolation import Board, Player, Location
+
+Frontier = namedtuple('Frontier', ['blocked', 'own', 'opp', 'neighbours'])
+Frontier.__doc__ = """
+A batch of game states sharing the same board dimensions:
+- blocked:    (N, cells + 1) boolean array, True for cells that are no longer available
+- own:        (N,) cell indices of the player whose perspective the states are scored from
+- opp:        (N,) cell indices of his opponent
+- neighbours: (cells + 1, 8) cell indices reachable by a knight move from each cell (sentinel if off board)
+"""
+
+Batched_Score_Function = Callable[..., np.ndarray]
+
+
+@lru_cache(maxsize=None)
+def knight_table(width: int, height: int) -> np.ndarray:
+    """
+    :param width:  The number of columns of the board.
+    :param height: The number of rows of the board.
+    :return: (cells + 1, 8) array of the cells reachable by a knight move from each cell, padded with the sentinel
+    """
+    sentinel = width * height
+    table = np.full((sentinel + 1, len(Board.L_MOVES)), sentinel, dtype=np.intp)
+    for r in range(height):
+        for c in range(width):
+            for i, (dr, dc) in enumerate(Board.L_MOVES):
+                # noinspection PyChainedComparisons
+                if 0 <= r + dr < height and 0 <= c + dc < width:
+                    table[r * width + c, i] = (r + dr) * width + c + dc
+    table.setflags(write=False)
+    return table
+
+
+def unpack_states(states: Sequence[int], nb_cells: int) -> np.ndarray:
+    """
+    :param states:   Board states, as ints whose (r*width+c)-th bit is equal to 1 if cell (r,c) is no longer available
+    :param nb_cells: The number of cells of the board
+    :return: (N, cells + 1) boolean array, True for cells that are no longer available (and for the sentinel)
+    """
+    nb_bytes = (nb_cells + 8) // 8
+    raw = np.frombuffer(b''.join(state.to_bytes(nb_bytes, 'little') for state in states), dtype=np.uint8)
+    # unpackbits orders the bits of each byte from the most significant one
+    bits = np.unpackbits(raw).reshape(len(states), nb_bytes, 8)[:, :, ::-1].reshape(len(states), -1)
+    blocked = bits[:, :nb_cells + 1].astype(bool)
+    blocked[:, nb_cells] = True
+    return blocked
+
+
+def occupancy(board: Board) -> np.ndarray:
+    """
+    :param board: The current state of the game
+    :return: (cells + 1,) boolean array, True for cells that are no longer available (and for the sentinel)
+    """
+    return unpack_states([board.board_state], board.width * board.height)[0]
+
+
+def supports(board: Board) -> bool:
+    """
+    :param board: The current state of the game
+    :return: True if the children of the board can be gathered into a frontier (both players have already moved)
+    """
+    return Board.NOT_MOVED not in board.locations.values()
+
+
+def gather(board: Board, player: Player, moves: List[Location]) -> Frontier:
+    """
+    :param board:  The current state of the game, in which both players have already moved
+    :param player: One of the registered player of the current game, whose perspective the children are scored from
+    :param moves:  Legal moves of the active player
+    :return: The frontier made of the children of the board obtained by applying each move
+    """
+    width = board.width
+    cells = np.array([r * width + c for r, c in moves], dtype=np.intp)
+    blocked = np.tile(occupancy(board), (len(moves), 1))
+    blocked[np.arange(len(moves)), cells] = True
+
+    r, c = board.get_player_location(board.inactive_player)
+    waiting = np.full(len(moves), r * width + c, dtype=np.intp)
+    own, opp = (cells, waiting) if player == board.active_player else (waiting, cells)
+
+    return Frontier(blocked, own, opp, knight_table(width, board.height))
+
+
+def mobility(frontier: Frontier, locations: np.ndarray) -> np.ndarray:
+    """
+    :param frontier:  A batch of game states
+    :param locations: (N,) cell indices of the pawns to consider
+    :return: (N,) number of legal moves of each pawn
+    """
+    rows = np.arange(len(locations))[:, np.newaxis]
+    return np.count_nonzero(~frontier.blocked[rows, frontier.neighbours[locations]], axis=1)
+
+
+def reach(frontier: Frontier, locations: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorized version of Board.get_reachable_locations(), performing the BFS of all the states at once.
+
+    :param frontier:  A batch of game states
+    :param locations: (N,) cell indices of the pawns to consider
+    :return: (N, L) array whose (i, k)-th element is the number of cells reachable in k + 1 moves in the i-th state,
+             and (N, cells + 1) boolean array, True for the reachable cells
+    """
+    rows = np.arange(len(locations))
+    explored = frontier.blocked.copy()
+    layer = np.zeros_like(explored)
+    layer[rows[:, np.newaxis], frontier.neighbours[locations]] = True
+    layer &= ~explored
+
+    counts = []
+    while layer.any():
+        counts.append(np.count_nonzero(layer, axis=1))
+        explored |= layer
+        # Knight moves are symmetric, so a cell is reached if one of its neighbours was reached at the previous layer
+        layer = layer[:, frontier.neighbours].any(axis=2) & ~explored
+
+    if not counts:
+        counts.append(np.zeros(len(locations), dtype=np.intp))
+    return np.stack(counts, axis=1), explored & ~frontier.blocked
+
+
+def reach_layers(frontier: Frontier, locations: np.ndarray) -> np.ndarray:
+    """
+    :param frontier:  A batch of game states
+    :param locations: (N,) cell indices of the pawns to consider
+    :return: (N, L) array whose (i, k)-th element is the number of cells reachable in k + 1 moves in the i-th state
+    """
+    return reach(frontier, locations)[0]
+
+
+def evaluate(board: Board, player: Player, moves: List[Location], batch_fn: Batched_Score_Function) -> List[float]:
+    """
+    Score all the children of a board in one call, as alphabeta() would at depth 0 (utility first, heuristic else).
+
+    :param board:    The current state of the game, in which both players have already moved
+    :param player:   The player whose perspective the children are scored from
+    :param moves:    Legal moves of the active player
+    :param batch_fn: Batched implementation of the heuristic
+    :return: The value of each child, in the order of the moves
+    """
+    frontier = gather(board, player, moves)
+    values = np.asarray(batch_fn(frontier), dtype=float)
+
+    # In each child, the player that did not move is the one to play: he loses if he is stuck
+    if player == board.active_player:
+        values[mobility(frontier, frontier.opp) == 0] = float('inf')
+    else:
+        values[mobility(frontier, frontier.own) == 0] = float('-inf')
+
+    return values.tolist()
@@ -0,0 +1,77 @@
+"""
+This file contains test cases verifying that the batched implementations of the heuristics and the frontier batching
+mode of CustomPlayer.alphabeta() agree with their scalar counterparts.
+"""
+import unittest
+from random import Random
+
+import features
+import frontier
+import heuristics
+from game_agent import CustomPlayer
+from isolation import Board
+from sample_players import RandomPlayer
+
+
+def random_boards(nb_boards, seed=0, width=7, height=7):
+    """Generate game states reached by random play, in which both players have already moved."""
+    rng = Random(seed)
+    boards = []
+    while len(boards) < nb_boards:
+        board = Board(RandomPlayer(), RandomPlayer(), width, height)
+        for _ in range(rng.randint(2, width * height // 2)):
+            legal_moves = board.get_legal_moves()
+            if not legal_moves:
+                break
+            board.apply_move(rng.choice(legal_moves))
+        if board.get_legal_moves():
+            boards.append(board)
+    return boards
+
+
+class FrontierTest(unittest.TestCase):
+
+    def test_batched_heuristics(self):
+        """ Test that batched heuristics return the values of the scalar ones for every child """
+        for name in ['null_score', 'open_move_score', 'improved_score', 'reach_score', 'differential_reach_score']:
+            score_fn = getattr(heuristics, name)
+            for board in random_boards(20):
+                moves = board.get_legal_moves()
+                for player in (board.active_player, board.inactive_player):
+                    values = frontier.evaluate(board, player, moves, score_fn.batched)
+                    for move, value in zip(moves, values):
+                        child = board.forecast_move(move)
+                        expected = child.utility(player) or score_fn(child, player)
+                        self.assertAlmostEqual(value, expected, msg='{} differs for move {}'.format(name, move))
+
+    def test_batched_linear_score(self):
+        """ Test that the features of a tuned linear heuristic are the same in the scalar and batched versions """
+        score_fn = heuristics.linear_score(range(len(features.FEATURE_NAMES)))
+        for board in random_boards(20, seed=2):
+            moves = board.get_legal_moves()
+            values = frontier.evaluate(board, board.active_player, moves, score_fn.batched)
+            for move, value in zip(moves, values):
+                child = board.forecast_move(move)
+                expected = child.utility(board.active_player) or score_fn(child, board.active_player)
+                self.assertAlmostEqual(value, expected)
+
+    def test_batched_alphabeta(self):
+        """ Test that frontier batching does not change the result of alphabeta """
+        for board in random_boards(10, seed=1):
+            scalar = CustomPlayer(score_fn=heuristics.differential_reach_score, method='alphabeta')
+            batched = CustomPlayer(score_fn=heuristics.differential_reach_score, method='alphabeta',
+                                   batch_frontier=True)
+            for depth in (1, 2, 3):
+                values = []
+                for agent in (scalar, batched):
+                    agent.time_left = lambda: 1e3
+                    game = Board(agent, board.inactive_player, board.width, board.height)
+                    game.board_state, game.move_count = board.board_state, board.move_count
+                    game.locations = {agent: board.locations[board.active_player],
+                                      board.inactive_player: board.locations[board.inactive_player]}
+                    values.append(agent.alphabeta(game, depth)[0])
+                self.assertAlmostEqual(values[0], values[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,11 @@
+from collections import Counter
 from operator import itemgetter
-from typing import Tuple
+from typing import Tuple, List, Optional, Callable, Dict
 from heuristics import Score_Function, differential_reach_score
 
-from isolation import Board, Player, Location, Timer
+import frontier
+from isolation import Board, Board_Key, Player, Location, Timer
+from transposition import PersistentTable
 
 
 class Timeout(Exception):
@@ -12,6 +15,24 @@ class Timeout(Exception):
 
 custom_score = differential_reach_score
 
+PROOF_INFINITY = 10 ** 9
+
+Reduction_Schedule = Callable[[int, int], int]
+
+
+def default_reduction(depth: int, move_index: int) -> int:
+    """
+    :param depth: The remaining depth of the node whose child is searched
+
+    :param move_index: The rank of the child in the move ordering
+
+    :return: The number of plies the search of the child is reduced by: none below depth 3, one ply else,
+             and two plies for the very late moves of deep searches.
+    """
+    if depth < 3:
+        return 0
+    return 2 if depth >= 6 and move_index >= 6 else 1
+
 
 class CustomPlayer(Player):
     """
@@ -20,7 +41,11 @@ class CustomPlayer(Player):
     """
 
     def __init__(self, search_depth: int = 3, score_fn: Score_Function = custom_score,
-                 iterative: bool = True, method: str = 'minimax', timeout: float = 10., reordering: bool = False):
+                 iterative: bool = True, method: str = 'minimax', timeout: float = 10., reordering: bool = False,
+                 batch_frontier: bool = False, late_move_index: int = None,
+                 reduction_schedule: Reduction_Schedule = default_reduction, proof_threshold: int = None,
+                 proof_time_share: float = .5, proof_table_size: int = 10 ** 6,
+                 persistent_table: PersistentTable = None):
         """
 
         :param search_depth: A strictly positive integer for the number of layers in the game tree to explore
@@ -36,6 +61,30 @@ class CustomPlayer(Player):
                              enough to allow the function to return before the timer expires.
 
         :param reordering: Set to True to reorder branches of the game tree using knowledge of previous iterations
+
+        :param batch_frontier: Set to True to score all the children of depth 1 nodes in a single call to the batched
+                               implementation of score_fn (see heuristics.batched), when it declares one. All the
+                               children are scored, so the cutoffs of depth 1 nodes are lost: it only pays off for
+                               heuristics much more expensive than the NumPy overhead (see benchmark.py)
+
+        :param late_move_index: If set, alphabeta searches the children ranked after the first late_move_index ones
+                                with a reduced depth and a null window first, and only re-searches them at full
+                                depth if they beat the current bound (late move reductions)
+
+        :param reduction_schedule: A function of the remaining depth and the move rank returning the number of plies
+                                   late moves are reduced by
+
+        :param proof_threshold: If set, get_move first tries to prove a win with a depth-first proof-number search
+                                once fewer than proof_threshold empty cells are reachable by the players
+
+        :param proof_time_share: Share of the time of a turn the proof-number search may use before falling back to
+                                 the heuristic search
+
+        :param proof_table_size: Maximal number of entries of the proof-number search transposition table
+
+        :param persistent_table: If set, the iterative deepening search of the early-game positions stored in this
+                                 table (possibly by previous games) resumes from the depth reached before, and the
+                                 deepest result of each search is stored back
         """
         self.search_depth = search_depth
         self.iterative = iterative
@@ -44,10 +93,24 @@ class CustomPlayer(Player):
         self.time_left = None
         self.TIMER_THRESHOLD = timeout
         self.reordering = reordering
+        self.batch_fn = getattr(score_fn, 'batched', None) if batch_frontier else None
+        self.late_move_index = late_move_index
+        self.reduction_schedule = reduction_schedule
+        self.search_stats = Counter()
+        self.probing = False  # True during the reduced null window searches, whose values are not cached
+        self.proof_threshold = proof_threshold
+        self.proof_time_share = proof_time_share
+        self.proof_table_size = proof_table_size
+        self.proof_table = dict()
+        self.proof_deadline = None
+        self.proof_root_keys = frozenset()  # keys of the root of the current proof and of its children, never evicted
+        self.persistent_table = persistent_table
         self.cache = dict()
         self.move_count = 0
         self.total_move_count = 0
         self.average_depth = 0
+        self.last_value = float('nan')
+        self.last_depth = 0
 
     def get_move(self, board: Board, time_left: Timer) -> Location:
         """
@@ -70,29 +133,150 @@ class CustomPlayer(Player):
         # Reset the cache when starting a new game
         if board.move_count < self.total_move_count:
             self.cache = dict()
+            self.proof_table = dict()
         self.total_move_count = board.move_count
 
+        # In the late game, try to prove a win before relying on the heuristic
+        self.last_depth = 0
+        if self.proof_threshold is not None and self.nb_reachable_cells(board) < self.proof_threshold:
+            move = self.prove_win(board)
+            if move is not None:
+                self.last_value = float('inf')
+                return move
+
         # The search methods raise an exception when getting close to timeout
         # Hence why they are called in a try/except block
         best = float('-inf'), (-1, -1)
         try:
             if self.iterative:
+                # Resume the search of positions already searched in previous games
+                first_depth = 1
+                entry = self.persistent_table.probe(board) if self.persistent_table is not None else None
+                if entry is not None and entry.move in board.get_legal_moves():
+                    best = entry.value, entry.move
+                    self.last_depth = first_depth = entry.depth
+                    first_depth += 1
+
                 nb_cells_left = board.width * board.height - board.move_count
-                for depth in range(1, nb_cells_left + 1):
+                for depth in range(first_depth, nb_cells_left + 1):
+                    if best[0] == float('+inf'):
+                        break
                     value, move = method_fn(board, depth, maximizing_player=True)
                     best = max(best, (value, move), key=itemgetter(0))
+                    self.last_depth = depth
+                    if self.persistent_table is not None:
+                        self.persistent_table.store(board, depth, *best)
                     if value == float('+inf'):
                         break
                     self.average_depth += 1
             else:
                 best = method_fn(board, self.search_depth, True)
+                self.last_depth = self.search_depth
 
         except Timeout:
             self.move_count += 1
             pass
 
+        # Keep the value and depth of the search behind the move, to be recorded by the caller if needed
+        self.last_value = best[0]
         return best[1]
 
+    @staticmethod
+    def nb_reachable_cells(board: Board) -> int:
+        """
+        :param board: The current state of the game
+        :return: The number of empty cells that at least one of the players can still reach (the number of cells left
+                 if one of them has not moved yet)
+        """
+        if Board.NOT_MOVED in board.locations.values():
+            return board.width * board.height - board.move_count
+
+        reachable = set()
+        for player in (board.active_player, board.inactive_player):
+            for cells in board.get_reachable_locations(player).values():
+                reachable.update(cells)
+        return len(reachable)
+
+    def prove_win(self, board: Board) -> Optional[Location]:
+        """
+        Run a depth-first proof-number search (df-pn) from the current state, within a share of the time left.
+        Its transposition table is kept from one move to the next, as the subtrees explored are reused.
+
+        :param board: The current state of the game
+        :return: A move proven to win the game, or None if no win could be proven in time
+        """
+        self.proof_deadline = max(self.TIMER_THRESHOLD, (1. - self.proof_time_share) * self.time_left())
+        # The winning move is read from the numbers of the children once the root is proven: they must stay in the table
+        self.proof_root_keys = frozenset([board.get_key()] + [board.forecast_key(move)
+                                                              for move in board.get_legal_moves()])
+
+        try:
+            self.proof_number_search(board, PROOF_INFINITY, PROOF_INFINITY)
+        except Timeout:
+            return None
+
+        # The player to move wins if one of the children is lost for the opponent
+        if self.proof_table[board.get_key()][0] == 0:
+            self.search_stats['proofs'] += 1
+            for move in board.get_legal_moves():
+                if self.proof_table.get(board.forecast_key(move), (1, 1))[1] == 0:
+                    return move
+        return None
+
+    def proof_number_search(self, board: Board, phi_threshold: int, delta_threshold: int):
+        """
+        Implement the multiple iterative deepening step of df-pn, in its negamax form: the proof numbers (phi, delta) of
+        a node are relative to the player to move, phi being 0 when he wins and delta being 0 when he loses.
+        The node is expanded until phi >= phi_threshold or delta >= delta_threshold, and its numbers are stored in the
+        transposition table.
+
+        :param board: The current state of the game
+
+        :param phi_threshold: Threshold on the proof number of the player to move
+
+        :param delta_threshold: Threshold on his disproof number
+        """
+        if self.time_left() < self.proof_deadline:
+            raise Timeout()
+
+        key = board.get_key()
+        moves = board.get_legal_moves()
+        if not moves:
+            self.store_proof_numbers(key, PROOF_INFINITY, 0)
+            return
+
+        child_keys = [board.forecast_key(move) for move in moves]
+        while True:
+            # phi is the smallest delta of the children, delta the sum of their phi
+            numbers = [self.proof_table.get(child_key, (1, 1)) for child_key in child_keys]
+            phi = min(child_delta for _, child_delta in numbers)
+            delta = min(PROOF_INFINITY, sum(child_phi for child_phi, _ in numbers))
+            if phi >= phi_threshold or delta >= delta_threshold:
+                self.store_proof_numbers(key, phi, delta)
+                return
+
+            # Expand the most proving child, until it is no longer better than the second one
+            best = min(range(len(moves)), key=lambda i: numbers[i][1])
+            second_delta = min((child_delta for i, (_, child_delta) in enumerate(numbers) if i != best),
+                               default=PROOF_INFINITY)
+            child_phi_threshold = min(PROOF_INFINITY, delta_threshold + numbers[best][0] - delta)
+            child_delta_threshold = min(phi_threshold, second_delta + 1)
+            self.proof_number_search(board.forecast_move(moves[best]), child_phi_threshold, child_delta_threshold)
+
+    def store_proof_numbers(self, key: Board_Key, phi: int, delta: int):
+        """
+        Store the proof numbers of a node in the proof-number search transposition table, making room first if the
+        table is full: the unsolved nodes are forgotten, as they are cheap to expand again, then the oldest solved ones.
+        The root of the current proof and its children are kept whatever their numbers.
+        """
+        if key not in self.proof_table and len(self.proof_table) >= self.proof_table_size:
+            root_keys = self.proof_root_keys
+            self.proof_table = {k: numbers for k, numbers in self.proof_table.items() if 0 in numbers or k in root_keys}
+            evicted = [k for k in self.proof_table if k not in root_keys]
+            for k in evicted[:len(self.proof_table) - self.proof_table_size // 2]:
+                del self.proof_table[k]
+        self.proof_table[key] = phi, delta
+
     def get_average_depth(self):
         average_depth = self.average_depth / self.move_count
         self.average_depth = self.move_count = 0
@@ -172,10 +356,16 @@ class CustomPlayer(Player):
             if self.reordering:
                 moves.sort(key=lambda m: self.cache.get(board.forecast_key(m), float('-inf')), reverse=True)
 
-            for move in moves:
-                value = self.alphabeta(board.forecast_move(move), depth - 1, alpha, beta, not maximizing_player)[0]
+            # At depth 1, the children may be scored all at once, alpha-beta being applied afterwards
+            values = self.batch_values(board, moves) if depth == 1 else None
+            for i, move in enumerate(moves):
+                if values is None:
+                    value = self.search_child(board, move, i, depth, alpha, beta, maximizing_player)
+                else:
+                    value = values[i]
                 result = max(result, (value, move), key=itemgetter(0))
                 if value >= beta:
+                    self.search_stats['cutoffs'] += 1
                     break
                 alpha = max(alpha, value)
 
@@ -186,13 +376,91 @@ class CustomPlayer(Player):
             if self.reordering:
                 moves.sort(key=lambda m: self.cache.get(board.forecast_key(m), float('+inf')), reverse=False)
 
-            for move in moves:
-                value = self.alphabeta(board.forecast_move(move), depth - 1, alpha, beta, not maximizing_player)[0]
+            # At depth 1, the children may be scored all at once, alpha-beta being applied afterwards
+            values = self.batch_values(board, moves) if depth == 1 else None
+            for i, move in enumerate(moves):
+                if values is None:
+                    value = self.search_child(board, move, i, depth, alpha, beta, maximizing_player)
+                else:
+                    value = values[i]
                 result = min(result, (value, move), key=itemgetter(0))
                 if value <= alpha:
+                    self.search_stats['cutoffs'] += 1
                     break
                 beta = min(beta, value)
 
-        # Cache value and return it
-        self.cache[board.get_key()] = result[0]
+        # Cache value and return it, unless it is the bound of a reduced null window search
+        if not self.probing:
+            self.cache[board.get_key()] = result[0]
         return result
+
+    def search_child(self, board: Board, move: Location, move_index: int, depth: int, alpha: float, beta: float,
+                     maximizing_player: bool) -> float:
+        """
+        Search the child obtained by applying a move, applying late move reductions if enabled: a late move is first
+        searched at reduced depth with a null window, which only tells whether it can beat the current bound, and is
+        re-searched at full depth if it does. The values found by the reduced search are only bounds at a lower
+        depth: they are kept out of the cache the move ordering reads.
+
+        :param board: The current state of the game
+
+        :param move: The move leading to the child
+
+        :param move_index: The rank of the move in the move ordering
+
+        :param depth: The remaining depth of the current node
+
+        :param alpha: The lower bound of search on minimizing layers
+
+        :param beta: The upper bound of search on maximizing layers
+
+        :param maximizing_player: Must be True if the current node is a max node, False else
+
+        :return: The value of the child from the player's perspective
+        """
+        child = board.forecast_move(move)
+
+        if self.late_move_index is not None and move_index >= self.late_move_index:
+            reduction = min(self.reduction_schedule(depth, move_index), depth - 1)
+            # The null window is centered on the bound the move has to beat, so it must be finite
+            bound = alpha if maximizing_player else beta
+            if reduction > 0 and abs(bound) != float('inf'):
+                self.search_stats['reductions'] += 1
+                probing, self.probing = self.probing, True
+                try:
+                    value = self.alphabeta(child, depth - 1 - reduction, bound, bound, not maximizing_player)[0]
+                finally:
+                    self.probing = probing
+                if (value <= bound) if maximizing_player else (value >= bound):
+                    return value
+                self.search_stats['re-searches'] += 1
+
+        return self.alphabeta(child, depth - 1, alpha, beta, not maximizing_player)[0]
+
+    def get_search_stats(self) -> Dict[str, int]:
+        """
+        :return: The number of cutoffs, late move reductions and re-searches since the last call
+        """
+        stats = dict(self.search_stats)
+        self.search_stats.clear()
+        return stats
+
+    def batch_values(self, board: Board, moves: List[Location]) -> Optional[List[float]]:
+        """
+        Score all the children of a depth 1 node in a single call to the batched implementation of the heuristic.
+
+        :param board: The current state of the game
+
+        :param moves: The legal moves of the active player, in the order they will be explored
+
+        :return: The value of the child obtained by applying each move from the player's perspective, or None if
+                 batching is disabled or not supported for this board
+        """
+        if self.batch_fn is None or not moves or not frontier.supports(board):
+            return None
+
+        values = frontier.evaluate(board, self, moves, self.batch_fn)
+        if not self.probing:
+            for move, value in zip(moves, values):
+                self.cache[board.forecast_key(move)] = value
+        return values
@@ -1,11 +1,60 @@
-from typing import Callable
+from typing import Callable, Sequence
 from random import choice
 
+import numpy as np
+
 from isolation import Player, Board
+from features import features, features_batch
+from frontier import Frontier, Batched_Score_Function, mobility, reach_layers
 
 Score_Function = Callable[[Board, Player], float]
 
 
+def batched(batch_fn: Batched_Score_Function) -> Callable[[Score_Function], Score_Function]:
+    """
+    Declare a vectorized implementation of a heuristic, used by CustomPlayer.alphabeta() to score all the children of
+    a depth 1 node in a single call. It is stored in the `batched` attribute of the decorated heuristic.
+
+    :param batch_fn: A function taking a Frontier (and the same keyword arguments as the heuristic), and returning the
+                     heuristic values of all its game states as a NumPy array.
+
+    :return: A decorator registering batch_fn on the heuristic.
+    """
+    def decorator(score_fn: Score_Function) -> Score_Function:
+        score_fn.batched = batch_fn
+        return score_fn
+
+    return decorator
+
+
+def null_score_batch(frontier: Frontier) -> np.ndarray:
+    """Batched implementation of null_score() (terminal states are handled by the caller)."""
+    return np.zeros(len(frontier.own))
+
+
+def open_move_score_batch(frontier: Frontier) -> np.ndarray:
+    """Batched implementation of open_move_score()."""
+    return mobility(frontier, frontier.own).astype(float)
+
+
+def improved_score_batch(frontier: Frontier) -> np.ndarray:
+    """Batched implementation of improved_score()."""
+    return (mobility(frontier, frontier.own) - mobility(frontier, frontier.opp)).astype(float)
+
+
+def reach_score_batch(frontier: Frontier, common_ratio: float = 1.3) -> np.ndarray:
+    """Batched implementation of reach_score()."""
+    layers = reach_layers(frontier, frontier.own)
+    return layers @ np.power(common_ratio, -np.arange(layers.shape[1], dtype=float))
+
+
+def differential_reach_score_batch(frontier: Frontier, common_ratio: float = 1.4) -> np.ndarray:
+    """Batched implementation of differential_reach_score()."""
+    opp_frontier = frontier._replace(own=frontier.opp, opp=frontier.own)
+    return reach_score_batch(frontier, common_ratio) - reach_score_batch(opp_frontier, common_ratio)
+
+
+@batched(null_score_batch)
 def null_score(board: Board, player: Player) -> float:
     """
     This heuristic presumes no knowledge for non-terminal states, and
@@ -20,6 +69,7 @@ def null_score(board: Board, player: Player) -> float:
     return board.utility(player)
 
 
+@batched(open_move_score_batch)
 def open_move_score(board: Board, player: Player) -> float:
     """
     This heuristic returns a score equal to the number of moves open for a given player on the board.
@@ -33,6 +83,7 @@ def open_move_score(board: Board, player: Player) -> float:
     return float(len(board.get_legal_moves(player)))
 
 
+@batched(improved_score_batch)
 def improved_score(board: Board, player: Player):
     """
     This heuristic outputs a score equal to the difference in the number of moves available to the two players.
@@ -78,6 +129,7 @@ def pure_monte_carlo_score(board: Board, player: Player, nb_rollouts=5) -> float
     return average_outcome
 
 
+@batched(reach_score_batch)
 def reach_score(board: Board, player: Player, common_ratio: float = 1.3) -> float:
     """
     This heuristic outputs the reach score of a game state for a given player, which is defined as the sum over
@@ -98,6 +150,7 @@ def reach_score(board: Board, player: Player, common_ratio: float = 1.3) -> floa
     return float(sum([len(cells) * pow(common_ratio, 1 - depth) for depth, cells in reachable.items()]))
 
 
+@batched(differential_reach_score_batch)
 def differential_reach_score(board: Board, player: Player, common_ratio: float = 1.4) -> float:
     """
     This heuristic outputs the differential reach score of a game state for a given player, which is defined as
@@ -112,3 +165,24 @@ def differential_reach_score(board: Board, player: Player, common_ratio: float =
     :return: The heuristic value of the input game state for the input player.
     """
     return reach_score(board, player, common_ratio) - reach_score(board, board.get_opponent(player), common_ratio)
+
+
+def linear_score(weights: Sequence[float]) -> Score_Function:
+    """
+    Build a heuristic outputting a weighted sum of the features of a game state (see features.FEATURE_NAMES), e.g.
+    with weights fitted on a corpus of games by tuning.py.
+
+    :param weights: The weight of each feature
+
+    :return: The heuristic, with its batched implementation.
+    """
+    weights = np.asarray(weights, dtype=float)
+
+    def linear_score_batch(frontier: Frontier) -> np.ndarray:
+        return features_batch(frontier) @ weights
+
+    @batched(linear_score_batch)
+    def score(board: Board, player: Player) -> float:
+        return float(np.dot(features(board, player), weights))
+
+    return score
@@ -1,3 +1,4 @@
+from functools import lru_cache
 from timeit import default_timer
 from typing import Tuple, List, Callable, Union, Dict
 from abc import ABCMeta, abstractmethod
@@ -95,6 +96,16 @@ class Board(object):
         new_board.board_state = self.board_state
         return new_board
 
+    def snapshot(self) -> 'Board':
+        """
+        :return: A copy of the current board, made without going through the constructor: all the attributes are
+                 shared with the current board but the locations, the only mutable one.
+        """
+        new_board = object.__new__(self.__class__)
+        new_board.__dict__.update(self.__dict__)
+        new_board.locations = self.locations.copy()
+        return new_board
+
     def forecast_move(self, move: Location) -> 'Board':
         """
         Make a deep copy of the current game with an input move applied to advance the game one ply.
@@ -158,6 +169,26 @@ class Board(object):
         r, c = location
         return [(r + dr, c + dc) for dr, dc in Board.L_MOVES if self.is_available(self.board_state, (r + dr, c + dc))]
 
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def move_masks(width: int, height: int) -> Tuple[int, ...]:
+        """
+        :param width:  The number of columns of the board.
+        :param height: The number of rows of the board.
+        :return: For each cell (r, c), an int whose (r2*width+c2)-th bit is equal to 1 if cell (r2, c2) is reachable
+                 from (r, c) by a L-shaped move, regardless of its availability
+        """
+        masks = []
+        for r in range(height):
+            for c in range(width):
+                mask = 0
+                for dr, dc in Board.L_MOVES:
+                    # noinspection PyChainedComparisons
+                    if 0 <= r + dr < height and 0 <= c + dc < width:
+                        mask |= 1 << ((r + dr) * width + c + dc)
+                masks.append(mask)
+        return tuple(masks)
+
     def get_reachable_locations(self, player: Player) -> Dict[int, List[Location]]:
         """
         :param player: One of the registered player of the current game
@@ -255,12 +286,15 @@ class Board(object):
 
         return timer
 
-    def play(self, time_limit: float = 100) -> Tuple[Player, List[Location], str]:
+    def play(self, time_limit: float = 100,
+             on_move: Callable[[Player, Location], None] = None) -> Tuple[Player, List[Location], str]:
         """
         Execute a match between the players by alternately soliciting them to select a move and applying it in the game.
 
         :param time_limit: (Optional) The number of ms to allow before timeout during each turn. Defaults to 100 ms.
 
+        :param on_move: (Optional) A function called with the active player and his move after each applied move.
+
         :return: the winning player, the complete game history and a string indicating the reason for losing
                  ('timeout' or 'invalid move').
         """
@@ -285,5 +319,73 @@ class Board(object):
 
             self.apply_move(move)
             history.append(move)
+            if on_move is not None:
+                on_move(self.inactive_player, move)
 
         return self.inactive_player, history, reason
+
+    def play_fast(self, time_limit: float = 100, snapshot: bool = True) -> Tuple[Player, List[Location], str]:
+        """
+        Headless and low-overhead version of play(), for fast agents (random players, rollout bots...) whose games
+        would otherwise be dominated by the cost of the match loop itself:
+        - agents are handed a snapshot of the board (see snapshot()), cheaper than the copy made by play()
+        - or, if snapshot is False, the board itself: this is an unchecked mode for trusted agents, which must not
+          apply moves to it (they can forecast them). An agent that does is only detected once its get_move() returns,
+          by a RuntimeError, the game being corrupted by then.
+        - moves are validated against a bitmask of the legal destinations, instead of building the list of legal moves
+        - a single timer is reused for all turns, and the history is recorded in a preallocated list
+        - nothing is printed when a player times out
+
+        :param time_limit: (Optional) The number of ms to allow before timeout during each turn. Defaults to 100 ms.
+
+        :param snapshot: (Optional) Set to False to hand the board itself to the agents instead of a copy.
+
+        :return: the winning player, the complete game history and a string indicating the reason for losing
+                 ('timeout' or 'illegal move').
+        """
+        width, height = self.width, self.height
+        masks = Board.move_masks(width, height)
+        all_cells = (1 << (width * height)) - 1
+        history = [None] * (width * height - self.move_count)
+        nb_moves = 0
+
+        deadline = 0.
+
+        def time_left() -> float:
+            return deadline - 1000 * default_timer()
+
+        while True:
+            player = self.active_player
+            deadline = time_limit + 1000 * default_timer()
+            if snapshot:
+                move = player.get_move(self.snapshot(), time_left)
+            else:
+                move_count = self.move_count
+                move = player.get_move(self, time_left)
+                if self.move_count != move_count:
+                    raise RuntimeError('An agent applied a move to the board it was handed by play_fast().')
+
+            if time_left() < 0 and player.is_time_limited:
+                reason = 'timeout'
+                break
+
+            location = self.locations[player]
+            if location == Board.NOT_MOVED:
+                legal_cells = all_cells & ~self.board_state
+            else:
+                legal_cells = masks[location[0] * width + location[1]] & ~self.board_state
+            try:
+                row, col = move
+                # noinspection PyChainedComparisons
+                legal = 0 <= row < height and 0 <= col < width and (legal_cells >> (row * width + col)) & 1
+            except (TypeError, ValueError):
+                legal = False
+            if not legal:
+                reason = 'illegal move'
+                break
+
+            self.apply_move(move)
+            history[nb_moves] = move
+            nb_moves += 1
+
+        return self.inactive_player, history[:nb_moves], reason
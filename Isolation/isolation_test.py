@@ -0,0 +1,62 @@
+"""
+This file contains test cases for the headless match loop Board.play_fast().
+"""
+import unittest
+from random import seed
+
+from isolation import Board, Player
+from sample_players import RandomPlayer
+
+
+class CheatingPlayer(Player):
+    """Agent applying its move to the board it is handed."""
+
+    def get_move(self, board, time_left):
+        legal_moves = board.get_legal_moves()
+        if not legal_moves:
+            return Board.NOT_MOVED
+        board.apply_move(legal_moves[0])
+        return legal_moves[0]
+
+
+class PlayFastTest(unittest.TestCase):
+
+    def test_same_games(self):
+        """ Test that play_fast() plays the same games as play(), with or without snapshots """
+        for snapshot in (True, False):
+            for game in range(20):
+                results = []
+                for play in (Board.play, lambda board: board.play_fast(snapshot=snapshot)):
+                    seed(game)
+                    player_1, player_2 = RandomPlayer(), RandomPlayer()
+                    board = Board(player_1, player_2)
+                    winner, history, reason = play(board)
+                    results.append((winner == player_1, history, reason, board.get_key()[0]))
+                self.assertEqual(results[0], results[1])
+
+    def test_snapshot(self):
+        """ Test that a snapshot is equal to the board, and does not share its locations """
+        board = Board(RandomPlayer(), RandomPlayer())
+        board.apply_move((3, 3))
+        snapshot = board.snapshot()
+        self.assertEqual(snapshot.get_key(), board.get_key())
+        snapshot.apply_move((2, 2))
+        self.assertNotEqual(snapshot.get_key(), board.get_key())
+        self.assertEqual(board.get_key(), (1 << 24, (3, 3), None, False))
+
+    def test_modified_board(self):
+        """ Test that an agent applying moves to the board it is handed without snapshot is detected """
+        seed(0)
+        board = Board(CheatingPlayer(), RandomPlayer())
+        with self.assertRaises(RuntimeError):
+            board.play_fast(snapshot=False)
+        seed(0)
+        board = Board(CheatingPlayer(), RandomPlayer())
+        winner, history, reason = board.play_fast(snapshot=True)
+        # The moves of the cheating agent were applied to its snapshots only: the board holds the history alone
+        self.assertEqual(board.move_count, len(history))
+        self.assertEqual(reason, 'illegal move')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+"""
+Opt-in profiling of agents, to tell whether a heuristic loses on evaluation quality or on search depth.
+
+The Profiler wraps the heuristic (and its batched implementation), the search methods of CustomPlayer agents, and the
+get_legal_moves() and forecast_move() methods of the Board class with timers. Each call is attributed to the stack of
+instrumented frames it was made from, the root frame being the agent whose get_move() is running, so that time can be
+broken down per agent. Results are available as a summary table, or as a collapsed-stack file that flamegraph.pl or
+speedscope can render.
+"""
+from collections import defaultdict, Counter
+from functools import wraps
+from time import perf_counter
+from typing import Callable, Dict, List, Tuple
+
+from isolation import Board, Player
+
+MATCH_LOOP = '(match loop)'  # root frame of the calls made outside of get_move()
+BOARD_METHODS = ['get_legal_moves', 'forecast_move']
+AGENT_METHODS = ['score', 'batch_fn', 'alphabeta', 'minimax', 'prove_win', 'proof_number_search']
+
+
+class Profiler(object):
+    """Attribute the time spent in instrumented functions to the stack of instrumented frames they were called from."""
+
+    def __init__(self):
+        self.keys = []  # collapsed stack of each open frame
+        self.children_time = []  # time spent in the instrumented children of each open frame
+        self.self_time = defaultdict(float)  # collapsed stack -> time spent in the frame itself
+        self.calls = Counter()  # collapsed stack -> number of calls
+        self.board_methods = {}
+
+    def wrap(self, name: str, fn: Callable) -> Callable:
+        """
+        :param name: Name of the frame
+        :param fn:   The function to instrument
+        :return: A function calling fn, and measuring the time spent in it
+        """
+        keys, children_time, self_time, calls = self.keys, self.children_time, self.self_time, self.calls
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = keys[-1] + ';' + name if keys else MATCH_LOOP + ';' + name
+            keys.append(key)
+            children_time.append(0.)
+            start = perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = perf_counter() - start
+                keys.pop()
+                self_time[key] += elapsed - children_time.pop()
+                calls[key] += 1
+                if children_time:
+                    children_time[-1] += elapsed
+
+        return wrapper
+
+    def instrument(self, player: Player, name: str):
+        """
+        Instrument the get_move() method of an agent (as the root frame, named after the agent), and its heuristic and
+        search methods if it has some.
+
+        :param player: An agent
+        :param name:   The name of the agent
+        """
+        root = name.replace(' ', '_').replace(';', '_')
+        for method in AGENT_METHODS:
+            fn = getattr(player, method, None)
+            if fn is not None:
+                setattr(player, method, self.wrap(method, fn))
+
+        get_move = player.get_move
+        keys, children_time, self_time, calls = self.keys, self.children_time, self.self_time, self.calls
+
+        @wraps(get_move)
+        def wrapper(*args, **kwargs):
+            # get_move is not nested in any instrumented frame: its stack starts with the name of the agent
+            key = root + ';get_move'
+            keys.append(key)
+            children_time.append(0.)
+            start = perf_counter()
+            try:
+                return get_move(*args, **kwargs)
+            finally:
+                keys.pop()
+                self_time[key] += perf_counter() - start - children_time.pop()
+                calls[key] += 1
+
+        player.get_move = wrapper
+
+    def start(self):
+        """Instrument the methods of the Board class."""
+        for method in BOARD_METHODS:
+            self.board_methods[method] = getattr(Board, method)
+            setattr(Board, method, self.wrap(method, self.board_methods[method]))
+
+    def stop(self):
+        """Restore the methods of the Board class."""
+        for method, fn in self.board_methods.items():
+            setattr(Board, method, fn)
+        self.board_methods = {}
+
+    def __enter__(self) -> 'Profiler':
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def write_collapsed(self, path: str):
+        """
+        Write the profile in the collapsed-stack format: one line per stack, with its self time in microseconds.
+
+        :param path: Path of the file to write
+        """
+        with open(path, 'w') as file:
+            for key, seconds in sorted(self.self_time.items()):
+                file.write('{} {}\n'.format(key, int(round(1e6 * seconds))))
+
+    def breakdown(self) -> Dict[str, Dict[str, Tuple[int, float]]]:
+        """
+        :return: For each root frame (agent), the number of calls and self time (in seconds) of each function,
+                 recursive calls being merged
+        """
+        result = defaultdict(lambda: defaultdict(lambda: [0, 0.]))
+        for key, seconds in self.self_time.items():
+            frames = key.split(';')
+            entry = result[frames[0]][frames[-1]]
+            entry[0] += self.calls[key]
+            entry[1] += seconds
+        return {root: {fn: tuple(entry) for fn, entry in functions.items()} for root, functions in result.items()}
+
+    def summary(self) -> List[str]:
+        """
+        :return: Lines of a table of the hot spots of each agent
+        """
+        lines = []
+        for root, functions in sorted(self.breakdown().items()):
+            total = sum(seconds for _, seconds in functions.values())
+            lines.append('')
+            lines.append('{:<30}{:>12}{:>12}{:>8}'.format(root, 'Calls', 'Self (ms)', '%'))
+            for fn, (calls, seconds) in sorted(functions.items(), key=lambda item: -item[1][1]):
+                lines.append('  {:<28}{:>12}{:>12.1f}{:>7.1f}%'.format(fn, calls, 1000 * seconds,
+                                                                      100 * seconds / total if total else 0.))
+            lines.append('  {:<28}{:>12}{:>12.1f}'.format('total', '', 1000 * total))
+        return lines
@@ -0,0 +1,89 @@
+"""
+This file contains test cases for the depth-first proof-number search of CustomPlayer.
+"""
+import unittest
+from random import Random
+
+from agent_test import timeout
+from game_agent import CustomPlayer, PROOF_INFINITY
+from isolation import Board
+from sample_players import RandomPlayer
+
+
+def late_positions(agent, nb_boards, seed, max_reachable_cells=18):
+    """Generate late game states reached by random play, in which the agent is to move and not stuck."""
+    rng = Random(seed)
+    boards = []
+    while len(boards) < nb_boards:
+        board = Board(agent, RandomPlayer())
+        for _ in range(2 * rng.randint(8, 15)):
+            legal_moves = board.get_legal_moves()
+            if not legal_moves:
+                break
+            board.apply_move(rng.choice(legal_moves))
+        if board.get_legal_moves() and agent.nb_reachable_cells(board) <= max_reachable_cells:
+            boards.append(board)
+    return boards
+
+
+class ProofNumberSearchTest(unittest.TestCase):
+
+    def check_proofs(self, agent, boards):
+        """Check that prove_win finds a winning move exactly when exhaustive alpha-beta proves a win."""
+        for board in boards:
+            move = agent.prove_win(board)
+            value, _ = agent.alphabeta(board, board.width * board.height)
+            self.assertEqual(move is not None, value == float('inf'))
+            if move is not None:
+                self.assertIn(move, board.get_legal_moves())
+                self.assertEqual(agent.alphabeta(board.forecast_move(move), board.width * board.height,
+                                                 maximizing_player=False)[0], float('inf'))
+
+    @timeout(20)
+    def test_prove_win(self):
+        """ Test that CustomPlayer.prove_win finds a winning move exactly when exhaustive alpha-beta proves a win """
+        agent = CustomPlayer(score_fn=lambda g, p: 0., method='alphabeta', proof_threshold=100)
+        agent.time_left = lambda: 1e9
+        self.check_proofs(agent, late_positions(agent, 30, seed=7))
+
+    @timeout(20)
+    def test_table_size(self):
+        """ Test that the transposition table stays within its bound during a search, without changing results """
+        agent = CustomPlayer(score_fn=lambda g, p: 0., method='alphabeta', proof_threshold=100, proof_table_size=128)
+        agent.time_left = lambda: 1e9
+        boards = late_positions(agent, 20, seed=8)
+        self.check_proofs(agent, boards)
+
+        largest = 0
+        store = agent.store_proof_numbers
+
+        def checked_store(key, phi, delta):
+            nonlocal largest
+            store(key, phi, delta)
+            largest = max(largest, len(agent.proof_table))
+
+        agent.store_proof_numbers = checked_store
+        for board in boards:
+            agent.proof_table = dict()
+            agent.prove_win(board)
+        self.assertLessEqual(largest, 128)
+
+    def test_root_children_kept(self):
+        """ Test that evictions keep the children of the root, from which the winning move is read """
+        agent = CustomPlayer(score_fn=lambda g, p: 0., method='alphabeta', proof_threshold=100)
+        agent.time_left = lambda: 1e9
+        board = next(board for board in late_positions(agent, 10, seed=9) if agent.prove_win(board) is not None)
+        move = agent.prove_win(board)
+        root_numbers = {key: agent.proof_table[key] for key in agent.proof_root_keys}
+
+        # Fill a small table with newer solved nodes, which the oldest solved ones make room for
+        agent.proof_table_size = 4
+        for i in range(10):
+            agent.store_proof_numbers(('solved', i), 0, PROOF_INFINITY)
+            self.assertLessEqual(len(agent.proof_table), len(root_numbers) + agent.proof_table_size)
+        for key, numbers in root_numbers.items():
+            self.assertEqual(agent.proof_table[key], numbers)
+        self.assertEqual(agent.prove_win(board), move)
+
+if __name__ == '__main__':
+    unittest.main()
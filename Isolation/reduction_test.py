@@ -0,0 +1,102 @@
+"""
+This file contains test cases for the late move reductions of CustomPlayer.alphabeta().
+"""
+import unittest
+
+import heuristics
+from frontier_test import random_boards
+from game_agent import CustomPlayer
+from isolation import Board
+
+LATE_MOVE_INDEX = 2
+
+
+def take_over(agent, board):
+    """Return a copy of the board in which the agent replaces the active player."""
+    agent.time_left = lambda: 1e3
+    game = Board(agent, board.inactive_player, board.width, board.height)
+    game.board_state, game.move_count = board.board_state, board.move_count
+    game.locations = {agent: board.locations[board.active_player],
+                      board.inactive_player: board.locations[board.inactive_player]}
+    return game
+
+
+def make_agent(late_move_index=None):
+    return CustomPlayer(score_fn=heuristics.improved_score, method='alphabeta', late_move_index=late_move_index)
+
+
+class LateMoveReductionTest(unittest.TestCase):
+
+    def test_disabled(self):
+        """ Test that without late moves, the values are those of plain alphabeta and nothing is reduced """
+        for board in random_boards(10, seed=3):
+            for depth in (3, 4, 5):
+                plain = make_agent()
+                expected = plain.alphabeta(take_over(plain, board), depth)
+                for late_move_index in (None, 100):
+                    agent = make_agent(late_move_index)
+                    self.assertEqual(agent.alphabeta(take_over(agent, board), depth), expected)
+                    stats = agent.get_search_stats()
+                    self.assertEqual(stats.get('reductions', 0), 0)
+                    self.assertEqual(stats.get('re-searches', 0), 0)
+
+    def test_counters(self):
+        """ Test that late moves are reduced, and that only some of them are re-searched """
+        reductions, re_searches = 0, 0
+        for board in random_boards(10, seed=4):
+            agent = make_agent(LATE_MOVE_INDEX)
+            agent.alphabeta(take_over(agent, board), 5)
+            stats = agent.get_search_stats()
+            self.assertLessEqual(stats.get('re-searches', 0), stats.get('reductions', 0))
+            reductions += stats.get('reductions', 0)
+            re_searches += stats.get('re-searches', 0)
+        self.assertGreater(reductions, 0)
+        self.assertGreater(re_searches, 0)
+        self.assertLess(re_searches, reductions)
+
+    def test_best_move(self):
+        """ Test that the move chosen with reductions is never worse than the moves searched at full depth """
+        # At depth 3, only the children of the root are reduced (see default_reduction): the other values are exact
+        depth = 3
+        for board in random_boards(30, seed=5):
+            plain = make_agent()
+            game = take_over(plain, board)
+            exact = {move: plain.alphabeta(game.forecast_move(move), depth - 1, maximizing_player=False)[0]
+                     for move in game.get_legal_moves()}
+
+            agent = make_agent(LATE_MOVE_INDEX)
+            game = take_over(agent, board)
+            value, move = agent.alphabeta(game, depth)
+            full_depth_moves = game.get_legal_moves()[:LATE_MOVE_INDEX]
+            self.assertEqual(value, exact[move])
+            self.assertGreaterEqual(exact[move], max(exact[m] for m in full_depth_moves))
+
+    def test_cache(self):
+        """ Test that the reduced null window searches write no value in the cache read by the move ordering """
+        for board in random_boards(10, seed=6):
+            agent = make_agent(LATE_MOVE_INDEX)
+            null_windows = 0
+            alphabeta = agent.alphabeta
+
+            def checked_alphabeta(board, depth, alpha=float("-inf"), beta=float("inf"), maximizing_player=True):
+                nonlocal null_windows
+                null_windows += alpha == beta
+                try:
+                    return alphabeta(board, depth, alpha, beta, maximizing_player)
+                finally:
+                    null_windows -= alpha == beta
+
+            class CheckedCache(dict):
+                def __setitem__(cache, key, value):
+                    self.assertEqual(null_windows, 0)
+                    dict.__setitem__(cache, key, value)
+
+            agent.alphabeta = checked_alphabeta
+            game = take_over(agent, board)
+            agent.cache = CheckedCache()
+            agent.alphabeta(game, 5)
+            self.assertGreater(agent.get_search_stats().get('reductions', 0), 0)
+            self.assertGreater(len(agent.cache), 0)
+
+if __name__ == '__main__':
+    unittest.main()
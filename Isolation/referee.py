@@ -0,0 +1,294 @@
+"""
+Referee running each agent in its own process, and many games concurrently with asyncio.
+
+Unlike Board.play(), which calls get_move() in-process and only detects timeouts once it returns, the referee enforces
+the deadline of each turn on the wall clock: an agent that does not answer before the timer from Board.make_timer()
+expires is killed and forfeits the game. An agent that crashes also forfeits, without affecting the other games.
+
+Agents speak a small line protocol on their standard input and output:
+- referee: "new <width> <height> <1|2>"  a new game starts, the agent playing first (1) or second (2)
+  agent:   "ready"
+- referee: "play <row> <col>"             a move (of either player) was applied to the board
+- referee: "go <time limit in ms>"        the agent must move
+  agent:   "move <row> <col>"
+- referee: "quit"
+
+Example:
+    python referee.py --player1 ID_Differential_Reach --player2 AB_Improved --matches 20 --concurrency 8
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+from collections import namedtuple, Counter
+from random import Random
+from typing import List, Tuple, Union, TextIO, Optional
+
+from isolation import Board, Player, Location, Timer
+from selfplay import Agent_Spec, AGENT_SPECS, make_agent, parse_agent_spec
+
+Game_Result = namedtuple('Game_Result', ['winner', 'history', 'reason'])
+Game_Result.__doc__ = """
+- winner:  0 if the first agent of the match won the game, 1 else
+- history: the moves of the game, opening moves included
+- reason:  reason for losing ('illegal move', 'timeout' or 'crash')
+"""
+
+STARTUP_TIMEOUT = 30.  # number of seconds an agent process is given to start and answer "ready"
+QUIT_TIMEOUT = 1.  # number of seconds an agent process is given to exit after "quit"
+
+
+class RemotePlayer(Player):
+    """Placeholder for a player whose moves are chosen in another process."""
+
+    def get_move(self, board: Board, time_left: Timer) -> Location:
+        raise RuntimeError('The moves of a remote player are not chosen locally.')
+
+
+def serve(agent: Player, stdin: TextIO, stdout: TextIO):
+    """
+    Answer the requests of a referee on behalf of an agent, until "quit" or the end of the input.
+
+    :param agent:  The agent choosing the moves
+    :param stdin:  Stream of the referee requests
+    :param stdout: Stream of the answers
+    """
+    board = None
+    for line in stdin:
+        command, *args = line.split()
+        if command == 'new':
+            width, height, index = map(int, args)
+            opponent = RemotePlayer()
+            players = (agent, opponent) if index == 1 else (opponent, agent)
+            board = Board(players[0], players[1], width, height)
+            answer = 'ready'
+        elif command == 'play':
+            board.apply_move((int(args[0]), int(args[1])))
+            continue
+        elif command == 'go':
+            time_left = Board.make_timer(float(args[0]))
+            row, col = agent.get_move(board.copy(), time_left)
+            answer = 'move {} {}'.format(row, col)
+        elif command == 'quit':
+            break
+        else:
+            raise ValueError('Unknown command: {}'.format(line))
+
+        stdout.write(answer + '\n')
+        stdout.flush()
+
+
+class AgentProcess(object):
+    """An agent running in a subprocess, driven by the referee."""
+
+    def __init__(self, spec: Union[str, Agent_Spec], timeout: float):
+        """
+        :param spec:    Specification of the agent (see selfplay.make_agent)
+        :param timeout: Time margin (in ms) of CustomPlayer agents
+        """
+        self.spec = spec
+        self.timeout = timeout
+        self.process = None
+
+    async def start(self):
+        self.process = await asyncio.create_subprocess_exec(
+            sys.executable, os.path.abspath(__file__), 'serve', json.dumps(self.spec), str(self.timeout),
+            stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE,
+            cwd=os.path.dirname(os.path.abspath(__file__)))
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+
+    async def send(self, line: str):
+        self.process.stdin.write((line + '\n').encode())
+        await self.process.stdin.drain()
+
+    async def receive(self, timeout: float) -> Optional[str]:
+        """
+        :param timeout: Number of seconds to wait for the answer
+        :return: The next line written by the agent, or None if it exited. Raises asyncio.TimeoutError if late.
+        """
+        line = await asyncio.wait_for(self.process.stdout.readline(), max(0., timeout))
+        return line.decode().strip() or None
+
+    async def new_game(self, width: int, height: int, index: int):
+        """
+        Start a new game, (re)starting the process first if needed.
+        Raises RuntimeError if the agent does not answer "ready", or ConnectionError if its process exited.
+        """
+        if not self.alive:
+            await self.start()
+        await self.send('new {} {} {}'.format(width, height, index))
+        if await self.receive(STARTUP_TIMEOUT) != 'ready':
+            raise RuntimeError('Agent {} failed to start.'.format(self.spec))
+
+    async def kill(self):
+        if self.alive:
+            self.process.kill()
+            await self.process.wait()
+
+    async def close(self):
+        if self.alive:
+            try:
+                await self.send('quit')
+                await asyncio.wait_for(self.process.wait(), QUIT_TIMEOUT)
+            except (asyncio.TimeoutError, ConnectionError):
+                await self.kill()
+
+
+async def play_game(agents: List[AgentProcess], time_limit: float, opening: List[Location] = (),
+                    width: int = 7, height: int = 7) -> Game_Result:
+    """
+    Referee a game between two agent processes.
+
+    :param agents:     The agent playing first, and the agent playing second
+    :param time_limit: The number of ms to allow before timeout during each turn
+    :param opening:    Moves applied before asking the agents to play
+    :param width:      The number of columns of the board
+    :param height:     The number of rows of the board
+
+    :return: The result of the game
+    """
+    board = Board(RemotePlayer(), RemotePlayer(), width, height)
+    history = []
+
+    # An agent that fails to start or whose process exited forfeits the game
+    async def crash(index: int) -> Game_Result:
+        await agents[index].kill()
+        return Game_Result(1 - index, history, 'crash')
+
+    async def broadcast(move: Location) -> Optional[int]:
+        """Send a move to both agents, and return the index of the first one whose process exited, if any."""
+        for index, agent in enumerate(agents):
+            try:
+                await agent.send('play {} {}'.format(*move))
+            except ConnectionError:
+                return index
+        return None
+
+    for index, agent in enumerate(agents):
+        try:
+            await agent.new_game(width, height, index + 1)
+        except (RuntimeError, ConnectionError, asyncio.TimeoutError):
+            return await crash(index)
+
+    for move in opening:
+        board.apply_move(move)
+        history.append(move)
+        failed = await broadcast(move)
+        if failed is not None:
+            return await crash(failed)
+
+    while True:
+        index = 0 if board.active_player == board.player_1 else 1
+        agent = agents[index]
+        time_left = Board.make_timer(time_limit)
+        try:
+            await agent.send('go {}'.format(time_limit))
+            answer = await agent.receive(time_left() / 1000)
+        except asyncio.TimeoutError:
+            await agent.kill()
+            return Game_Result(1 - index, history, 'timeout')
+        except ConnectionError:
+            answer = None
+
+        if answer is None:
+            return await crash(index)
+        if time_left() < 0:
+            return Game_Result(1 - index, history, 'timeout')
+
+        try:
+            command, row, col = answer.split()
+            move = int(row), int(col)
+        except ValueError:
+            command, move = None, None
+        if command != 'move' or move not in board.get_legal_moves():
+            return Game_Result(1 - index, history, 'illegal move')
+
+        board.apply_move(move)
+        history.append(move)
+        failed = await broadcast(move)
+        if failed is not None:
+            return await crash(failed)
+
+
+async def play_match(specs: Tuple[Union[str, Agent_Spec], Union[str, Agent_Spec]], time_limit: float,
+                     timeout: float, opening: List[Location], width: int, height: int) -> List[Game_Result]:
+    """
+    Play a match (= two games, with each agent starting once from the same opening) between two agents, each running
+    in its own process for the whole match.
+
+    :return: The results of both games, from the perspective of the first agent
+    """
+    agents = [AgentProcess(spec, timeout) for spec in specs]
+    try:
+        first = await play_game(agents, time_limit, opening, width, height)
+        second = await play_game(agents[::-1], time_limit, opening, width, height)
+        return [first, second._replace(winner=1 - second.winner)]
+    finally:
+        for agent in agents:
+            await agent.close()
+
+
+async def run_matches(specs: Tuple[Union[str, Agent_Spec], Union[str, Agent_Spec]], nb_matches: int,
+                      time_limit: float = 50, timeout: float = 10., concurrency: int = 4, nb_opening_moves: int = 2,
+                      width: int = 7, height: int = 7, seed: int = 0) -> List[Game_Result]:
+    """
+    Play matches between two agents from random openings, running at most `concurrency` matches at the same time.
+
+    :return: The results of all the games, from the perspective of the first agent
+    """
+    rng = Random(seed)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    def random_opening() -> List[Location]:
+        board = Board(RemotePlayer(), RemotePlayer(), width, height)
+        opening = []
+        for _ in range(nb_opening_moves):
+            move = rng.choice(board.get_legal_moves())
+            board.apply_move(move)
+            opening.append(move)
+        return opening
+
+    async def limited(opening: List[Location]) -> List[Game_Result]:
+        async with semaphore:
+            return await play_match(specs, time_limit, timeout, opening, width, height)
+
+    openings = [random_opening() for _ in range(nb_matches)]
+    matches = await asyncio.gather(*(limited(opening) for opening in openings))
+    return [result for match in matches for result in match]
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == 'serve':
+        # Agent side: the protocol uses the original standard output, anything printed by the agent goes to stderr
+        protocol_output, sys.stdout = sys.stdout, sys.stderr
+        serve(make_agent(json.loads(sys.argv[2]), float(sys.argv[3])), sys.stdin, protocol_output)
+        return
+
+    parser = argparse.ArgumentParser(description='Referee matches between agents running in separate processes.')
+    parser.add_argument('--player1', type=parse_agent_spec, default='ID_Improved',
+                        help='first agent: one of {} or a JSON specification'.format(', '.join(AGENT_SPECS)))
+    parser.add_argument('--player2', type=parse_agent_spec, default='AB_Improved', help='second agent')
+    parser.add_argument('--matches', type=int, default=10, help='number of matches (of two games each)')
+    parser.add_argument('--time-limit', type=float, default=50, help='time limit of each turn in ms')
+    parser.add_argument('--timeout', type=float, default=10, help='time margin of the agents in ms')
+    parser.add_argument('--concurrency', type=int, default=os.cpu_count() // 2 or 1,
+                        help='number of matches played at the same time')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the random openings')
+    args = parser.parse_args()
+
+    results = asyncio.run(run_matches((args.player1, args.player2), args.matches, args.time_limit, args.timeout,
+                                      args.concurrency, seed=args.seed))
+
+    wins = Counter(result.winner for result in results)
+    reasons = Counter((result.winner, result.reason) for result in results)
+    print('Result: {} to {}'.format(wins[0], wins[1]))
+    for (winner, reason), count in sorted(reasons.items()):
+        print('  {} games lost by {} ({})'.format(count, 'player 2' if winner == 0 else 'player 1', reason))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+This file contains test cases for the referee: the line protocol spoken by the agents, and the forfeits of the agents
+that time out or crash.
+"""
+import asyncio
+import io
+import unittest
+
+from isolation import Board, Player
+from referee import serve, run_matches, RemotePlayer
+
+SLOW_AGENT = {'score_fn': 'improved_score', 'method': 'alphabeta', 'timeout': -1000.}  # answers a second late
+BROKEN_AGENT = {'score_fn': 'no_such_heuristic'}  # fails to start
+
+
+class FirstMovePlayer(Player):
+    """Deterministic agent playing its first legal move."""
+
+    def get_move(self, board, time_left):
+        return board.get_legal_moves()[0]
+
+
+class ProtocolTest(unittest.TestCase):
+
+    def test_serve(self):
+        """ Test that an agent answers each referee request, plays on the board the referee describes, and stops
+        at "quit" """
+        board = Board(RemotePlayer(), RemotePlayer())
+        requests, expected = ['new 7 7 2'], ['ready']
+        for opponent_move in [(3, 3), (5, 4), (0, 0)]:
+            board.apply_move(opponent_move)
+            requests += ['play {} {}'.format(*opponent_move), 'go 100']
+            move = board.get_legal_moves()[0]
+            board.apply_move(move)
+            requests.append('play {} {}'.format(*move))
+            expected.append('move {} {}'.format(*move))
+        requests += ['quit', 'new 7 7 1']
+
+        answers = io.StringIO()
+        serve(FirstMovePlayer(), io.StringIO('\n'.join(requests) + '\n'), answers)
+        self.assertEqual(answers.getvalue().splitlines(), expected)
+
+
+class ForfeitTest(unittest.TestCase):
+
+    def test_timeout(self):
+        """ Test that an agent answering after the deadline loses by timeout """
+        results = asyncio.run(run_matches(('Random', SLOW_AGENT), 1, time_limit=50, concurrency=1))
+        self.assertEqual([(result.winner, result.reason) for result in results], [(0, 'timeout')] * 2)
+
+    def test_crash(self):
+        """ Test that an agent failing to start loses by crash, without stopping the other matches """
+        results = asyncio.run(run_matches((BROKEN_AGENT, 'Random'), 2, time_limit=50, concurrency=2))
+        self.assertEqual([(result.winner, result.reason) for result in results], [(1, 'crash')] * 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,284 @@
+"""
+Generate large corpora of Isolation games by self-play, running the games across several processes.
+
+Games are streamed to a chunked, compressed binary file. The file starts with a header (magic number, format version,
+board width and height), followed by chunks made of the length of a zlib compressed block, and the block itself.
+Each block is the concatenation of game records:
+- a fixed size part: the winner (1 or 2), the reason for losing, the number of random opening moves, the number of moves
+- the moves, packed as cell indices (r * width + c)
+- the value of the search behind each move, from the mover's perspective, as float32 (NaN for random moves)
+- the depth of the search behind each move (0 for random moves)
+
+Games can then be iterated lazily with iter_games(), one chunk being decompressed at a time.
+
+Example:
+    python selfplay.py games.bin --games 1000 --player1 ID_Improved --player2 ID_Differential_Reach
+"""
+import argparse
+import json
+import struct
+import zlib
+from array import array
+from collections import namedtuple
+from multiprocessing import Pool
+from random import Random
+from typing import Dict, Iterator, Union
+
+import heuristics
+from game_agent import CustomPlayer
+from isolation import Board, Player, Location
+from sample_players import RandomPlayer
+
+MAGIC = b'ISOG'
+VERSION = 1
+FILE_HEADER = struct.Struct('<4sBBB')
+CHUNK_HEADER = struct.Struct('<I')
+RECORD_HEADER = struct.Struct('<BBBH')
+REASONS = ['illegal move', 'timeout']
+
+Agent_Spec = Dict[str, Union[str, int, float, bool]]
+
+# Agents that can be referred to by name, using the same settings as in tournament.py
+AGENT_SPECS = {
+    'Random': {'type': 'random'},
+    'MM_Improved': {'score_fn': 'improved_score', 'search_depth': 3, 'method': 'minimax', 'iterative': False},
+    'AB_Improved': {'score_fn': 'improved_score', 'search_depth': 5, 'method': 'alphabeta', 'iterative': False},
+    'ID_Improved': {'score_fn': 'improved_score', 'method': 'alphabeta', 'reordering': True},
+    'ID_Reach': {'score_fn': 'reach_score', 'method': 'alphabeta', 'reordering': True},
+    'ID_Differential_Reach': {'score_fn': 'differential_reach_score', 'method': 'alphabeta', 'reordering': True},
+}
+
+Game_Record = namedtuple('Game_Record', ['width', 'height', 'winner', 'reason', 'nb_opening_moves',
+                                         'moves', 'values', 'depths'])
+Game_Record.__doc__ = """
+A game played until the end:
+- width, height:    dimensions of the board
+- winner:           1 if the first player won, 2 else
+- reason:           reason for losing ('illegal move' when the loser had no legal move left, or 'timeout')
+- nb_opening_moves: number of random moves played at the beginning of the game
+- moves:            list of the moves of both players, as coordinate pairs (row, column)
+- values:           value of the search behind each move from the mover's perspective (NaN for random moves)
+- depths:           depth of the search behind each move (0 for random moves)
+"""
+
+
+def make_agent(spec: Union[str, Agent_Spec], timeout: float = 10.) -> Player:
+    """
+    :param spec: The name of an agent of AGENT_SPECS, or a dictionary whose 'type' is 'random' or 'custom' (default),
+                 the other keys being passed to the CustomPlayer constructor ('score_fn' being the name of a
+                 heuristic of heuristics.py).
+
+    :param timeout: Time margin (in ms) of CustomPlayer agents, if not set in the specification.
+
+    :return: A new agent.
+    """
+    if isinstance(spec, str):
+        spec = AGENT_SPECS[spec]
+
+    kwargs = dict(spec)
+    if kwargs.pop('type', 'custom') == 'random':
+        return RandomPlayer()
+
+    if 'score_fn' in kwargs:
+        kwargs['score_fn'] = getattr(heuristics, kwargs['score_fn'])
+    kwargs.setdefault('timeout', timeout)
+    return CustomPlayer(**kwargs)
+
+
+def play_game(task: Dict) -> Game_Record:
+    """
+    Play a game between two agents, starting with random opening moves.
+
+    :param task: Dictionary of the game settings: 'seed', 'player_1' and 'player_2' (agent specifications),
+                 'time_limit' (in ms), 'timeout' (time margin in ms), 'nb_opening_moves', 'width', 'height'.
+
+    :return: The record of the game.
+    """
+    rng = Random(task['seed'])
+    players = [make_agent(task['player_1'], task['timeout']), make_agent(task['player_2'], task['timeout'])]
+    board = Board(players[0], players[1], task['width'], task['height'])
+
+    moves, values, depths = [], [], []
+    for _ in range(task['nb_opening_moves']):
+        legal_moves = board.get_legal_moves()
+        if not legal_moves:
+            break
+        move = rng.choice(legal_moves)
+        board.apply_move(move)
+        moves.append(move)
+        values.append(float('nan'))
+        depths.append(0)
+
+    def record(player: Player, move: Location):
+        moves.append(move)
+        values.append(getattr(player, 'last_value', float('nan')))
+        depths.append(getattr(player, 'last_depth', 0))
+
+    nb_opening_moves = len(moves)
+    winner, _, reason = board.play(time_limit=task['time_limit'], on_move=record)
+
+    return Game_Record(board.width, board.height, 1 if winner == players[0] else 2, reason, nb_opening_moves,
+                       moves, values, depths)
+
+
+def encode_game(game: Game_Record) -> bytes:
+    """
+    :param game: The record of a game
+    :return: Its binary representation (without the board dimensions, stored in the file header)
+    """
+    nb_moves = len(game.moves)
+    cells = array('H', [r * game.width + c for r, c in game.moves])
+    return b''.join([RECORD_HEADER.pack(game.winner, REASONS.index(game.reason), game.nb_opening_moves, nb_moves),
+                     cells.tobytes(), array('f', game.values).tobytes(), bytes(min(d, 255) for d in game.depths)])
+
+
+def decode_games(block: bytes, width: int, height: int) -> Iterator[Game_Record]:
+    """
+    :param block: A decompressed chunk of a game file
+    :param width: The number of columns of the board
+    :param height: The number of rows of the board
+    :return: An iterator over the games stored in the chunk
+    """
+    offset = 0
+    while offset < len(block):
+        winner, reason, nb_opening_moves, nb_moves = RECORD_HEADER.unpack_from(block, offset)
+        offset += RECORD_HEADER.size
+
+        cells = array('H')
+        cells.frombytes(block[offset:offset + 2 * nb_moves])
+        offset += 2 * nb_moves
+        values = array('f')
+        values.frombytes(block[offset:offset + 4 * nb_moves])
+        offset += 4 * nb_moves
+        depths = list(block[offset:offset + nb_moves])
+        offset += nb_moves
+
+        moves = [divmod(cell, width) for cell in cells]
+        yield Game_Record(width, height, winner, REASONS[reason], nb_opening_moves, moves, values.tolist(), depths)
+
+
+class GameWriter(object):
+    """Stream game records to a chunked, compressed file."""
+
+    def __init__(self, path: str, width: int = 7, height: int = 7, chunk_size: int = 256, level: int = 6):
+        """
+        :param path:       Path of the file to write
+        :param width:      The number of columns of the board
+        :param height:     The number of rows of the board
+        :param chunk_size: Number of games compressed together
+        :param level:      zlib compression level
+        """
+        self.width = width
+        self.height = height
+        self.chunk_size = chunk_size
+        self.level = level
+        self.buffer = []
+        self.nb_games = 0
+        self.file = open(path, 'wb')
+        self.file.write(FILE_HEADER.pack(MAGIC, VERSION, width, height))
+
+    def write(self, game: Game_Record):
+        if (game.width, game.height) != (self.width, self.height):
+            raise ValueError('All the games of a file must be played on boards of the same dimensions.')
+        self.buffer.append(encode_game(game))
+        self.nb_games += 1
+        if len(self.buffer) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            block = zlib.compress(b''.join(self.buffer), self.level)
+            self.file.write(CHUNK_HEADER.pack(len(block)))
+            self.file.write(block)
+            self.file.flush()
+            self.buffer = []
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+    def __enter__(self) -> 'GameWriter':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def iter_games(path: str) -> Iterator[Game_Record]:
+    """
+    :param path: Path of a file written by GameWriter
+    :return: A lazy iterator over the games of the file, decompressing one chunk at a time
+    """
+    with open(path, 'rb') as file:
+        magic, version, width, height = FILE_HEADER.unpack(file.read(FILE_HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('{} is not a game file (version {}).'.format(path, VERSION))
+
+        while True:
+            header = file.read(CHUNK_HEADER.size)
+            if len(header) < CHUNK_HEADER.size:
+                break
+            size, = CHUNK_HEADER.unpack(header)
+            yield from decode_games(zlib.decompress(file.read(size)), width, height)
+
+
+def generate(path: str, nb_games: int, player_1: Union[str, Agent_Spec], player_2: Union[str, Agent_Spec],
+             time_limit: float = 50, timeout: float = 10., nb_opening_moves: int = 2, width: int = 7,
+             height: int = 7, processes: int = None, seed: int = 0, chunk_size: int = 256) -> int:
+    """
+    Play games in a pool of processes and stream them to a file. Players swap sides every other game.
+
+    :param path:             Path of the file to write
+    :param nb_games:         Number of games to play
+    :param player_1:         Specification of the first agent (see make_agent)
+    :param player_2:         Specification of the second agent (see make_agent)
+    :param time_limit:       Number of ms to allow before timeout during each turn
+    :param timeout:          Time margin (in ms) of CustomPlayer agents
+    :param nb_opening_moves: Number of random moves played at the beginning of each game
+    :param width:            The number of columns of the board
+    :param height:           The number of rows of the board
+    :param processes:        Number of worker processes (defaults to the number of CPUs)
+    :param seed:             Seed of the random openings
+    :param chunk_size:       Number of games compressed together
+
+    :return: The number of games written
+    """
+    tasks = ({'seed': seed * nb_games + i,
+              'player_1': player_1 if i % 2 == 0 else player_2,
+              'player_2': player_2 if i % 2 == 0 else player_1,
+              'time_limit': time_limit, 'timeout': timeout, 'nb_opening_moves': nb_opening_moves,
+              'width': width, 'height': height} for i in range(nb_games))
+
+    with Pool(processes) as pool, GameWriter(path, width, height, chunk_size) as writer:
+        for game in pool.imap_unordered(play_game, tasks, chunksize=4):
+            writer.write(game)
+        return writer.nb_games
+
+
+def parse_agent_spec(text: str) -> Union[str, Agent_Spec]:
+    """Agents are given on the command line either by name or as a JSON dictionary."""
+    return json.loads(text) if text.lstrip().startswith('{') else text
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a corpus of Isolation games by self-play.')
+    parser.add_argument('path', help='path of the game file to write')
+    parser.add_argument('--games', type=int, default=100, help='number of games to play')
+    parser.add_argument('--player1', type=parse_agent_spec, default='ID_Improved',
+                        help='first agent: one of {} or a JSON specification'.format(', '.join(AGENT_SPECS)))
+    parser.add_argument('--player2', type=parse_agent_spec, default='ID_Improved', help='second agent')
+    parser.add_argument('--time-limit', type=float, default=50, help='time limit of each turn in ms')
+    parser.add_argument('--timeout', type=float, default=10, help='time margin of the agents in ms')
+    parser.add_argument('--openings', type=int, default=2, help='number of random opening moves')
+    parser.add_argument('--size', type=int, nargs=2, default=(7, 7), metavar=('WIDTH', 'HEIGHT'))
+    parser.add_argument('--processes', type=int, default=None, help='number of worker processes')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the random openings')
+    args = parser.parse_args()
+
+    nb_games = generate(args.path, args.games, args.player1, args.player2, args.time_limit, args.timeout,
+                        args.openings, args.size[0], args.size[1], args.processes, args.seed)
+    print('{} games written to {}'.format(nb_games, args.path))
+
+
+if __name__ == '__main__':
+    main()
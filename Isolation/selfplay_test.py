@@ -0,0 +1,62 @@
+"""
+This file contains test cases for the binary format of the self-play game files.
+"""
+import math
+import os
+import tempfile
+import unittest
+from array import array
+
+import selfplay
+from selfplay import Game_Record, GameWriter, iter_games
+
+
+def make_game(index, width=7, height=7):
+    """Build a game record whose content depends on its index, covering the edge cases of the format."""
+    moves = [divmod((index * 7 + i) % (width * height), width) for i in range(index % 5 + 2)]
+    values = [float('nan'), float('nan')] + [(-1) ** i * (index + i) / 3. for i in range(len(moves) - 2)]
+    if index % 3 == 0:
+        values[-1] = float('inf')
+    depths = [0, 0] + [(index * 50 + i) % 400 for i in range(len(moves) - 2)]
+    return Game_Record(width, height, 1 + index % 2, selfplay.REASONS[index % 2], 2, moves, values, depths)
+
+
+class GameFileTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        """ Test that games written across several chunks are read back in order, values as float32 and depths
+        clipped to 255 """
+        games = [make_game(i) for i in range(23)]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'games.bin')
+            with GameWriter(path, chunk_size=5) as writer:
+                for game in games:
+                    writer.write(game)
+            self.assertEqual(writer.nb_games, len(games))
+            loaded = list(iter_games(path))
+
+        self.assertEqual(len(loaded), len(games))
+        for game, record in zip(games, loaded):
+            self.assertEqual(record._replace(values=None, depths=None), game._replace(values=None, depths=None))
+            self.assertEqual(record.depths, [min(depth, 255) for depth in game.depths])
+            for value, stored in zip(game.values, record.values):
+                if math.isnan(value):
+                    self.assertTrue(math.isnan(stored))
+                else:
+                    self.assertEqual(stored, value if math.isinf(value) else array('f', [value])[0])
+
+    def test_dimensions(self):
+        """ Test that a file only accepts games played on boards of its dimensions, and rejects foreign files """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'games.bin')
+            with GameWriter(path) as writer:
+                with self.assertRaises(ValueError):
+                    writer.write(make_game(0, width=5, height=5))
+            with open(path, 'r+b') as file:
+                file.write(b'XXXX')
+            with self.assertRaises(ValueError):
+                list(iter_games(path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -19,19 +19,24 @@ initiative in the second match with agentB at (5, 2) as player 1 and agentA at
 (1, 3) as player 2.
 """
 
-from random import sample
+import argparse
+import os
+from random import sample, seed
 from collections import namedtuple
 from typing import Tuple, List, Set
 
 from heuristics import *
 from isolation import Player, Board, Location
 from game_agent import CustomPlayer
+from profiling import Profiler
 from sample_players import RandomPlayer
+from transposition import PersistentTable
 
 
 NUM_MATCHES = 5  # number of matches against each opponent
 TIME_LIMIT = 50  # number of milliseconds before timeout
 TIME_MARGIN = 10  # number of milliseconds before timeout to start returning
+LATE_MOVE_INDEX = 3  # number of moves searched at full depth before applying late move reductions
 
 DESCRIPTION = """
 This script evaluates the performance of the custom heuristic function by
@@ -112,12 +117,34 @@ def bench_agent(agent: Agent, opponents: List[Agent], starting_position_list: Se
     return 100. * wins / total
 
 
+def table_path(directory: str, name: str) -> str:
+    """
+    :return: The path of the persistent transposition table file of the agent with the given name
+    """
+    return os.path.join(directory, name.replace(' ', '_') + '.tt')
+
+
 def main():
+    parser = argparse.ArgumentParser(description=DESCRIPTION, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profile', action='store_true',
+                        help='time the heuristics, move generation and search of every agent, and print a hot-spot '
+                             'breakdown per agent at the end of the tournament')
+    parser.add_argument('--collapsed', metavar='PATH', default=None,
+                        help='with --profile, also write the profile as collapsed stacks (for flamegraph.pl)')
+    parser.add_argument('--tables', metavar='DIR', default=None,
+                        help='keep a persistent transposition table per test agent in this directory, so that the '
+                             'early-game searches of previous runs are resumed rather than started over')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='seed of the starting positions (to replay the same ones from one run to the next)')
+    args = parser.parse_args()
+    if args.seed is not None:
+        seed(args.seed)
 
     heuristics = [("Null", null_score), ("Open", open_move_score), ("Improved", improved_score)]
     ab_args = {"search_depth": 5, "method": 'alphabeta', "iterative": False}
     mm_args = {"search_depth": 3, "method": 'minimax', "iterative": False}
     custom_args = {"method": 'alphabeta', 'iterative': True, 'timeout': TIME_MARGIN, 'reordering': True}
+    lmr_args = dict(custom_args, late_move_index=LATE_MOVE_INDEX)
 
     # Create a collection of CPU agents using fixed-depth minimax, alpha beta search, or random selection.
     # The agent names encode the search method and the heuristic function.
@@ -132,7 +159,14 @@ def main():
     test_agents = [Agent(CustomPlayer(score_fn=pure_monte_carlo_score, **custom_args), "Pure Monte Carlo"),
                    Agent(CustomPlayer(score_fn=reach_score, **custom_args), "Reach score"),
                    Agent(CustomPlayer(score_fn=differential_reach_score, **custom_args), "Differential reach score"),
-                   Agent(CustomPlayer(score_fn=improved_score, **custom_args), "Improved score")]
+                   Agent(CustomPlayer(score_fn=improved_score, **custom_args), "Improved score"),
+                   Agent(CustomPlayer(score_fn=differential_reach_score, **lmr_args), "Differential reach score LMR")]
+
+    if args.tables is not None:
+        os.makedirs(args.tables, exist_ok=True)
+        for agent in test_agents:
+            path = table_path(args.tables, agent.name)
+            agent.player.persistent_table = PersistentTable.load(path) if os.path.exists(path) else PersistentTable()
 
     # Generate a set of starting positions
     board = Board(RandomPlayer(), RandomPlayer())
@@ -140,6 +174,12 @@ def main():
     while len(starting_position_set) < NUM_MATCHES:
         starting_position_set.add(tuple(sample(board.get_legal_moves(), 2)))
 
+    profiler = Profiler() if args.profile else None
+    if profiler is not None:
+        for agent in mm_agents + ab_agents + test_agents:
+            profiler.instrument(agent.player, agent.name)
+        profiler.start()
+
     for agent in test_agents:
         print("")
         print("*************************")
@@ -153,6 +193,20 @@ def main():
         print("----------")
         print("{!s:<15}{:>10.2f}%".format(agent.name, win_ratio))
         print('average depth = {}'.format(agent.player.get_average_depth()))
+        print('search stats = {}'.format(agent.player.get_search_stats()))
+        if args.tables is not None:
+            table = agent.player.persistent_table
+            table.save(table_path(args.tables, agent.name))
+            print('persistent table: {} positions, {} hits'.format(len(table), table.hits))
+
+    if profiler is not None:
+        profiler.stop()
+        print("\n\nProfile:")
+        print("----------")
+        print('\n'.join(profiler.summary()))
+        if args.collapsed:
+            profiler.write_collapsed(args.collapsed)
+            print('\nCollapsed stacks written to {}'.format(args.collapsed))
 
 if __name__ == "__main__":
     main()
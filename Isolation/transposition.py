@@ -0,0 +1,146 @@
+"""
+Persistent transposition table keeping the results of deep searches of early-game positions across games.
+
+Tournaments replay the same starting positions many times, so an agent can reuse the move and value it found for a
+position in a previous game instead of searching it again from scratch. The table is bounded in size (the least
+recently used entries being evicted first), and can be saved to and loaded from disk between runs in a compact format:
+a header (magic number, format version, board width and height, number of entries) followed by a zlib compressed
+array of fixed size records (board state, cells of both players, active player, depth, value, move).
+"""
+import struct
+import zlib
+from collections import namedtuple, OrderedDict
+from typing import Optional
+
+from isolation import Board, Board_Key, Location
+
+MAGIC = b'ISTT'
+VERSION = 1
+FILE_HEADER = struct.Struct('<4sBBBI')
+ENTRY = struct.Struct('<hhBBfh')  # cells of both players, player 1 active, depth, value, move
+NO_CELL = -1  # encoding of a player who has not moved yet
+NO_MOVE = -2  # encoding of the (-1, -1) move returned when all the moves lose
+
+Entry = namedtuple('Entry', ['depth', 'value', 'move'])
+Entry.__doc__ = """
+Result of a completed search of a position:
+- depth: depth of the search
+- value: value of the position from the perspective of the player to move
+- move:  best move found
+"""
+
+
+class PersistentTable(object):
+    """Bounded table of the deepest results found for early-game positions, which can be saved between runs."""
+
+    def __init__(self, max_entries: int = 100000, max_move_count: int = 10):
+        """
+        :param max_entries:    Maximal number of positions kept
+        :param max_move_count: Only positions reached after at most max_move_count moves are kept
+        """
+        self.max_entries = max_entries
+        self.max_move_count = max_move_count
+        self.entries = OrderedDict()
+        self.width = None
+        self.height = None
+        self.hits = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def check_dimensions(self, board: Board) -> bool:
+        """
+        :return: True if the board has the dimensions of the boards whose positions are in the table (which are set
+                 by the first position stored)
+        """
+        if self.width is None:
+            self.width, self.height = board.width, board.height
+        return (board.width, board.height) == (self.width, self.height)
+
+    def probe(self, board: Board) -> Optional[Entry]:
+        """
+        :param board: The current state of the game
+        :return: The stored result for this position, or None
+        """
+        entry = self.entries.get(board.get_key())
+        if entry is not None and self.check_dimensions(board):
+            self.entries.move_to_end(board.get_key())
+            self.hits += 1
+            return entry
+        return None
+
+    def store(self, board: Board, depth: int, value: float, move: Location):
+        """
+        Store the result of a completed search, if the position is early enough in the game and no deeper result is
+        already stored.
+        """
+        if board.move_count > self.max_move_count or not self.check_dimensions(board):
+            return
+
+        key = board.get_key()
+        entry = self.entries.get(key)
+        if entry is None or entry.depth <= depth:
+            self.entries[key] = Entry(depth, value, move)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def save(self, path: str):
+        """
+        :param path: Path of the file to write
+        """
+        width, height = self.width or 0, self.height or 0
+        nb_bytes = (width * height + 7) // 8
+
+        def cell(location: Optional[Location]) -> int:
+            if location is None:
+                return NO_CELL
+            if location == (-1, -1):
+                return NO_MOVE
+            return location[0] * width + location[1]
+
+        records = []
+        for (board_state, location_1, location_2, player_1_active), entry in self.entries.items():
+            records.append(board_state.to_bytes(nb_bytes, 'little'))
+            records.append(ENTRY.pack(cell(location_1), cell(location_2), player_1_active, min(entry.depth, 255),
+                                      entry.value, cell(entry.move)))
+
+        with open(path, 'wb') as file:
+            file.write(FILE_HEADER.pack(MAGIC, VERSION, width, height, len(self.entries)))
+            file.write(zlib.compress(b''.join(records), 9))
+
+    @classmethod
+    def load(cls, path: str, max_entries: int = 100000, max_move_count: int = 10) -> 'PersistentTable':
+        """
+        :param path: Path of a file written by PersistentTable.save()
+        :return: The table stored in the file
+        """
+        with open(path, 'rb') as file:
+            magic, version, width, height, nb_entries = FILE_HEADER.unpack(file.read(FILE_HEADER.size))
+            if magic != MAGIC or version != VERSION:
+                raise ValueError('{} is not a transposition table file (version {}).'.format(path, VERSION))
+            data = zlib.decompress(file.read())
+
+        table = cls(max_entries, max_move_count)
+        if nb_entries:
+            table.width, table.height = width, height
+        nb_bytes = (width * height + 7) // 8
+
+        def location(cell: int) -> Optional[Location]:
+            if cell == NO_CELL:
+                return None
+            if cell == NO_MOVE:
+                return -1, -1
+            return divmod(cell, width)
+
+        offset = 0
+        for _ in range(nb_entries):
+            board_state = int.from_bytes(data[offset:offset + nb_bytes], 'little')
+            cell_1, cell_2, player_1_active, depth, value, move = ENTRY.unpack_from(data, offset + nb_bytes)
+            offset += nb_bytes + ENTRY.size
+            key = (board_state, location(cell_1), location(cell_2), bool(player_1_active))  # type: Board_Key
+            table.entries[key] = Entry(depth, value, location(move))
+
+        while len(table.entries) > max_entries:
+            table.entries.popitem(last=False)
+        return table
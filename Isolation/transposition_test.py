@@ -0,0 +1,71 @@
+"""
+This file contains test cases for the persistent transposition table and the warm start of CustomPlayer from it.
+"""
+import os
+import tempfile
+import unittest
+
+from game_agent import CustomPlayer
+from isolation import Board
+from sample_players import RandomPlayer
+from transposition import PersistentTable
+
+
+class PersistentTableTest(unittest.TestCase):
+
+    def setUp(self):
+        self.table = PersistentTable(max_entries=3, max_move_count=4)
+        self.boards = []
+        board = Board(RandomPlayer(), RandomPlayer())
+        for move in [(0, 0), (6, 6), (1, 2), (5, 4), (3, 3)]:
+            board = board.forecast_move(move)
+            self.boards.append(board)
+
+    def test_store(self):
+        """ Test that only the deepest results of early positions are kept, up to the maximal number of entries """
+        self.table.store(self.boards[0], 5, 1., (1, 2))
+        self.table.store(self.boards[0], 3, 2., (2, 1))
+        self.assertEqual(self.table.probe(self.boards[0]), (5, 1., (1, 2)))
+
+        self.table.store(self.boards[4], 5, 1., (1, 2))
+        self.assertIsNone(self.table.probe(self.boards[4]))
+
+        for board in self.boards[1:4]:
+            self.table.store(board, 1, 0., (0, 0))
+        self.assertEqual(len(self.table), 3)
+        self.assertIsNone(self.table.probe(self.boards[0]))
+
+    def test_save_load(self):
+        """ Test that a table is the same after being saved and loaded """
+        for depth, board in enumerate(self.boards[:3]):
+            self.table.store(board, depth, float(depth) - .5, (depth, depth + 1))
+        self.table.store(self.boards[2], 7, float('-inf'), (-1, -1))
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'table.tt')
+            self.table.save(path)
+            loaded = PersistentTable.load(path)
+
+        self.assertEqual(list(loaded.entries.items()), list(self.table.entries.items()))
+
+    def test_warm_start(self):
+        """ Test that an agent resumes the search of a position from the depth stored in the table """
+        table = PersistentTable()
+        agent = CustomPlayer(method='alphabeta', persistent_table=table)
+        opponent = RandomPlayer()
+        board = Board(agent, opponent)
+        board.apply_move((3, 3))
+        board.apply_move((2, 2))
+
+        agent.get_move(board, Board.make_timer(50))
+        entry = table.probe(board)
+        self.assertEqual(entry.depth, agent.last_depth)
+
+        table.store(board, entry.depth + 10, entry.value, entry.move)
+        move = agent.get_move(board.copy(), lambda: -1.)
+        self.assertEqual(move, entry.move)
+        self.assertEqual(agent.last_depth, entry.depth + 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
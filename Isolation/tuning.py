@@ -0,0 +1,193 @@
+"""
+Tune the weights of a linear heuristic on corpora of games generated by selfplay.py.
+
+Every position of the games (once both players have moved, and until the end of the game) is described by its feature
+vector from the perspective of the player to move (see features.py), extracted in vectorized batches. A logistic
+regression then predicts whether this player eventually won the game. The fitted weights define a heuristic that can
+be used directly (see heuristics.linear_score), and the decrease of the reach layer weights gives an estimate of the
+common_ratio of reach_score() and differential_reach_score().
+
+Example:
+    python tuning.py games.bin --output weights.json
+"""
+import argparse
+import json
+from itertools import islice
+from math import exp
+from typing import Iterable, Iterator, List, Tuple
+
+import numpy as np
+
+from features import FEATURE_NAMES, NB_LAYERS, features_batch
+from frontier import Frontier, knight_table, unpack_states
+from heuristics import Score_Function, linear_score
+from selfplay import Game_Record, iter_games
+
+Dataset = Tuple[np.ndarray, np.ndarray]
+
+
+def positions(game: Game_Record) -> Iterator[Tuple[int, int, int, bool]]:
+    """
+    :param game: The record of a game
+    :return: An iterator over its positions, as tuples (board state, cell of the player to move, cell of his
+             opponent, whether the player to move won the game)
+    """
+    cells = [r * game.width + c for r, c in game.moves]
+    board_state = (1 << cells[0]) | (1 << cells[1]) if len(cells) > 1 else 0
+    for i in range(2, len(cells)):
+        player_1_to_move = i % 2 == 0
+        yield board_state, cells[i - 2], cells[i - 1], (game.winner == 1) == player_1_to_move
+        board_state |= 1 << cells[i]
+
+
+def extract(games: Iterable[Game_Record], batch_size: int = 8192, skip_timeouts: bool = True) -> Dataset:
+    """
+    :param games:         Records of games played on boards of the same dimensions
+    :param batch_size:    Number of positions whose features are computed in the same vectorized call
+    :param skip_timeouts: Set to True to ignore the games lost on time, whose outcome says little about the positions
+    :return: The (N, len(FEATURE_NAMES)) feature matrix of all the positions, and the (N,) outcome vector
+    """
+    games = iter(games)
+    matrices, outcomes = [], []
+    width = height = None
+    batch = []
+
+    def flush():
+        states, own, opp, won = zip(*batch)
+        frontier = Frontier(unpack_states(states, width * height), np.array(own, dtype=np.intp),
+                            np.array(opp, dtype=np.intp), knight_table(width, height))
+        matrices.append(features_batch(frontier))
+        outcomes.append(np.array(won, dtype=float))
+        batch.clear()
+
+    for game in games:
+        if skip_timeouts and game.reason == 'timeout':
+            continue
+        width, height = game.width, game.height
+        batch.extend(positions(game))
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+
+    if not matrices:
+        return np.zeros((0, len(FEATURE_NAMES))), np.zeros(0)
+    return np.vstack(matrices), np.concatenate(outcomes)
+
+
+def fit_logistic(x: np.ndarray, y: np.ndarray, l2: float = 1e-3, nb_iterations: int = 25) -> Tuple[np.ndarray, float]:
+    """
+    Fit a L2 regularized logistic regression by Newton's method, on standardized features.
+
+    :param x:             (N, F) feature matrix
+    :param y:             (N,) outcomes, 1 for a win and 0 for a loss
+    :param l2:            Regularization strength (applied to standardized weights, not to the intercept)
+    :param nb_iterations: Maximal number of Newton iterations
+    :return: The weights of the features and the intercept
+    """
+    mean, std = x.mean(axis=0), x.std(axis=0)
+    std[std == 0] = 1.
+    z = np.hstack([np.ones((len(x), 1)), (x - mean) / std])
+
+    penalty = l2 * len(x) * np.eye(z.shape[1])
+    penalty[0, 0] = 0.
+    theta = np.zeros(z.shape[1])
+    for _ in range(nb_iterations):
+        p = 1. / (1. + np.exp(-z @ theta))
+        gradient = z.T @ (p - y) + penalty @ theta
+        hessian = (z * (p * (1. - p))[:, np.newaxis]).T @ z + penalty
+        step = np.linalg.solve(hessian, gradient)
+        theta -= step
+        if np.abs(step).max() < 1e-8:
+            break
+
+    weights = theta[1:] / std
+    return weights, float(theta[0] - weights @ mean)
+
+
+def log_loss(x: np.ndarray, y: np.ndarray, weights: np.ndarray, intercept: float) -> Tuple[float, float]:
+    """
+    :return: The average log loss and the accuracy of the model on a dataset
+    """
+    p = np.clip(1. / (1. + np.exp(-(x @ weights + intercept))), 1e-12, 1. - 1e-12)
+    loss = -np.mean(y * np.log(p) + (1. - y) * np.log(1. - p))
+    return float(loss), float(np.mean((p > .5) == (y > .5)))
+
+
+def fit_common_ratio(weights: np.ndarray) -> float:
+    """
+    Estimate the common ratio of the geometric progression best fitting the weights of the reach layers (the last
+    layer, which aggregates all the farther cells, being excluded).
+
+    :param weights: The weights of the features
+    :return: The estimated common ratio, or NaN if the weights do not decrease with distance
+    """
+    own = weights[:NB_LAYERS - 1]
+    opp = weights[NB_LAYERS:2 * NB_LAYERS - 1]
+    layer_weights = (own - opp) / 2.
+    if np.any(layer_weights <= 0):
+        return float('nan')
+    slope = np.polyfit(np.arange(len(layer_weights)), np.log(layer_weights), 1)[0]
+    return exp(-slope)
+
+
+def save_weights(path: str, weights: np.ndarray, intercept: float, **metrics):
+    with open(path, 'w') as file:
+        json.dump({'features': FEATURE_NAMES, 'weights': weights.tolist(), 'intercept': intercept,
+                   'metrics': metrics}, file, indent=2)
+
+
+def load_score(path: str) -> Score_Function:
+    """
+    :param path: Path of a weight file written by tuning.py
+    :return: The tuned heuristic
+    """
+    with open(path) as file:
+        data = json.load(file)
+    if data['features'] != FEATURE_NAMES:
+        raise ValueError('{} was tuned on different features.'.format(path))
+    return linear_score(data['weights'])
+
+
+def corpus(paths: List[str], max_games: int = None) -> Iterator[Game_Record]:
+    games = (game for path in paths for game in iter_games(path))
+    return islice(games, max_games)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fit the weights of a linear heuristic on self-play game corpora.')
+    parser.add_argument('corpus', nargs='+', help='game files written by selfplay.py')
+    parser.add_argument('--output', default='weights.json', help='path of the weight file to write')
+    parser.add_argument('--max-games', type=int, default=None, help='maximal number of games to use')
+    parser.add_argument('--l2', type=float, default=1e-3, help='regularization strength')
+    parser.add_argument('--validation', type=float, default=.2, help='fraction of positions held out')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the train/validation split')
+    args = parser.parse_args()
+
+    x, y = extract(corpus(args.corpus, args.max_games))
+    if len(x) == 0:
+        parser.error('no usable position in the corpus')
+    print('{} positions extracted'.format(len(x)))
+
+    permutation = np.random.RandomState(args.seed).permutation(len(x))
+    nb_validation = int(args.validation * len(x))
+    validation, train = permutation[:nb_validation], permutation[nb_validation:]
+
+    weights, intercept = fit_logistic(x[train], y[train], args.l2)
+    loss, accuracy = log_loss(x[validation], y[validation], weights, intercept) if nb_validation else (None, None)
+    common_ratio = fit_common_ratio(weights)
+
+    print('{:<25}{:>10}'.format('Feature', 'Weight'))
+    for name, weight in zip(FEATURE_NAMES, weights):
+        print('{:<25}{:>10.4f}'.format(name, weight))
+    if nb_validation:
+        print('Validation log loss = {:.4f}, accuracy = {:.2f} %'.format(loss, 100 * accuracy))
+    print('Fitted common_ratio = {:.3f}'.format(common_ratio))
+
+    save_weights(args.output, weights, intercept, validation_log_loss=loss, validation_accuracy=accuracy,
+                 common_ratio=common_ratio if common_ratio == common_ratio else None)
+    print('Weights written to {}'.format(args.output))
+
+
+if __name__ == '__main__':
+    main()
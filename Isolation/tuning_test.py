@@ -0,0 +1,88 @@
+"""
+This file contains test cases for the tuning of linear heuristics on self-play games.
+"""
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+import tuning
+from features import FEATURE_NAMES, features
+from isolation import Board
+from sample_players import RandomPlayer
+from selfplay import play_game
+
+
+def random_game(seed):
+    """Play a game of random moves only, as opening moves, so that it only depends on the seed."""
+    return play_game({'seed': seed, 'player_1': 'Random', 'player_2': 'Random', 'time_limit': 100, 'timeout': 10,
+                      'nb_opening_moves': 49, 'width': 7, 'height': 7})
+
+
+class TuningTest(unittest.TestCase):
+
+    def test_extract(self):
+        """ Test that every position after the first two moves is extracted, with the features and outcome of the
+        player to move, and that the games lost on time are skipped """
+        games = [random_game(0), random_game(1)]
+        timeout = random_game(2)._replace(reason='timeout')
+        x, y = tuning.extract(games + [timeout], batch_size=10)
+        self.assertEqual(x.shape, (sum(len(game.moves) - 2 for game in games), len(FEATURE_NAMES)))
+        self.assertEqual(y.shape, (len(x),))
+        self.assertEqual(len(tuning.extract([timeout], skip_timeouts=False)[0]), len(timeout.moves) - 2)
+
+        row = 0
+        for game in games:
+            board = Board(RandomPlayer(), RandomPlayer(), game.width, game.height)
+            for i, move in enumerate(game.moves):
+                if i >= 2:
+                    # The first player moves at even indices
+                    player_won = (game.winner == 1) == (i % 2 == 0)
+                    np.testing.assert_allclose(x[row], features(board, board.active_player))
+                    self.assertEqual(y[row], float(player_won))
+                    row += 1
+                board.apply_move(move)
+
+    def test_fit_logistic(self):
+        """ Test that the weights of a logistic model are recovered from outcomes drawn from it """
+        rng = np.random.RandomState(0)
+        x = rng.normal(size=(20000, 3)) * [1., 2., .5]
+        true_weights, true_intercept = np.array([1.5, -1., 2.]), .5
+        y = (rng.uniform(size=len(x)) < 1. / (1. + np.exp(-(x @ true_weights + true_intercept)))).astype(float)
+
+        weights, intercept = tuning.fit_logistic(x, y, l2=0.)
+        np.testing.assert_allclose(weights, true_weights, atol=.1)
+        self.assertAlmostEqual(intercept, true_intercept, delta=.1)
+        loss, accuracy = tuning.log_loss(x, y, weights, intercept)
+        self.assertLessEqual(loss, tuning.log_loss(x, y, true_weights, true_intercept)[0])
+        self.assertGreater(accuracy, .8)
+
+    def test_weight_file(self):
+        """ Test that the heuristic loaded from a weight file scores boards with the saved weights """
+        weights = np.linspace(-1., 1., len(FEATURE_NAMES))
+        game = random_game(3)
+        board = Board(RandomPlayer(), RandomPlayer(), game.width, game.height)
+        for move in game.moves[:10]:
+            board.apply_move(move)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'weights.json')
+            tuning.save_weights(path, weights, .5, common_ratio=.7)
+            score = tuning.load_score(path)
+            self.assertAlmostEqual(score(board, board.active_player),
+                                   float(np.dot(features(board, board.active_player), weights)))
+
+            with open(path) as file:
+                data = json.load(file)
+            self.assertEqual(data['metrics'], {'common_ratio': .7})
+            data['features'] = data['features'][::-1]
+            with open(path, 'w') as file:
+                json.dump(data, file)
+            with self.assertRaises(ValueError):
+                tuning.load_score(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
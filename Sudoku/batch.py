@@ -0,0 +1,163 @@
+"""
+Batch solver: stream puzzles from a file (or the standard input), one grid per line, solve them in a pool of worker
+processes, and write their solutions in input order, one per line ('-' for the puzzles without solution or invalid).
+Empty lines are skipped.
+
+Puzzles are read and sent to the workers in chunks, with a bounded number of chunks in flight, so that memory stays
+constant whatever the size of the input. Throughput, latency percentiles and failures are reported on stderr.
+
+Example:
+    python batch.py puzzles/hard.txt --output solutions.txt --processes 4 --engine dlx
+"""
+import argparse
+import math
+import os
+import sys
+from collections import deque
+from itertools import islice
+from multiprocessing import Pool
+from timeit import default_timer
+
+from geometry import EMPTY
+from solution import boxes, digits, solve, ENGINES
+
+NO_SOLUTION = '-'
+
+
+def is_grid(grid):
+    """
+    Input: A line of the input.
+    Output: True if it is a grid in string form.
+    """
+    return len(grid) == len(boxes) and all(value in digits or value in EMPTY for value in grid)
+
+
+def solve_chunk(task):
+    """
+    Input: A tuple (engine, grids).
+    Output: For each grid, a tuple (solution as a grid string or NO_SOLUTION, solve time in seconds).
+    """
+    engine, grids = task
+    if engine == 'vectorized':
+        import vectorized  # NumPy is only imported by the workers which need it
+
+        # The grids of the chunk are solved together: each is given the mean latency
+        start = default_timer()
+        valid_grids = [grid for grid in grids if is_grid(grid)]
+        solutions = iter(vectorized.solve_batch(valid_grids, as_dict=False))
+        elapsed = (default_timer() - start) / len(grids)
+        return [((next(solutions) if is_grid(grid) else False) or NO_SOLUTION, elapsed) for grid in grids]
+
+    results = []
+    for grid in grids:
+        start = default_timer()
+        try:
+            sudoku = solve(grid, engine)
+        except (AssertionError, KeyError):  # Not a valid grid
+            sudoku = False
+        elapsed = default_timer() - start
+        results.append((''.join(sudoku[box] for box in boxes) if sudoku else NO_SOLUTION, elapsed))
+    return results
+
+
+class LatencyHistogram(object):
+    """Constant memory histogram of latencies, in logarithmic buckets (percentiles are accurate to a few %)."""
+
+    def __init__(self, smallest=1e-6, ratio=1.05):
+        self.smallest = smallest
+        self.log_ratio = math.log(ratio)
+        self.counts = {}
+        self.total = 0
+        self.largest = 0.
+
+    def add(self, seconds):
+        bucket = max(0, int(math.log(max(seconds, self.smallest) / self.smallest) / self.log_ratio))
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.total += 1
+        self.largest = max(self.largest, seconds)
+
+    def percentile(self, p):
+        """
+        Input: A percentage.
+        Output: An upper bound of the latency of the p% fastest puzzles, in seconds.
+        """
+        rank = math.ceil(self.total * p / 100.)
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= rank:
+                return min(self.largest, self.smallest * math.exp((bucket + 1) * self.log_ratio))
+        return self.largest
+
+
+def chunks(lines, chunk_size):
+    """
+    Input: An iterable of lines, and the number of grids per chunk.
+    Output: An iterator over lists of grids.
+    """
+    grids = (line.strip() for line in lines)
+    grids = (grid for grid in grids if grid)
+    while True:
+        chunk = list(islice(grids, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def run(input_file, output_file, engine='propagation', processes=None, chunk_size=64, max_in_flight=None):
+    """
+    Solve all the puzzles of an input stream and write their solutions to an output stream, in input order.
+    Input: The streams, the name of the engine, the number of worker processes, the number of grids per chunk, and
+           the maximal number of chunks sent to the workers and not written yet (4 per process by default).
+    Output: The latency histogram, and the number of failures.
+    """
+    latencies = LatencyHistogram()
+    failures = 0
+    processes = processes or os.cpu_count() or 1
+    max_in_flight = max_in_flight or 4 * processes
+    with Pool(processes) as pool:
+        pending = deque()
+
+        def write_oldest():
+            nonlocal failures
+            for solution_grid, elapsed in pending.popleft().get():
+                output_file.write(solution_grid + '\n')
+                latencies.add(elapsed)
+                failures += solution_grid == NO_SOLUTION
+
+        for chunk in chunks(input_file, chunk_size):
+            if len(pending) >= max_in_flight:
+                write_oldest()
+            pending.append(pool.apply_async(solve_chunk, ((engine, chunk),)))
+        while pending:
+            write_oldest()
+
+    return latencies, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Solve a stream of Sudoku puzzles, one grid per line.')
+    parser.add_argument('input', nargs='?', type=argparse.FileType('r'), default=sys.stdin,
+                        help='file of puzzles (standard input by default)')
+    parser.add_argument('--output', type=argparse.FileType('w'), default=sys.stdout,
+                        help='file of solutions (standard output by default)')
+    parser.add_argument('--engine', default='propagation', choices=['propagation', 'vectorized'] + sorted(ENGINES),
+                        help="engine solving the puzzles ('vectorized' solves each chunk with NumPy array operations)")
+    parser.add_argument('--processes', type=int, default=None, help='number of worker processes (one per CPU)')
+    parser.add_argument('--chunk-size', type=int, default=64, help='number of puzzles sent to a worker at once')
+    args = parser.parse_args()
+
+    start = default_timer()
+    latencies, failures = run(args.input, args.output, args.engine, args.processes, args.chunk_size)
+    elapsed = default_timer() - start
+    args.output.flush()
+
+    report = sys.stderr
+    report.write('{} puzzles in {:.2f} s: {:.0f} puzzles/sec, {} without solution\n'.format(
+        latencies.total, elapsed, latencies.total / elapsed if elapsed else 0., failures))
+    report.write('latency (ms): p50 {:.2f}  p90 {:.2f}  p99 {:.2f}  max {:.2f}\n'.format(
+        *(1000 * latencies.percentile(p) for p in (50, 90, 99)), 1000 * latencies.largest))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,36 @@
+import io
+import unittest
+
+import batch
+from benchmark import load_puzzles
+from fixtures import contradiction, hard_grids, is_solution
+from solution import boxes
+
+
+class TestBatch(unittest.TestCase):
+
+    def test_run(self):
+        grids = load_puzzles('easy')[:30] + [contradiction, 'not a grid'] + hard_grids[:5]
+        for engine in ('propagation', 'vectorized'):
+            output = io.StringIO()
+            latencies, failures = batch.run(io.StringIO('\n'.join(grids) + '\n\n'), output, engine, processes=2,
+                                            chunk_size=4, max_in_flight=2)
+            solutions = output.getvalue().splitlines()
+            self.assertEqual(len(solutions), len(grids))
+            self.assertEqual(latencies.total, len(grids))
+            self.assertEqual(failures, 2)
+            for grid, solution_grid in zip(grids, solutions):
+                if solution_grid != batch.NO_SOLUTION:
+                    self.assertTrue(is_solution(dict(zip(boxes, solution_grid)), grid))
+
+    def test_percentiles(self):
+        latencies = batch.LatencyHistogram()
+        for i in range(1, 1001):
+            latencies.add(i / 1000.)
+        self.assertAlmostEqual(latencies.percentile(50), .5, delta=.5 * .05)
+        self.assertAlmostEqual(latencies.percentile(99), .99, delta=.99 * .05)
+        self.assertEqual(latencies.percentile(100), 1.)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,312 @@
+"""
+Benchmark of the Sudoku engines on the puzzle sets of the puzzles directory (one grid per line).
+
+Example:
+    python benchmark.py --engines propagation bitmask dlx --sets easy hard
+    python benchmark.py --batch 20000 --sets easy
+    python benchmark.py --scaling 3 4 5 --clues 0.55
+    python benchmark.py --strategies --sets hard
+    python benchmark.py --branching --sets hard
+    python benchmark.py --startup
+    python benchmark.py --cache --sets hard
+"""
+import argparse
+import os
+import random
+import subprocess
+import sys
+from importlib import import_module
+from timeit import default_timer
+
+from solution import solve, ENGINES
+
+# Modules whose import time is measured by --startup: the cost paid by every CLI invocation and worker process
+STARTUP_MODULES = ['solution', 'bitboard', 'dlx', 'cdcl', 'strategies', 'batch', 'vectorized']
+# Engines solving the sudokus of any geometry
+GEOMETRY_ENGINES = ['bitmask', 'cdcl']
+PUZZLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'puzzles')
+
+
+def load_puzzles(name):
+    """
+    Input: The name of a puzzle set of the puzzles directory.
+    Output: The list of its grids.
+    """
+    with open(os.path.join(PUZZLE_DIR, name + '.txt')) as file:
+        return [line.strip() for line in file if line.strip()]
+
+
+def bench_engine(engine, grids):
+    """
+    Input: The name of an engine, and a list of grids.
+    Output: The total and worst solve times in seconds, and the number of grids left unsolved.
+    """
+    total, worst, failures = 0., 0., 0
+    for grid in grids:
+        start = default_timer()
+        solved = solve(grid, engine)
+        elapsed = default_timer() - start
+        total += elapsed
+        worst = max(worst, elapsed)
+        failures += not solved
+    return total, worst, failures
+
+
+def bench_batch(grids, size):
+    """
+    Compare the vectorized batch solver with the bitmask engine on a corpus of the given size, made of copies of the
+    grids.
+    Output: The throughputs (puzzles/sec) of both.
+    """
+    import vectorized
+
+    corpus = (grids * (size // len(grids) + 1))[:size]
+    start = default_timer()
+    vectorized.solve_batch(corpus, as_dict=False)
+    batch_throughput = size / (default_timer() - start)
+
+    sample = corpus[:max(1, size // 10)]
+    start = default_timer()
+    for grid in sample:
+        solve(grid, 'bitmask')
+    scalar_throughput = len(sample) / (default_timer() - start)
+    return batch_throughput, scalar_throughput
+
+
+def pattern_grid(geometry, clue_ratio, rng):
+    """
+    Generate a puzzle of a geometry without diagonal units: a solution is built from the shifted-rows pattern, with
+    its digits, the rows and columns of each band and stack, and the bands and stacks shuffled, then each of its boxes
+    is kept as a clue with probability clue_ratio (the puzzle may have several solutions).
+    Input: The geometry, the ratio of clues, and a random.Random.
+    Output: The grid in string form.
+    """
+    size, box_size = geometry.size, geometry.box_size
+
+    def shuffled_lines():
+        return [band * box_size + line for band in rng.sample(range(box_size), box_size)
+                for line in rng.sample(range(box_size), box_size)]
+
+    rows, cols, symbols = shuffled_lines(), shuffled_lines(), rng.sample(geometry.symbols, size)
+    solution = [symbols[(box_size * (r % box_size) + r // box_size + c) % size] for r in rows for c in cols]
+    return ''.join(value if rng.random() < clue_ratio else '.' for value in solution)
+
+
+def bench_scaling(box_size, clue_ratio, count, seed=0, engine='bitmask'):
+    """
+    Solve pattern-generated puzzles of a size with one of the GEOMETRY_ENGINES.
+    Input: The size of the squares of the geometry, the ratio of clues, the number of puzzles, the random seed, and
+           the name of the engine.
+    Output: The total and worst solve times in seconds, and the number of grids left unsolved.
+    """
+    from geometry import get_geometry
+
+    module = import_module(ENGINES[engine])
+    geometry = get_geometry(box_size, diagonal=False)
+    rng = random.Random(seed)
+    grids = [pattern_grid(geometry, clue_ratio, rng) for _ in range(count)]
+    total, worst, failures = 0., 0., 0
+    for grid in grids:
+        start = default_timer()
+        solved = module.solve(grid, geometry)
+        elapsed = default_timer() - start
+        total += elapsed
+        worst = max(worst, elapsed)
+        failures += not solved
+    return total, worst, failures
+
+
+def bench_strategies(names, grids):
+    """
+    Solve grids with a pipeline of strategies.
+    Input: The names of the strategies (see strategies.py), and a list of grids.
+    Output: The pipeline, with its counters, and the total solve time in seconds.
+    """
+    from strategies import Pipeline
+
+    pipeline = Pipeline(names)
+    start = default_timer()
+    for grid in grids:
+        pipeline.solve(grid)
+    return pipeline, default_timer() - start
+
+
+def bench_branching(policy, grids):
+    """
+    Solve grids with a branching policy.
+    Input: The name of a policy (see branching.py), and a list of grids.
+    Output: The total number of search nodes, and the total solve time in seconds.
+    """
+    from branching import BranchingSearch
+
+    search = BranchingSearch(policy)
+    start = default_timer()
+    for grid in grids:
+        search.solve(grid)
+    return search.nodes, default_timer() - start
+
+
+def bench_startup(module, runs=10):
+    """
+    Input: The name of a module, and the number of runs.
+    Output: The mean time (seconds) of starting a Python interpreter importing the module, and of building the
+            geometries it needs: the start-up cost of a worker process.
+    """
+    command = [sys.executable, '-c', 'import ' + module if module else 'pass']
+    start = default_timer()
+    for _ in range(runs):
+        subprocess.run(command, check=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    return (default_timer() - start) / runs
+
+
+def verify_workload(grids, cache):
+    """Solve each grid with the bitmask engine, then check that its solution is unique."""
+    import bitboard
+
+    for grid in grids:
+        bitboard.search(bitboard.parse(grid), cache=cache)
+        bitboard.count_solutions(grid, limit=2, cache=cache)
+
+
+def clue_removal_workload(grids, cache):
+    """Check the uniqueness of each grid without each of its clues in turn, as the generator does."""
+    import bitboard
+
+    for grid in grids:
+        for i, value in enumerate(grid):
+            if value != '.':
+                bitboard.count_solutions(grid[:i] + '.' + grid[i + 1:], limit=2, cache=cache)
+
+
+def bench_cache(workload, grids, max_bytes):
+    """
+    Input: A workload function, a list of grids, and the memory cap of the propagation cache.
+    Output: The times in seconds of the workload without and with a propagation cache, and the cache.
+    """
+    from propagation_cache import PropagationCache
+
+    start = default_timer()
+    workload(grids, None)
+    uncached = default_timer() - start
+    cache = PropagationCache(max_bytes)
+    start = default_timer()
+    workload(grids, cache)
+    return uncached, default_timer() - start, cache
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare the Sudoku engines on puzzle sets.')
+    parser.add_argument('--engines', nargs='+', default=['propagation'] + sorted(ENGINES),
+                        help='engines to compare')
+    parser.add_argument('--sets', nargs='+', default=['easy', 'hard'], help='puzzle sets of the puzzles directory')
+    parser.add_argument('--batch', type=int, default=None, metavar='SIZE',
+                        help='instead, compare the vectorized batch solver with the bitmask engine on SIZE puzzles')
+    parser.add_argument('--scaling', nargs='+', type=int, default=None, metavar='BOX_SIZE',
+                        help='instead, solve pattern-generated puzzles of the given square sizes (3 for 9x9, 4 for '
+                             '16x16, 5 for 25x25) with the engines supporting them')
+    parser.add_argument('--clues', type=float, default=0.55, help='ratio of clues of the scaling puzzles')
+    parser.add_argument('--count', type=int, default=20, help='number of scaling puzzles per size')
+    parser.add_argument('--strategies', action='store_true',
+                        help='instead, compare the basic strategies with each advanced strategy added to them')
+    parser.add_argument('--branching', action='store_true', help='instead, compare the branching policies')
+    parser.add_argument('--startup', action='store_true',
+                        help='instead, measure the import time of the modules, and the build time of the geometries')
+    parser.add_argument('--cache', type=float, default=None, metavar='MEGABYTES', nargs='?', const=64.,
+                        help='instead, measure the propagation cache of the bitmask search (64 MB by default)')
+    args = parser.parse_args()
+
+    if args.cache:
+        print('{:<8}{:<14}{:>14}{:>14}{:>10}{:>12}{:>12}'.format('Set', 'Workload', 'Uncached (s)', 'Cached (s)',
+                                                                'Hit rate', 'Entries', 'Evictions'))
+        for name in args.sets:
+            grids = load_puzzles(name)
+            for label, workload in [('verify', verify_workload), ('clue removal', clue_removal_workload)]:
+                sample = grids if workload is verify_workload else grids[:10]
+                uncached, cached, cache = bench_cache(workload, sample, int(args.cache * 2 ** 20))
+                print('{:<8}{:<14}{:>14.2f}{:>14.2f}{:>9.1f}%{:>12}{:>12}'.format(
+                    name, label, uncached, cached, 100 * cache.hit_rate(), len(cache), cache.evictions))
+        return
+
+    if args.startup:
+        from geometry import Geometry
+
+        interpreter = bench_startup(None)
+        print('{:<14}{:>16}'.format('Module', 'Import (ms)'))
+        for module in STARTUP_MODULES:
+            print('{:<14}{:>16.1f}'.format(module, 1000 * (bench_startup(module) - interpreter)))
+        print('(Python start-up: {:.1f} ms)\n'.format(1000 * interpreter))
+        print('{:<14}{:>16}'.format('Geometry', 'Build (ms)'))
+        for box_size in (3, 4, 5):
+            start = default_timer()
+            Geometry(box_size)
+            print('{:<14}{:>16.1f}'.format('{0}x{0}'.format(box_size * box_size), 1000 * (default_timer() - start)))
+        return
+
+    if args.branching:
+        from branching import POLICIES
+
+        print('{:<8}{:<18}{:>12}{:>16}'.format('Set', 'Policy', 'Mean (ms)', 'Nodes/puzzle'))
+        for name in args.sets:
+            grids = load_puzzles(name)
+            for policy in sorted(POLICIES):
+                nodes, total = bench_branching(policy, grids)
+                print('{:<8}{:<18}{:>12.2f}{:>16.1f}'.format(name, policy, 1000 * total / len(grids),
+                                                             nodes / len(grids)))
+        return
+
+    if args.strategies:
+        from strategies import STRATEGIES, BASIC
+
+        configurations = [('basic', BASIC)] + [('+' + name, BASIC + [name]) for name in STRATEGIES if
+                                               name not in BASIC] + [('all', list(STRATEGIES))]
+        for name in args.sets:
+            grids = load_puzzles(name)
+            print('{:<8}{:<18}{:>12}{:>16}'.format('Set', 'Strategies', 'Mean (ms)', 'Nodes/puzzle'))
+            for label, names in configurations:
+                pipeline, total = bench_strategies(names, grids)
+                print('{:<8}{:<18}{:>12.2f}{:>16.1f}'.format(name, label, 1000 * total / len(grids),
+                                                             pipeline.nodes / len(grids)))
+            print('\n{:<18}{:>10}{:>12}{:>12}{:>16}'.format('Strategy (all)', 'Calls', 'Removed', 'Time (ms)',
+                                                            'Removed/ms'))
+            for strategy, stats in pipeline.stats.items():
+                print('{:<18}{:>10}{:>12}{:>12.1f}{:>16.1f}'.format(strategy, stats.calls, stats.eliminated,
+                                                                    1000 * stats.seconds,
+                                                                    stats.eliminated / (1000 * stats.seconds)
+                                                                    if stats.seconds else 0.))
+            print()
+        return
+
+    if args.scaling:
+        print('{:<8}{:<10}{:>8}{:>10}{:>12}{:>12}{:>10}'.format('Size', 'Engine', 'Clues', 'Puzzles', 'Mean (ms)',
+                                                               'Worst (ms)', 'Failures'))
+        for box_size in args.scaling:
+            for engine in [engine for engine in GEOMETRY_ENGINES if engine in args.engines]:
+                total, worst, failures = bench_scaling(box_size, args.clues, args.count, engine=engine)
+                size = box_size * box_size
+                print('{:<8}{:<10}{:>8.2f}{:>10}{:>12.2f}{:>12.2f}{:>10}'.format(
+                    '{}x{}'.format(size, size), engine, args.clues, args.count, 1000 * total / args.count,
+                    1000 * worst, failures))
+        return
+
+    if args.batch:
+        print('{:<8}{:>10}{:>24}{:>24}'.format('Set', 'Puzzles', 'Vectorized (puzzles/s)', 'Bitmask (puzzles/s)'))
+        for name in args.sets:
+            batch_throughput, scalar_throughput = bench_batch(load_puzzles(name), args.batch)
+            print('{:<8}{:>10}{:>24.0f}{:>24.0f}   x{:.1f}'.format(name, args.batch, batch_throughput,
+                                                                   scalar_throughput,
+                                                                   batch_throughput / scalar_throughput))
+        return
+
+    print('{:<8}{:<14}{:>10}{:>12}{:>12}{:>10}'.format('Set', 'Engine', 'Puzzles', 'Mean (ms)', 'Worst (ms)',
+                                                       'Failures'))
+    for name in args.sets:
+        grids = load_puzzles(name)
+        for engine in args.engines:
+            total, worst, failures = bench_engine(engine, grids)
+            print('{:<8}{:<14}{:>10}{:>12.2f}{:>12.2f}{:>10}'.format(name, engine, len(grids),
+                                                                      1000 * total / len(grids), 1000 * worst,
+                                                                      failures))
+
+
+if __name__ == '__main__':
+    main()
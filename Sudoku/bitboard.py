@@ -0,0 +1,220 @@
+"""
+Bitmask engine for the diagonal sudoku, and for the N^2 x N^2 sudokus of any geometry (see geometry.py).
+
+The sudoku is stored as a flat list of ints, one per box (in the order of solution.boxes for the 9x9 sudoku), whose
+i-th bit is set if digit i + 1 is still a candidate for the box. Units and peers are precompiled into tuples of box
+indices, so that eliminating a digit is a bitwise AND and checking that a box is solved is a lookup in a popcount
+table. Every function works on the 9x9 diagonal sudoku unless given another geometry.
+"""
+from geometry import CLASSIC
+
+boxes = CLASSIC.boxes
+ALL_DIGITS = CLASSIC.all_digits
+
+INDEX = dict((box, i) for i, box in enumerate(boxes))
+UNITS = CLASSIC.units
+PEERS = CLASSIC.peers
+
+POPCOUNT = CLASSIC.popcount
+CANDIDATES = tuple(CLASSIC.candidates(mask) for mask in range(ALL_DIGITS + 1))
+DIGIT_MASKS = CLASSIC.digit_masks
+
+
+def parse(grid, geometry=CLASSIC):
+    """
+    Convert a grid into the list of the candidate masks of its boxes.
+    Input: A grid in string form.
+    Output: A sudoku in bitmask form.
+    """
+    return geometry.parse(grid)
+
+
+def to_dict(cells, geometry=CLASSIC):
+    """
+    Convert a sudoku in bitmask form into the dictionary form used by solution.py.
+    Input: A sudoku in bitmask form.
+    Output: The sudoku in dictionary form.
+    """
+    if geometry is CLASSIC:
+        return dict(zip(boxes, (CANDIDATES[mask] for mask in cells)))
+    return geometry.to_dict(cells)
+
+
+def from_dict(sudoku, geometry=CLASSIC):
+    """
+    Convert a sudoku in the dictionary form used by solution.py into bitmask form.
+    Input: A sudoku in dictionary form.
+    Output: The sudoku in bitmask form.
+    """
+    return geometry.from_dict(sudoku)
+
+
+def eliminate(cells, geometry=CLASSIC):
+    """
+    Eliminate the value of every solved box from the candidates of its peers.
+    Input: A sudoku in bitmask form.
+    Output: The resulting sudoku in bitmask form.
+    """
+    popcount, peers = geometry.popcount, geometry.peers
+    for i, mask in enumerate(cells):
+        if popcount[mask] == 1:
+            for peer in peers[i]:
+                cells[peer] &= ~mask
+
+    return cells
+
+
+def naked_twins(cells, geometry=CLASSIC):
+    """
+    Eliminate the candidates of naked twins (two boxes of a unit with the same two candidates) from the other boxes
+    of their unit.
+    Input: A sudoku in bitmask form.
+    Output: The resulting sudoku in bitmask form.
+    """
+    popcount = geometry.popcount
+    for unit in geometry.units:
+        bivalent = {}
+        for i in unit:
+            mask = cells[i]
+            if popcount[mask] == 2:
+                twin = bivalent.get(mask)
+                # The candidates of the first box may have been reduced since it was seen
+                if twin is not None and cells[twin] == mask:
+                    for peer in unit:
+                        if peer != i and peer != twin:
+                            cells[peer] &= ~mask
+                else:
+                    bivalent[mask] = i
+
+    return cells
+
+
+def only_choice(cells, geometry=CLASSIC):
+    """
+    Assign to a box every digit that only fits in this box in one of its units (hidden singles).
+    Input: A sudoku in bitmask form.
+    Output: The resulting sudoku in bitmask form.
+    """
+    for unit in geometry.units:
+        # Digits seen at least once, and at least twice in the unit
+        once, twice = 0, 0
+        for i in unit:
+            twice |= once & cells[i]
+            once |= cells[i]
+        hidden_singles = once & ~twice
+        if hidden_singles:
+            for i in unit:
+                if cells[i] & hidden_singles:
+                    cells[i] &= hidden_singles
+
+    return cells
+
+
+def reduce_puzzle(cells, geometry=CLASSIC):
+    """
+    Iterate eliminate(), naked_twins() and only_choice() until the number of solved boxes stalls.
+    Input: A sudoku in bitmask form.
+    Output: The resulting sudoku in bitmask form, or False if a box has no candidate left.
+    """
+    popcount = geometry.popcount
+    stalled = False
+    while not stalled:
+        solved_before = sum(popcount[mask] == 1 for mask in cells)
+        eliminate(cells, geometry)
+        naked_twins(cells, geometry)
+        only_choice(cells, geometry)
+        solved_after = sum(popcount[mask] == 1 for mask in cells)
+        stalled = solved_before == solved_after
+        if 0 in cells:
+            return False
+
+    return cells
+
+
+def fewest_candidates(cells, geometry=CLASSIC):
+    """
+    Input: A sudoku in bitmask form.
+    Output: The first of the unfilled boxes with the fewest candidates, or None if the sudoku is solved.
+    """
+    popcount = geometry.popcount
+    unfilled = [(popcount[mask], i) for i, mask in enumerate(cells) if popcount[mask] > 1]
+    return min(unfilled)[1] if unfilled else None
+
+
+def increasing_values(cells, box, geometry=CLASSIC):
+    """
+    Output: The candidate digits of the box (as masks), in increasing order.
+    """
+    mask, digits = cells[box], []
+    while mask:
+        digit = mask & -mask
+        mask ^= digit
+        digits.append(digit)
+    return digits
+
+
+def search(cells, geometry=CLASSIC, cache=None, reduce=reduce_puzzle, choose=fewest_candidates,
+           order=increasing_values):
+    """
+    Using depth-first search and propagation, solve the sudoku.
+    Input: A sudoku in bitmask form, optionally a propagation_cache.PropagationCache, and the hooks of the search
+           (see iter_solutions).
+    Output: The solved sudoku in bitmask form, or False if there is no solution.
+    """
+    return next(iter_solutions(cells, geometry, cache, reduce, choose, order), False)
+
+
+def iter_solutions(cells, geometry=CLASSIC, cache=None, reduce=reduce_puzzle, choose=fewest_candidates,
+                   order=increasing_values):
+    """
+    Using depth-first search and propagation, enumerate the solutions of the sudoku.
+    The search is the one of every engine of bitmask form (see strategies.py, branching.py and generator.py), which
+    change its steps with hooks, all given the geometry as last argument:
+    - reduce(cells, geometry): the propagation of a node, returning the sudoku or False, reduce_puzzle by default
+    - choose(cells, geometry): the box to branch on, None if the sudoku is solved, fewest_candidates by default
+    - order(cells, box, geometry): the candidate digits of the box in the order they are tried, as masks,
+      increasing_values by default
+    Input: A sudoku in bitmask form, optionally a propagation_cache.PropagationCache looking up the results of the
+           propagations already done (in place of reduce), and the hooks.
+    Output: An iterator over the solved sudokus in bitmask form.
+    """
+    if cache is not None:
+        reduce = cache.reduce
+    cells = reduce(cells, geometry)
+    if not cells:
+        return
+
+    chosen = choose(cells, geometry)
+    if chosen is None:  # Solved
+        yield cells
+        return
+
+    for digit in order(cells, chosen, geometry):
+        new_cells = cells[:]
+        new_cells[chosen] = digit
+        yield from iter_solutions(new_cells, geometry, None, reduce, choose, order)
+
+
+def solve(grid, geometry=CLASSIC):
+    """
+    Find the solution to a Sudoku grid with the bitmask engine.
+    Input: A grid in string form, and its geometry.
+    Output: The dictionary representation of the final sudoku grid, or False if no solution exists.
+    """
+    cells = search(parse(grid, geometry), geometry)
+    return to_dict(cells, geometry) if cells else False
+
+
+def count_solutions(grid, limit=None, geometry=CLASSIC, cache=None):
+    """
+    Count the solutions of a grid, stopping at limit if given.
+    Input: A grid in string form, the maximal number of solutions to count, its geometry, and optionally a
+           propagation_cache.PropagationCache.
+    Output: The number of solutions, at most limit.
+    """
+    count = 0
+    for _ in iter_solutions(parse(grid, geometry), geometry, cache):
+        count += 1
+        if count == limit:
+            break
+    return count
@@ -0,0 +1,43 @@
+import unittest
+
+import bitboard
+import solution
+from fixtures import is_solution, sparse_grid
+from solution_test import TestNakedTwins, TestDiagonalSudoku
+
+
+class TestBitboard(unittest.TestCase):
+
+    def test_round_trip(self):
+        sudoku = TestNakedTwins.before_naked_twins_1
+        self.assertEqual(bitboard.to_dict(bitboard.from_dict(sudoku)), sudoku)
+
+    def test_naked_twins(self):
+        for before, possible_solutions in [(TestNakedTwins.before_naked_twins_1, TestNakedTwins.possible_solutions_1),
+                                           (TestNakedTwins.before_naked_twins_2, TestNakedTwins.possible_solutions_2)]:
+            cells = bitboard.from_dict(before)
+            self.assertIn(bitboard.to_dict(bitboard.naked_twins(cells)), possible_solutions)
+
+    def test_solve(self):
+        self.assertEqual(solution.solve(TestDiagonalSudoku.diagonal_grid, engine='bitmask'),
+                         TestDiagonalSudoku.solved_diag_sudoku)
+
+    def test_hooks(self):
+        nodes = []
+
+        def reduce(cells, geometry):
+            nodes.append(cells[:])
+            return bitboard.reduce_puzzle(cells, geometry)
+
+        def decreasing_values(cells, box, geometry):
+            return bitboard.increasing_values(cells, box, geometry)[::-1]
+
+        grid = sparse_grid
+        cells = bitboard.search(bitboard.parse(grid), reduce=reduce, order=decreasing_values)
+        self.assertTrue(is_solution(bitboard.to_dict(cells), grid))
+        self.assertNotEqual(cells, bitboard.search(bitboard.parse(grid)))
+        self.assertGreater(len(nodes), 1)
+        self.assertIsNone(bitboard.fewest_candidates(cells))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+"""
+Branching policies for the depth-first search of the bitmask engine (see bitboard.py), for any geometry.
+
+A policy chooses the box to branch on, and the order in which its candidates are tried:
+- mrv: the first box with the minimum remaining values (fewest candidates), digits in increasing order
+- mrv_degree: among the boxes with the minimum remaining values, the one with the most unsolved peers
+- mrv_degree_lcv: as mrv_degree, trying first the least constraining values, that is the digits which are candidates
+  of the fewest unsolved peers of the box
+The search is the one of bitboard.iter_solutions, the policy being its choose and order hooks. It counts its nodes, so
+that policies can be compared on puzzle sets (see benchmark.py --branching).
+"""
+import bitboard
+from bitboard import CLASSIC, increasing_values
+
+
+def min_remaining_values(cells, geometry):
+    """
+    Input: A sudoku in bitmask form, and its geometry.
+    Output: The list of the unfilled boxes with the fewest candidates (empty if the sudoku is solved).
+    """
+    popcount = geometry.popcount
+    fewest, boxes = geometry.size + 1, []
+    for i, mask in enumerate(cells):
+        count = popcount[mask]
+        if 1 < count < fewest:
+            fewest, boxes = count, [i]
+        elif count == fewest:
+            boxes.append(i)
+    return boxes
+
+
+def first_box(cells, boxes, geometry):
+    return boxes[0]
+
+
+def max_degree(cells, boxes, geometry):
+    """
+    Output: The box with the most unsolved peers.
+    """
+    popcount, peers = geometry.popcount, geometry.peers
+    return max(boxes, key=lambda i: sum(popcount[cells[peer]] > 1 for peer in peers[i]))
+
+
+def least_constraining_values(cells, box, geometry):
+    """
+    Output: The candidate digits of the box (as masks), from the one ruled out from the fewest unsolved peers.
+    """
+    popcount = geometry.popcount
+    unsolved_peers = [cells[peer] for peer in geometry.peers[box] if popcount[cells[peer]] > 1]
+    return sorted(increasing_values(cells, box, geometry),
+                  key=lambda digit: sum(1 for mask in unsolved_peers if mask & digit))
+
+
+class Policy(object):
+    """A branching policy: how to choose among the boxes with the minimum remaining values, and how to order digits."""
+
+    def __init__(self, tie_break=first_box, order=increasing_values):
+        self.tie_break = tie_break
+        self.order = order
+
+
+POLICIES = {
+    'mrv': Policy(first_box, increasing_values),
+    'mrv_degree': Policy(max_degree, increasing_values),
+    'mrv_degree_lcv': Policy(max_degree, least_constraining_values),
+}
+
+
+class BranchingSearch(object):
+    """Depth-first search with propagation following a branching policy, counting its nodes."""
+
+    def __init__(self, policy='mrv', geometry=CLASSIC):
+        """
+        Input: The name of one of the POLICIES, and the geometry.
+        """
+        self.policy = POLICIES[policy]
+        self.geometry = geometry
+        self.nodes = 0
+
+    def reduce(self, cells, geometry):
+        self.nodes += 1
+        return bitboard.reduce_puzzle(cells, geometry)
+
+    def choose(self, cells, geometry):
+        """
+        Output: The box chosen by the policy among the boxes with the minimum remaining values, or None if the sudoku
+                is solved.
+        """
+        boxes = min_remaining_values(cells, geometry)
+        return self.policy.tie_break(cells, boxes, geometry) if boxes else None
+
+    def search(self, cells):
+        """
+        Using depth-first search and propagation, solve the sudoku.
+        Input: A sudoku in bitmask form.
+        Output: The solved sudoku in bitmask form, or False if there is no solution.
+        """
+        return bitboard.search(cells, self.geometry, reduce=self.reduce, choose=self.choose, order=self.policy.order)
+
+    def solve(self, grid):
+        """
+        Find the solution to a Sudoku grid with the branching policy.
+        Input: A grid in string form.
+        Output: The dictionary representation of the final sudoku grid, or False if no solution exists.
+        """
+        cells = self.search(bitboard.parse(grid, self.geometry))
+        return bitboard.to_dict(cells, self.geometry) if cells else False
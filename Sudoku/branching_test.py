@@ -0,0 +1,37 @@
+import unittest
+
+import bitboard
+import branching
+from fixtures import contradiction, hard_grids, is_solution
+
+
+class TestBranching(unittest.TestCase):
+
+    def test_policies(self):
+        nodes = {}
+        for policy in branching.POLICIES:
+            search = branching.BranchingSearch(policy)
+            for grid in hard_grids:
+                self.assertTrue(is_solution(search.solve(grid), grid))
+            self.assertFalse(search.solve(contradiction))
+            nodes[policy] = search.nodes
+        self.assertLess(nodes['mrv_degree'], nodes['mrv'])
+
+    def test_choices(self):
+        cells = bitboard.parse(hard_grids[0])
+        cells = bitboard.reduce_puzzle(cells)
+        boxes = branching.min_remaining_values(cells, bitboard.CLASSIC)
+        fewest = min(bitboard.POPCOUNT[mask] for mask in cells if bitboard.POPCOUNT[mask] > 1)
+        self.assertTrue(boxes and all(bitboard.POPCOUNT[cells[i]] == fewest for i in boxes))
+        box = branching.max_degree(cells, boxes, bitboard.CLASSIC)
+        self.assertIn(box, boxes)
+
+        digits = branching.least_constraining_values(cells, box, bitboard.CLASSIC)
+        self.assertEqual(sorted(digits), branching.increasing_values(cells, box, bitboard.CLASSIC))
+        constrained = [sum(1 for peer in bitboard.PEERS[box] if bitboard.POPCOUNT[cells[peer]] > 1 and
+                           cells[peer] & digit) for digit in digits]
+        self.assertEqual(constrained, sorted(constrained))
+
+
+if __name__ == '__main__':
+    unittest.main()
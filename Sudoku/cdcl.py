@@ -0,0 +1,350 @@
+"""
+Conflict-driven clause learning (CDCL) engine for the diagonal sudoku, and for the sudokus of any geometry.
+
+The sudoku is encoded as a SAT problem: the variable of (box, digit) is true if the digit is placed in the box, and
+the clauses state that every box holds exactly one digit and every unit (including the diagonals) holds every digit
+exactly once. Givens are unit clauses.
+
+The solver is a small MiniSat-style CDCL solver:
+- unit propagation with two watched literals per clause
+- conflict analysis to the first unique implication point, the learned clause being added to the problem
+- non-chronological backjumping to the second highest decision level of the learned clause
+- VSIDS-like variable activities with phase saving, and restarts following the Luby sequence
+Literals are non-zero ints: v for the variable v being true, -v for it being false.
+"""
+import heapq
+from functools import lru_cache
+from itertools import combinations
+
+from bitboard import CLASSIC
+
+RESTART_BASE = 100  # number of conflicts of the first restart interval
+ACTIVITY_DECAY = 0.95
+
+
+def luby(i):
+    """
+    Output: The i-th term (from 1) of the Luby sequence 1, 1, 2, 1, 1, 2, 4, 1, 1, 2...
+    """
+    k = 1
+    while (1 << k) - 1 < i:
+        k += 1
+    while (1 << k) - 1 != i:
+        i -= (1 << (k - 1)) - 1
+        k = 1
+        while (1 << k) - 1 < i:
+            k += 1
+    return 1 << (k - 1)
+
+
+class Solver(object):
+    """CDCL solver of a CNF formula over the variables 1 to nb_vars."""
+
+    def __init__(self, nb_vars):
+        self.nb_vars = nb_vars
+        self.value = [0] * (nb_vars + 1)  # 1 true, -1 false, 0 unassigned
+        self.level = [0] * (nb_vars + 1)
+        self.reason = [None] * (nb_vars + 1)
+        self.phase = [1] * (nb_vars + 1)
+        self.activity = [0.] * (nb_vars + 1)
+        self.activity_increment = 1.
+        # Clauses watching each literal, indexed by literal + nb_vars
+        self.watches = [[] for _ in range(2 * nb_vars + 1)]
+        self.trail = []
+        self.trail_limits = []  # length of the trail at the start of each decision level
+        self.propagated = 0  # index in the trail of the next literal to propagate
+        self.order = [(0., var) for var in range(1, nb_vars + 1)]
+        self.unsatisfiable = False
+        self.conflicts = 0
+        self.decisions = 0
+        self.learned = 0
+
+    def literal_value(self, literal):
+        value = self.value[literal if literal > 0 else -literal]
+        return value if literal > 0 else -value
+
+    def decision_level(self):
+        return len(self.trail_limits)
+
+    def enqueue(self, literal, reason):
+        var = literal if literal > 0 else -literal
+        self.value[var] = 1 if literal > 0 else -1
+        self.level[var] = len(self.trail_limits)
+        self.reason[var] = reason
+        self.trail.append(literal)
+
+    def add_clause(self, literals):
+        """
+        Add a clause at decision level 0.
+        Output: False if the formula is found unsatisfiable.
+        """
+        assert self.decision_level() == 0
+        clause = []
+        for literal in set(literals):
+            value = self.literal_value(literal)
+            if value == 1 or -literal in literals:  # Satisfied
+                return True
+            if value == 0:
+                clause.append(literal)
+        if not clause:
+            self.unsatisfiable = True
+        elif len(clause) == 1:
+            self.enqueue(clause[0], None)
+            self.unsatisfiable = self.propagate() is not None
+        else:
+            self.watch(clause)
+        return not self.unsatisfiable
+
+    def watch(self, clause):
+        self.watches[clause[0] + self.nb_vars].append(clause)
+        self.watches[clause[1] + self.nb_vars].append(clause)
+
+    def propagate(self):
+        """
+        Propagate the literals of the trail not propagated yet, with the watched literals of the clauses: the first
+        two literals of a clause are watched, and the literal implied by a clause is moved to its first position.
+        Output: A conflicting clause, or None.
+        """
+        nb_vars, value, watches, trail = self.nb_vars, self.value, self.watches, self.trail
+        while self.propagated < len(trail):
+            false_literal = -trail[self.propagated]
+            self.propagated += 1
+            watching = watches[false_literal + nb_vars]
+            kept = []
+            for n, clause in enumerate(watching):
+                if clause[0] == false_literal:
+                    clause[0], clause[1] = clause[1], false_literal
+                first = clause[0]
+                first_value = value[first] if first > 0 else -value[-first]
+                if first_value == 1:
+                    kept.append(clause)
+                    continue
+                # Look for a literal that is not false to watch instead
+                for k in range(2, len(clause)):
+                    literal = clause[k]
+                    if (value[literal] if literal > 0 else -value[-literal]) != -1:
+                        clause[1], clause[k] = literal, false_literal
+                        watches[literal + nb_vars].append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if first_value == -1:  # Conflict
+                        kept.extend(watching[n + 1:])
+                        watches[false_literal + nb_vars] = kept
+                        return clause
+                    self.enqueue(first, clause)
+            watches[false_literal + nb_vars] = kept
+        return None
+
+    def bump(self, var):
+        self.activity[var] += self.activity_increment
+        if self.activity[var] > 1e100:
+            self.activity = [activity * 1e-100 for activity in self.activity]
+            self.activity_increment *= 1e-100
+            self.order = [(-self.activity[v], v) for v in range(1, self.nb_vars + 1) if not self.value[v]]
+            heapq.heapify(self.order)
+        elif not self.value[var]:
+            heapq.heappush(self.order, (-self.activity[var], var))
+
+    def analyze(self, conflict):
+        """
+        Analyze a conflict back to the first unique implication point of the current decision level.
+        Output: The learned clause, whose first literal is the negation of the implication point, and the level to
+                backjump to.
+        """
+        seen = set()
+        learned = [None]
+        current_level = self.decision_level()
+        pending = 0  # number of literals of the current level left to resolve
+        index = len(self.trail) - 1
+        clause, implied = conflict, None
+        while True:
+            for literal in clause:
+                var = abs(literal)
+                if literal == implied or var in seen or self.level[var] == 0:
+                    continue
+                seen.add(var)
+                self.bump(var)
+                if self.level[var] == current_level:
+                    pending += 1
+                else:
+                    learned.append(literal)
+            # The most recent literal of the trail involved in the conflict
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            implied = self.trail[index]
+            index -= 1
+            seen.discard(abs(implied))
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.reason[abs(implied)]
+        learned[0] = -implied
+        self.activity_increment /= ACTIVITY_DECAY
+
+        if len(learned) == 1:
+            return learned, 0
+        # Watch the literal of the highest level among the others, so that the clause is unit after backjumping
+        k = max(range(1, len(learned)), key=lambda i: self.level[abs(learned[i])])
+        learned[1], learned[k] = learned[k], learned[1]
+        return learned, self.level[abs(learned[1])]
+
+    def cancel_until(self, level):
+        """Undo the assignments of the decision levels above level."""
+        if self.decision_level() <= level:
+            return
+        limit = self.trail_limits[level]
+        for literal in self.trail[limit:]:
+            var = abs(literal)
+            self.phase[var] = self.value[var]
+            self.value[var] = 0
+            self.reason[var] = None
+            heapq.heappush(self.order, (-self.activity[var], var))
+        del self.trail[limit:]
+        del self.trail_limits[level:]
+        self.propagated = limit
+
+    def pick_branching_literal(self):
+        """
+        Output: The saved phase of the unassigned variable of highest activity, or None if all are assigned.
+        """
+        while self.order:
+            activity, var = heapq.heappop(self.order)
+            if not self.value[var] and -activity == self.activity[var]:
+                return var if self.phase[var] == 1 else -var
+        # Stale entries only: look for an unassigned variable directly
+        for var in range(1, self.nb_vars + 1):
+            if not self.value[var]:
+                return var if self.phase[var] == 1 else -var
+        return None
+
+    def solve(self):
+        """
+        Search a model of the formula, restarting after a number of conflicts following the Luby sequence.
+        Output: True if the formula is satisfiable (its model being in value), False otherwise.
+        """
+        if self.unsatisfiable or self.propagate() is not None:
+            self.unsatisfiable = True
+            return False
+        restarts = 0
+        while True:
+            restarts += 1
+            result = self.search(RESTART_BASE * luby(restarts))
+            if result is not None:
+                return result
+            self.cancel_until(0)
+
+    def search(self, max_conflicts):
+        """
+        Output: True if a model is found, False if the formula is unsatisfiable, None after max_conflicts conflicts.
+        """
+        conflicts = 0
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                conflicts += 1
+                if self.decision_level() == 0:
+                    self.unsatisfiable = True
+                    return False
+                learned, level = self.analyze(conflict)
+                self.cancel_until(level)
+                if len(learned) == 1:
+                    self.enqueue(learned[0], None)
+                else:
+                    self.watch(learned)
+                    self.learned += 1
+                    self.enqueue(learned[0], learned)
+            else:
+                if conflicts >= max_conflicts:
+                    return None
+                literal = self.pick_branching_literal()
+                if literal is None:
+                    return True
+                self.decisions += 1
+                self.trail_limits.append(len(self.trail))
+                self.enqueue(literal, None)
+
+
+@lru_cache(maxsize=None)
+def sudoku_clauses(geometry):
+    """
+    Input: A geometry.
+    Output: The tuple of the clauses of its sudokus (without givens), as tuples of literals.
+    """
+    size = geometry.size
+
+    def variable(box, d):
+        return box * size + d + 1
+
+    clauses = []
+    for box in range(geometry.nb_boxes):
+        clauses.append(tuple(variable(box, d) for d in range(size)))
+        clauses.extend((-variable(box, d1), -variable(box, d2)) for d1, d2 in combinations(range(size), 2))
+    for unit in geometry.units:
+        for d in range(size):
+            clauses.append(tuple(variable(box, d) for box in unit))
+            clauses.extend((-variable(box1, d), -variable(box2, d)) for box1, box2 in combinations(unit, 2))
+    return tuple(clauses)
+
+
+def encode(grid, geometry=CLASSIC):
+    """
+    Encode a sudoku as a SAT problem.
+    Input: A grid in string form, and its geometry.
+    Output: The solver, with the clauses of the sudoku.
+    """
+    solver = Solver(geometry.nb_boxes * geometry.size)
+    for clause in sudoku_clauses(geometry):
+        solver.watch(list(clause))
+    for box, mask in enumerate(geometry.parse(grid)):
+        if mask != geometry.all_digits:
+            solver.add_clause([box * geometry.size + mask.bit_length()])
+    return solver
+
+
+def decode(solver, geometry=CLASSIC):
+    """
+    Output: The model of the solver in dictionary form.
+    """
+    size = geometry.size
+    return dict((geometry.boxes[box], geometry.symbols[d]) for box in range(geometry.nb_boxes) for d in range(size)
+                if solver.value[box * size + d + 1] == 1)
+
+
+def iter_solutions(grid, geometry=CLASSIC):
+    """
+    Input: A grid in string form, and its geometry.
+    Output: An iterator over the solutions of the grid, in dictionary form. After each one, a clause excluding it is
+            added, and the search starts again.
+    """
+    solver = encode(grid, geometry)
+    while solver.solve():
+        yield decode(solver, geometry)
+        model = [var for var in range(1, solver.nb_vars + 1) if solver.value[var] == 1]
+        solver.cancel_until(0)
+        if not solver.add_clause([-var for var in model]):
+            return
+
+
+def solve(grid, geometry=CLASSIC):
+    """
+    Find the solution to a Sudoku grid with the CDCL engine.
+    Input: A grid in string form, and its geometry.
+    Output: The dictionary representation of the final sudoku grid, or False if no solution exists.
+    """
+    return next(iter_solutions(grid, geometry), False)
+
+
+def count_solutions(grid, limit=None, geometry=CLASSIC):
+    """
+    Count the solutions of a grid, stopping at limit if given.
+    Input: A grid in string form, the maximal number of solutions to count, and its geometry.
+    Output: The number of solutions, at most limit.
+    """
+    count = 0
+    for _ in iter_solutions(grid, geometry):
+        count += 1
+        if count == limit:
+            break
+    return count
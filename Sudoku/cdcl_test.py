@@ -0,0 +1,28 @@
+import random
+import unittest
+
+import cdcl
+from benchmark import pattern_grid
+from fixtures import hard_grids, is_solution
+from geometry import get_geometry
+
+
+class TestCDCL(unittest.TestCase):
+
+    def test_learning(self):
+        solver = cdcl.encode(hard_grids[0])
+        self.assertTrue(solver.solve())
+        self.assertGreater(solver.conflicts, 0)
+        self.assertGreater(solver.learned, 0)
+
+    def test_large(self):
+        geometry = get_geometry(4, diagonal=False)
+        grid = pattern_grid(geometry, 0.5, random.Random(0))
+        self.assertTrue(is_solution(cdcl.solve(grid, geometry), grid, geometry))
+
+    def test_luby(self):
+        self.assertEqual([cdcl.luby(i) for i in range(1, 16)], [1, 1, 2, 1, 1, 2, 4, 1, 1, 2, 1, 1, 2, 4, 8])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,192 @@
+"""
+Dancing Links (Knuth's Algorithm X) engine for the diagonal sudoku.
+
+The sudoku is encoded as an exact cover problem: each row of the matrix places a digit in a box, and covers
+- the box (every box holds exactly one digit)
+- the digit in each of the units of the box (rows, columns, squares, and diagonals for the boxes on them)
+Every unit holds 9 boxes, so every digit appears exactly once in each unit, including diagonal_units.
+
+The matrix is stored as the circular doubly linked lists of Dancing Links, in flat lists of node indices: node 0 is
+the root, nodes 1 to the number of columns are the column headers, and the other nodes are the 1s of the matrix.
+"""
+from geometry import CLASSIC, EMPTY
+from solution import boxes, digits, unit_list
+
+
+def constraint_columns(i, d):
+    """
+    Input: The index of a box and of a digit.
+    Output: The columns of the matrix covered by placing the digit in the box.
+    """
+    first_unit_column = len(boxes)
+    return [i] + [first_unit_column + u * len(digits) + d for u in CLASSIC.box_units[i]]
+
+
+class ExactCover(object):
+    """The exact cover matrix of a diagonal sudoku, stored as dancing links."""
+
+    def __init__(self):
+        nb_columns = len(boxes) + len(unit_list) * len(digits)
+        self.left = list(range(-1, nb_columns))
+        self.right = list(range(1, nb_columns + 2))
+        self.left[0], self.right[nb_columns] = nb_columns, 0
+        self.up = list(range(nb_columns + 1))
+        self.down = list(range(nb_columns + 1))
+        self.column = list(range(nb_columns + 1))
+        self.size = [0] * (nb_columns + 1)
+        self.row_of_node = [None] * (nb_columns + 1)
+
+        # The first node of each row, indexed by (box, digit)
+        self.rows = {}
+        for i, box in enumerate(boxes):
+            for d, digit in enumerate(digits):
+                self.add_row((box, digit), [1 + column for column in constraint_columns(i, d)])
+
+    def add_row(self, row, columns):
+        first = len(self.column)
+        for i, column in enumerate(columns):
+            node = first + i
+            self.column.append(column)
+            self.row_of_node.append(row)
+            self.left.append(node - 1 if i > 0 else first + len(columns) - 1)
+            self.right.append(node + 1 if i < len(columns) - 1 else first)
+            # Insert the node at the bottom of its column
+            self.up.append(self.up[column])
+            self.down.append(column)
+            self.down[self.up[column]] = node
+            self.up[column] = node
+            self.size[column] += 1
+        self.rows[row] = first
+
+    def cover(self, column):
+        left, right, up, down, size, col = self.left, self.right, self.up, self.down, self.size, self.column
+        right[left[column]] = right[column]
+        left[right[column]] = left[column]
+        i = down[column]
+        while i != column:
+            j = right[i]
+            while j != i:
+                down[up[j]] = down[j]
+                up[down[j]] = up[j]
+                size[col[j]] -= 1
+                j = right[j]
+            i = down[i]
+
+    def uncover(self, column):
+        left, right, up, down, size, col = self.left, self.right, self.up, self.down, self.size, self.column
+        i = up[column]
+        while i != column:
+            j = left[i]
+            while j != i:
+                size[col[j]] += 1
+                down[up[j]] = j
+                up[down[j]] = j
+                j = left[j]
+            i = up[i]
+        right[left[column]] = column
+        left[right[column]] = column
+
+    def select(self, node):
+        """Cover the columns of the other nodes of a row whose column is already covered."""
+        j = self.right[node]
+        while j != node:
+            self.cover(self.column[j])
+            j = self.right[j]
+
+    def deselect(self, node):
+        j = self.left[node]
+        while j != node:
+            self.uncover(self.column[j])
+            j = self.left[j]
+
+    def place(self, row):
+        """
+        Select a row of the matrix before the search (a given digit of the grid).
+        Output: False if the row conflicts with the rows already placed.
+        """
+        node = self.rows[row]
+        nodes = [node]
+        j = self.right[node]
+        while j != node:
+            nodes.append(j)
+            j = self.right[j]
+        # The row must still be in the matrix: all its columns uncovered, and none of its nodes removed
+        for j in nodes:
+            column = self.column[j]
+            if self.right[self.left[column]] != column or self.down[self.up[j]] != j:
+                return False
+        for j in nodes:
+            self.cover(self.column[j])
+        return True
+
+    def solutions(self, partial):
+        """
+        Algorithm X: search the exact covers of the remaining columns.
+        Input: The list of the rows selected so far, extended during the search.
+        Output: An iterator over the solutions, as lists of rows (the same list, to be copied if kept).
+        """
+        right, down, size = self.right, self.down, self.size
+        if right[0] == 0:
+            yield partial
+            return
+
+        # Choose the column with the fewest rows
+        column, smallest = None, None
+        c = right[0]
+        while c != 0:
+            if smallest is None or size[c] < smallest:
+                column, smallest = c, size[c]
+                if smallest <= 1:
+                    break
+            c = right[c]
+        if smallest == 0:
+            return
+
+        self.cover(column)
+        node = down[column]
+        while node != column:
+            partial.append(self.row_of_node[node])
+            self.select(node)
+            yield from self.solutions(partial)
+            self.deselect(node)
+            partial.pop()
+            node = down[node]
+        self.uncover(column)
+
+
+def iter_solutions(grid):
+    """
+    Input: A grid in string form.
+    Output: An iterator over the solutions of the grid, in dictionary form.
+    """
+    assert (len(grid) == 81)
+    matrix = ExactCover()
+    givens = [(box, value) for box, value in zip(boxes, grid) if value not in EMPTY]
+    if not all(matrix.place(row) for row in givens):
+        return
+
+    for rows in matrix.solutions([]):
+        yield dict(givens + rows)
+
+
+def solve(grid):
+    """
+    Find the solution to a Sudoku grid with Dancing Links.
+    Input: A grid in string form.
+    Output: The dictionary representation of the final sudoku grid, or False if no solution exists.
+    """
+    return next(iter_solutions(grid), False)
+
+
+def count_solutions(grid, limit=None):
+    """
+    Count the solutions of a grid, stopping at limit if given.
+    Input: A grid in string form, and the maximal number of solutions to count.
+    Output: The number of solutions, at most limit.
+    """
+    count = 0
+    for _ in iter_solutions(grid):
+        count += 1
+        if count == limit:
+            break
+    return count
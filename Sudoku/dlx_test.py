@@ -0,0 +1,29 @@
+import unittest
+
+import dlx
+import solution
+from fixtures import broken_diagonal, contradiction, hard_grids, is_solution, solved_grid
+from solution_test import TestDiagonalSudoku
+
+
+class TestDancingLinks(unittest.TestCase):
+
+    def test_solve(self):
+        self.assertEqual(solution.solve(TestDiagonalSudoku.diagonal_grid, engine='dlx'),
+                         TestDiagonalSudoku.solved_diag_sudoku)
+
+    def test_hard_puzzles(self):
+        for grid in hard_grids:
+            self.assertTrue(is_solution(dlx.solve(grid), grid))
+            self.assertEqual(dlx.count_solutions(grid), 1)
+
+    def test_count_solutions(self):
+        self.assertEqual(dlx.count_solutions(solved_grid), 1)
+        self.assertEqual(dlx.count_solutions(contradiction), 0)
+        # The diagonals are constraints: a grid breaking them has no solution
+        self.assertEqual(dlx.count_solutions(broken_diagonal), 0)
+        self.assertEqual(dlx.count_solutions('.' * 81, limit=10), 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
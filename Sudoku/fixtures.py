@@ -0,0 +1,25 @@
+"""
+Grids and checks shared by the tests of the engines.
+"""
+import solution
+from benchmark import load_puzzles
+from geometry import CLASSIC, EMPTY
+from solution_test import TestDiagonalSudoku
+
+solved_grid = ''.join(TestDiagonalSudoku.solved_diag_sudoku[box] for box in solution.boxes)
+sparse_grid = solved_grid[:20] + '.' * 61  # many solutions, reached by search only
+contradiction = '22' + '.' * 79
+broken_diagonal = '1' + '.' * 79 + '1'  # only the diagonal units rule it out
+hard_grids = load_puzzles('hard')[:10]
+engines = ['propagation'] + sorted(solution.ENGINES)
+
+
+def is_solution(sudoku, grid, geometry=CLASSIC):
+    """
+    Check that a sudoku in dictionary form is a solution of a grid of the geometry: every unit holds every digit, and
+    the clues are kept.
+    """
+    symbols = sorted(geometry.symbols)
+    return bool(sudoku) and all(sorted(sudoku[geometry.boxes[i]] for i in unit) == symbols
+                                for unit in geometry.units) and \
+        all(value in EMPTY or sudoku[box] == value for box, value in zip(geometry.boxes, grid))
@@ -0,0 +1,165 @@
+"""
+Generator of diagonal Sudoku puzzles with a unique solution, graded by difficulty.
+
+A random solution grid is filled by a search trying the digits in random order, then its clues are removed in random
+order, each removal being kept only if the puzzle still has a unique solution (checked with the Dancing Links
+counter). The puzzle is graded by the strategies of the bitmask engine needed to solve it:
+- easy: eliminate alone
+- medium: eliminate and only_choice
+- hard: eliminate, only_choice and naked_twins
+- expert: search, the puzzle being further described by the number of nodes of the search tree
+Minimal puzzles are mostly expert ones: for an easier target difficulty, removed clues are given back at random until
+the grade of the puzzle is down to the target.
+
+Puzzles are generated in a pool of worker processes and streamed to a file (or the standard output), one grid per
+line. The distribution of the grades is reported on stderr.
+
+Example:
+    python generator.py 1000 --output puzzles.txt --difficulty hard --seed 42
+"""
+import argparse
+import random
+import sys
+from collections import Counter
+from multiprocessing import Pool
+from timeit import default_timer
+
+import bitboard
+import dlx
+from strategies import Pipeline
+
+DIFFICULTIES = ['easy', 'medium', 'hard', 'expert']
+
+# Strategies allowed at each difficulty below expert
+STRATEGIES = {
+    'easy': ['eliminate'],
+    'medium': ['eliminate', 'only_choice'],
+    'hard': ['eliminate', 'only_choice', 'naked_twins'],
+}
+
+
+def random_solution(rng, cells=None):
+    """
+    Fill a random solution grid by depth-first search, trying the candidates of each box in random order.
+    Input: A random.Random, and the sudoku to fill in bitmask form (an empty one by default).
+    Output: The solved sudoku in bitmask form, or False if there is no solution.
+    """
+    if cells is None:
+        cells = [bitboard.ALL_DIGITS] * len(bitboard.boxes)
+
+    def shuffled_values(cells, box, geometry):
+        candidates = bitboard.increasing_values(cells, box, geometry)
+        rng.shuffle(candidates)
+        return candidates
+
+    return bitboard.search(cells, order=shuffled_values)
+
+
+def search_nodes(cells):
+    """
+    Input: A sudoku in bitmask form.
+    Output: The number of nodes the bitmask search explores before reaching its first solution.
+    """
+    nodes = 0
+
+    def reduce(cells, geometry):
+        nonlocal nodes
+        nodes += 1
+        return bitboard.reduce_puzzle(cells, geometry)
+
+    bitboard.search(cells, reduce=reduce)
+    return nodes
+
+
+def grade(grid):
+    """
+    Input: A grid in string form.
+    Output: A tuple (difficulty, number of search nodes, 0 if the puzzle is solved without search).
+    """
+    for difficulty in DIFFICULTIES[:-1]:
+        cells = Pipeline(STRATEGIES[difficulty]).reduce(bitboard.parse(grid))
+        if cells and all(bitboard.POPCOUNT[mask] == 1 for mask in cells):
+            return difficulty, 0
+    return 'expert', search_nodes(bitboard.parse(grid))
+
+
+def generate(rng, difficulty=None):
+    """
+    Generate a puzzle with a unique solution.
+    Input: A random.Random, and the target difficulty (None for a minimal puzzle, of any difficulty).
+    Output: A tuple (grid in string form, difficulty, number of search nodes).
+    """
+    solution = ''.join(bitboard.CANDIDATES[mask] for mask in random_solution(rng))
+    puzzle = list(solution)
+    removed = []
+    for i in rng.sample(range(len(puzzle)), len(puzzle)):
+        puzzle[i] = '.'
+        if dlx.count_solutions(''.join(puzzle), limit=2) == 1:
+            removed.append(i)
+        else:
+            puzzle[i] = solution[i]
+
+    grid = ''.join(puzzle)
+    level, nodes = grade(grid)
+    if difficulty is not None:
+        # Giving clues back keeps the solution unique, and can only make the puzzle easier
+        rng.shuffle(removed)
+        while DIFFICULTIES.index(level) > DIFFICULTIES.index(difficulty):
+            i = removed.pop()
+            puzzle[i] = solution[i]
+            grid = ''.join(puzzle)
+            level, nodes = grade(grid)
+    return grid, level, nodes
+
+
+def generate_chunk(task):
+    """
+    Input: A tuple (random seed, number of puzzles, target difficulty).
+    Output: The list of the generated (grid, difficulty, number of search nodes).
+    """
+    seed, count, difficulty = task
+    rng = random.Random(seed)
+    return [generate(rng, difficulty) for _ in range(count)]
+
+
+def run(output_file, count, difficulty=None, processes=None, seed=0, chunk_size=16):
+    """
+    Generate puzzles in a pool of worker processes and write them to an output stream as they are generated.
+    Input: The stream, the number of puzzles, their target difficulty, the number of worker processes, the random seed
+           (the same seed and chunk size always give the same puzzles), and the number of puzzles per task.
+    Output: The Counter of the difficulties of the puzzles.
+    """
+    grades = Counter()
+    tasks = [(seed * 1000003 + start, min(chunk_size, count - start), difficulty)
+             for start in range(0, count, chunk_size)]
+    with Pool(processes) as pool:
+        for puzzles in pool.imap(generate_chunk, tasks):
+            for grid, level, _ in puzzles:
+                output_file.write(grid + '\n')
+                grades[level] += 1
+    return grades
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate diagonal Sudoku puzzles with a unique solution.')
+    parser.add_argument('count', type=int, help='number of puzzles')
+    parser.add_argument('--output', type=argparse.FileType('w'), default=sys.stdout,
+                        help='file of puzzles (standard output by default)')
+    parser.add_argument('--difficulty', choices=DIFFICULTIES, default=None,
+                        help='hardest grade of the puzzles (minimal puzzles of any grade by default)')
+    parser.add_argument('--processes', type=int, default=None, help='number of worker processes (one per CPU)')
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    args = parser.parse_args()
+
+    start = default_timer()
+    grades = run(args.output, args.count, args.difficulty, args.processes, args.seed)
+    elapsed = default_timer() - start
+    args.output.flush()
+
+    sys.stderr.write('{} puzzles in {:.2f} s: {:.1f} puzzles/sec\n'.format(args.count, elapsed,
+                                                                          args.count / elapsed if elapsed else 0.))
+    sys.stderr.write('  '.join('{} {}'.format(level, grades[level]) for level in DIFFICULTIES) + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+import io
+import random
+import unittest
+
+import dlx
+import generator
+from fixtures import is_solution, solved_grid
+from solution import solve
+
+
+class TestGenerator(unittest.TestCase):
+
+    def test_random_solution(self):
+        rng = random.Random(0)
+        grids = [generator.bitboard.to_dict(generator.random_solution(rng)) for _ in range(3)]
+        for grid in grids:
+            self.assertTrue(is_solution(grid, '.' * 81))
+        self.assertNotEqual(grids[0], grids[1])
+
+    def test_grade(self):
+        self.assertEqual(generator.grade(solved_grid), ('easy', 0))
+        self.assertEqual(generator.grade(solved_grid[:20] + '.' * 61)[0], 'expert')
+
+    def test_generate(self):
+        rng = random.Random(0)
+        for difficulty in (None, 'medium'):
+            grid, level, nodes = generator.generate(rng, difficulty)
+            self.assertEqual(dlx.count_solutions(grid, limit=2), 1)
+            self.assertEqual(generator.grade(grid), (level, nodes))
+            if difficulty is not None:
+                self.assertLessEqual(generator.DIFFICULTIES.index(level), generator.DIFFICULTIES.index(difficulty))
+            else:
+                # Minimal: no clue can be removed
+                for i in [i for i, value in enumerate(grid) if value != '.'][:10]:
+                    self.assertEqual(dlx.count_solutions(grid[:i] + '.' + grid[i + 1:], limit=2), 2)
+
+    def test_run(self):
+        output = io.StringIO()
+        grades = generator.run(output, 3, 'hard', processes=2, seed=1, chunk_size=2)
+        grids = output.getvalue().splitlines()
+        self.assertEqual(len(grids), 3)
+        self.assertEqual(sum(grades.values()), 3)
+        for grid in grids:
+            self.assertTrue(is_solution(solve(grid), grid))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+"""
+Geometry of N^2 x N^2 sudokus (9x9, 16x16, 25x25...): names of the boxes, units, peers and index tables.
+
+Boxes are indexed in row-major order. Row names are letters, column names are numbers, and the symbols of the digits
+are 1-9 then letters (1-9A-G for 16x16, 1-9A-P for 25x25). Candidates are stored as bitmasks whose i-th bit is set if
+the i-th symbol is still possible for the box.
+
+Geometries are built once per shape by get_geometry(), and shared by every engine: CLASSIC is the geometry of the 9x9
+diagonal sudoku, from which solution.py derives its tables.
+"""
+ROW_NAMES = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+SYMBOLS = '123456789' + ROW_NAMES
+EMPTY = '.0'  # characters of the empty boxes in a grid
+MAX_POPCOUNT_TABLE = 16  # largest number of digits whose popcounts are tabulated
+
+
+class BitCount(object):
+    """Popcount of masks too large to be tabulated, with the same indexing syntax as a table."""
+
+    def __getitem__(self, mask):
+        return bin(mask).count('1')
+
+
+class Geometry(object):
+    """Units, peers and lookup tables of the sudokus made of box_size x box_size squares."""
+
+    def __init__(self, box_size=3, diagonal=True):
+        """
+        Input: The size of the squares (3 for 9x9 sudokus), and whether both diagonals are units too.
+        """
+        size = box_size * box_size
+        assert size <= len(SYMBOLS)
+        self.box_size = box_size
+        self.size = size
+        self.diagonal = diagonal
+        self.nb_boxes = size * size
+        self.symbols = SYMBOLS[:size]
+        self.rows = ROW_NAMES[:size]
+        self.cols = [str(c + 1) for c in range(size)]
+        self.boxes = [r + c for r in self.rows for c in self.cols]
+        self.all_digits = (1 << size) - 1
+        self.digit_masks = dict((symbol, 1 << i) for i, symbol in enumerate(self.symbols))
+
+        row_units = [tuple(r * size + c for c in range(size)) for r in range(size)]
+        column_units = [tuple(r * size + c for r in range(size)) for c in range(size)]
+        square_units = [tuple((br * box_size + r) * size + bc * box_size + c
+                              for r in range(box_size) for c in range(box_size))
+                        for br in range(box_size) for bc in range(box_size)]
+        diagonal_units = [tuple(i * size + i for i in range(size)),
+                          tuple(i * size + size - 1 - i for i in range(size))] if diagonal else []
+        self.units = tuple(row_units + column_units + square_units + diagonal_units)
+
+        box_units = [[] for _ in range(self.nb_boxes)]
+        for u, unit in enumerate(self.units):
+            for box in unit:
+                box_units[box].append(u)
+        self.box_units = tuple(tuple(u) for u in box_units)
+        self.peers = tuple(tuple(sorted(set(peer for u in self.box_units[box] for peer in self.units[u]) - {box}))
+                           for box in range(self.nb_boxes))
+
+        if size <= MAX_POPCOUNT_TABLE:
+            self.popcount = tuple(bin(mask).count('1') for mask in range(self.all_digits + 1))
+        else:
+            self.popcount = BitCount()
+
+    def parse(self, grid):
+        """
+        Input: A grid in string form, '.' or '0' marking the empty boxes.
+        Output: The list of the candidate masks of its boxes.
+        """
+        assert len(grid) == self.nb_boxes
+        return [self.all_digits if value in EMPTY else self.digit_masks[value] for value in grid]
+
+    def candidates(self, mask):
+        """
+        Input: A candidate mask.
+        Output: The string of its candidate symbols.
+        """
+        return ''.join(symbol for i, symbol in enumerate(self.symbols) if mask >> i & 1)
+
+    def to_dict(self, cells):
+        """
+        Input: A sudoku in bitmask form.
+        Output: The sudoku in dictionary form, keyed by box names.
+        """
+        return dict(zip(self.boxes, (self.candidates(mask) for mask in cells)))
+
+    def from_dict(self, sudoku):
+        """
+        Input: A sudoku in dictionary form.
+        Output: The sudoku in bitmask form.
+        """
+        return [sum(self.digit_masks[symbol] for symbol in sudoku[box]) for box in self.boxes]
+
+    def to_grid(self, cells):
+        """
+        Input: A sudoku in bitmask form.
+        Output: The grid in string form, '.' marking the unsolved boxes.
+        """
+        return ''.join(self.candidates(mask) if self.popcount[mask] == 1 else '.' for mask in cells)
+
+
+# The geometries built so far, by (box size, diagonal)
+geometries = {}
+
+
+def get_geometry(box_size=3, diagonal=True):
+    """
+    Input: The size of the squares, and whether both diagonals are units too.
+    Output: The Geometry of this shape, built once per process and shared by every engine.
+    """
+    key = (box_size, bool(diagonal))
+    if key not in geometries:
+        geometries[key] = Geometry(box_size, diagonal)
+    return geometries[key]
+
+
+CLASSIC = get_geometry(3, diagonal=True)
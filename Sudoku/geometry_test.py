@@ -0,0 +1,51 @@
+import random
+import unittest
+
+import bitboard
+import solution
+from benchmark import pattern_grid
+from fixtures import is_solution
+from geometry import Geometry, get_geometry
+
+
+class TestGeometry(unittest.TestCase):
+
+    def test_classic_tables(self):
+        geometry = Geometry(3, diagonal=True)
+        cross = solution.cross
+        self.assertEqual(geometry.boxes, cross(solution.rows, solution.cols))
+        unit_list = [cross(r, solution.cols) for r in solution.rows] + \
+                    [cross(solution.rows, c) for c in solution.cols] + \
+                    [cross(rs, cs) for rs in ('ABC', 'DEF', 'GHI') for cs in ('123', '456', '789')] + \
+                    [[s + t for s, t in zip(solution.rows, solution.cols)],
+                     [s + t for s, t in zip(solution.rows, reversed(solution.cols))]]
+        self.assertEqual(solution.unit_list, unit_list)
+        for box in solution.boxes:
+            self.assertEqual(solution.units[box], [u for u in unit_list if box in u])
+            self.assertEqual(solution.peers[box], set(sum(solution.units[box], [])) - {box})
+
+    def test_shared(self):
+        self.assertIs(get_geometry(4, diagonal=False), get_geometry(4, diagonal=False))
+        self.assertIs(bitboard.CLASSIC, get_geometry())
+
+    def test_large_tables(self):
+        for box_size, symbols in [(4, '123456789ABCDEFG'), (5, '123456789ABCDEFGHIJKLMNOP')]:
+            geometry = Geometry(box_size, diagonal=False)
+            size = box_size * box_size
+            self.assertEqual(geometry.symbols, symbols)
+            self.assertEqual(len(geometry.units), 3 * size)
+            self.assertTrue(all(len(peers) == 3 * (size - 1) - 2 * (box_size - 1) for peers in geometry.peers))
+            self.assertEqual(geometry.popcount[geometry.all_digits], size)
+
+    def test_solve_large(self):
+        rng = random.Random(0)
+        for box_size in (4, 5):
+            geometry = Geometry(box_size, diagonal=False)
+            grid = pattern_grid(geometry, 0.6, rng)
+            cells = bitboard.search(geometry.parse(grid), geometry)
+            self.assertTrue(is_solution(geometry.to_dict(cells), grid, geometry))
+            self.assertEqual(bitboard.solve(geometry.to_grid(cells), geometry), geometry.to_dict(cells))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+"""
+Bounded cache of the results of propagation (bitboard.reduce_puzzle) for the bitmask search.
+
+Searches often reach candidate configurations that were already propagated: uniqueness checks of puzzles which only
+differ by a clue (see generator.py), a solve followed by a count of the solutions, or batches with repeated puzzles.
+The cache maps the candidate masks of a sudoku, packed into a compact byte string prefixed by the shape of its geometry,
+to the result of its propagation (also packed, or None for a contradiction), so that repeated sub-states are resolved by
+a lookup. A cache can be shared by sudokus of different geometries: the 9x9 diagonal and plain sudokus, whose masks pack
+the same way, have different keys.
+
+Its memory is capped: when the packed keys and results exceed max_bytes, the least recently used entries are evicted.
+Hits, misses and evictions are counted.
+
+Example:
+    cache = PropagationCache()
+    for grid in grids:
+        bitboard.count_solutions(grid, limit=2, cache=cache)
+    print(cache.hit_rate())
+"""
+from array import array
+from collections import OrderedDict
+
+import bitboard
+
+ENTRY_OVERHEAD = 150  # approximate bytes of the bytes objects and of the dictionary slot of an entry, besides the data
+
+
+class PropagationCache(object):
+    """Least recently used cache of the results of reduce_puzzle, keyed by the geometry and the packed candidate masks."""
+
+    def __init__(self, max_bytes=64 * 2 ** 20):
+        """
+        Input: The maximal memory used by the entries, in bytes (approximately).
+        """
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.
+
+    @staticmethod
+    def typecode(geometry):
+        return 'H' if geometry.size <= 16 else 'L'
+
+    def reduce(self, cells, geometry=bitboard.CLASSIC):
+        """
+        Propagate the constraints of a sudoku, or look the result up if the same candidates were already propagated.
+        Input: A sudoku in bitmask form (modified in place on a miss only: use the result).
+        Output: The resulting sudoku in bitmask form, or False if a box has no candidate left.
+        """
+        typecode = self.typecode(geometry)
+        key = bytes((geometry.box_size, geometry.diagonal)) + array(typecode, cells).tobytes()
+        if key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            result = self.entries[key]
+            return array(typecode, result).tolist() if result is not None else False
+
+        self.misses += 1
+        cells = bitboard.reduce_puzzle(cells, geometry)
+        result = array(typecode, cells).tobytes() if cells else None
+        self.entries[key] = result
+        self.bytes += len(key) + (len(result) if result is not None else 0) + ENTRY_OVERHEAD
+        while self.bytes > self.max_bytes and self.entries:
+            old_key, old_result = self.entries.popitem(last=False)
+            self.bytes -= len(old_key) + (len(old_result) if old_result is not None else 0) + ENTRY_OVERHEAD
+            self.evictions += 1
+        return cells
@@ -0,0 +1,46 @@
+import unittest
+
+import bitboard
+from fixtures import contradiction, hard_grids
+from geometry import get_geometry
+from propagation_cache import PropagationCache
+
+
+class TestPropagationCache(unittest.TestCase):
+
+    def test_repeated_search(self):
+        cache = PropagationCache()
+        for grid in hard_grids:
+            first = bitboard.search(bitboard.parse(grid), cache=cache)
+            misses = cache.misses
+            self.assertEqual(bitboard.search(bitboard.parse(grid), cache=cache), first)
+            self.assertEqual(cache.misses, misses)
+            self.assertEqual(bitboard.count_solutions(grid, limit=2, cache=cache), 1)
+        self.assertGreater(cache.hit_rate(), .3)
+
+    def test_contradiction(self):
+        cache = PropagationCache()
+        cells = bitboard.parse(contradiction)
+        self.assertFalse(cache.reduce(cells[:]))
+        self.assertFalse(cache.reduce(cells[:]))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_geometries(self):
+        cache = PropagationCache()
+        plain = get_geometry(3, diagonal=False)
+        # A diagonal holding 1 to 8: its last box is 9 for the diagonal sudoku only
+        grid = ''.join('12345678.'[r] if r == c else '.' for r in range(9) for c in range(9))
+        self.assertGreater(plain.popcount[cache.reduce(plain.parse(grid), plain)[80]], 1)
+        self.assertEqual(cache.reduce(bitboard.parse(grid))[80], bitboard.CLASSIC.digit_masks['9'])
+        self.assertEqual(cache.misses, 2)
+
+    def test_memory_cap(self):
+        cache = PropagationCache(max_bytes=20000)
+        for grid in hard_grids[:5]:
+            self.assertEqual(bitboard.count_solutions(grid, limit=2, cache=cache), 1)
+        self.assertLessEqual(cache.bytes, cache.max_bytes)
+        self.assertGreater(cache.evictions, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
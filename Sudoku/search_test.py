@@ -0,0 +1,114 @@
+import unittest
+
+import solution
+from batch import is_grid
+from benchmark import load_puzzles
+from fixtures import broken_diagonal, contradiction, engines, hard_grids, is_solution, solved_grid, sparse_grid
+from solution_test import TestDiagonalSudoku
+
+
+class TestSearch(unittest.TestCase):
+
+    def test_branching(self):
+        self.assertTrue(is_solution(solution.solve(sparse_grid), sparse_grid))
+
+    def test_backtracking(self):
+        sudoku = solution.grid_values(contradiction)
+        before = sudoku.copy()
+        self.assertFalse(solution.search(sudoku))
+        self.assertEqual(sudoku, before)
+
+    def test_empty_boxes(self):
+        # Every engine reads '0' as an empty box, like '.'
+        zero_grid = TestDiagonalSudoku.diagonal_grid.replace('.', '0')
+        self.assertTrue(is_grid(zero_grid))
+        for engine in engines:
+            self.assertEqual(solution.solve(zero_grid, engine=engine), TestDiagonalSudoku.solved_diag_sudoku)
+            self.assertEqual(solution.count_solutions(zero_grid, engine=engine), 1)
+
+
+def sweep_reduce_puzzle(sudoku):
+    """The propagation by sweeps of the whole board: eliminate(), naked_twins() and only_choice() until stalled."""
+    before = None
+    while sudoku != before:
+        before = sudoku.copy()
+        solution.only_choice(solution.naked_twins(solution.eliminate(sudoku)))
+        if any(len(sudoku[box]) == 0 for box in solution.boxes):
+            return False
+    return sudoku
+
+
+class TestReducePuzzle(unittest.TestCase):
+
+    def test_sweeps(self):
+        for grid in load_puzzles('easy') + load_puzzles('hard') + [TestDiagonalSudoku.diagonal_grid, sparse_grid]:
+            self.assertEqual(solution.reduce_puzzle(solution.grid_values(grid)),
+                             sweep_reduce_puzzle(solution.grid_values(grid)))
+
+    def test_digit_without_box(self):
+        # No box of row A can hold 9, while every box still has values
+        sudoku = solution.grid_values('.' * 81)
+        for box in solution.row_units[0]:
+            sudoku[box] = '12345678'
+        self.assertFalse(solution.reduce_puzzle(sudoku))
+
+
+class TestCountSolutions(unittest.TestCase):
+
+    def test_unique(self):
+        for engine in engines:
+            for grid in [TestDiagonalSudoku.diagonal_grid, solved_grid] + hard_grids:
+                self.assertTrue(is_solution(solution.solve(grid, engine=engine), grid))
+                self.assertEqual(solution.count_solutions(grid, engine=engine), 1)
+
+    def test_no_solution(self):
+        for engine in engines:
+            for grid in (contradiction, broken_diagonal):
+                self.assertFalse(solution.solve(grid, engine=engine))
+                self.assertEqual(solution.count_solutions(grid, engine=engine), 0)
+
+    def test_limit(self):
+        # The solved grid with the four boxes of a digit rectangle emptied has exactly two solutions
+        grid = solution.solve(TestDiagonalSudoku.diagonal_grid)
+        rectangle = None
+        for box1 in solution.boxes:
+            for box2 in solution.boxes:
+                box3, box4 = box1[0] + box2[1], box2[0] + box1[1]
+                if len({box1, box2, box3, box4}) == 4 and grid[box1] == grid[box2] and grid[box3] == grid[box4] and \
+                        not any(box in unit for unit in solution.diagonal_units for box in (box1, box2, box3, box4)) \
+                        and sum(any(box in unit for box in (box1, box2, box3, box4))
+                                for unit in solution.square_units) == 2:
+                    rectangle = {box1, box2, box3, box4}
+                    break
+            if rectangle:
+                break
+        two_solutions = ''.join('.' if box in rectangle else grid[box] for box in solution.boxes)
+        for engine in engines:
+            self.assertEqual(solution.count_solutions(two_solutions, limit=None, engine=engine), 2)
+            self.assertEqual(solution.count_solutions(two_solutions, limit=1, engine=engine), 1)
+        for engine in engines:
+            self.assertEqual(solution.count_solutions('.' * 81, limit=10, engine=engine), 10)
+
+
+class TestAssignmentLog(unittest.TestCase):
+
+    def test_replay(self):
+        for max_length in (100000, 10):
+            log = solution.AssignmentLog(max_length)
+            sudoku = solution.solve(sparse_grid, log=log)
+            self.assertLessEqual(len(log), max_length)
+            for board, box, strategy in log.replay():
+                self.assertIn(strategy, ('eliminate', 'naked_twins', 'only_choice', 'search', 'backtrack'))
+            self.assertEqual(board, sudoku)
+
+    def test_opt_in(self):
+        log = solution.AssignmentLog()
+        solution.solve(sparse_grid, log=log)
+        nb_deltas = len(log)
+        solution.solve(sparse_grid)
+        self.assertEqual(len(log), nb_deltas)
+        self.assertIsNone(solution.current_log)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,16 +1,96 @@
+from collections import deque
+from contextlib import contextmanager
+from importlib import import_module
 from itertools import combinations
 
-assignments = []
+from geometry import CLASSIC, EMPTY
 
+# Alternative engines, as the name of the module implementing them with a solve(grid) function
+ENGINES = {'bitmask': 'bitboard', 'cdcl': 'cdcl', 'dlx': 'dlx'}
 
-def assign_value(sudoku, box, value):
+
+class AssignmentLog(object):
+    """
+    Record of the values assigned to the boxes during a solve, as (box, value, strategy) deltas from the board the
+    solve started from. Only the last max_length deltas are kept: older ones are folded into the base board, so that
+    replaying the log stays exact while its memory is bounded.
+    """
+
+    def __init__(self, max_length=100000):
+        self.base = {}
+        self.deltas = deque(maxlen=max_length)
+
+    def __len__(self):
+        return len(self.deltas)
+
+    def start(self, sudoku):
+        """Start recording the assignments made from a board."""
+        self.base = sudoku.copy()
+        self.deltas.clear()
+
+    def record(self, box, value, strategy=None):
+        """Record the value assigned to a box, and the strategy which assigned it."""
+        if len(self.deltas) == self.deltas.maxlen:
+            oldest_box, oldest_value, _ = self.deltas[0]
+            self.base[oldest_box] = oldest_value
+        self.deltas.append((box, value, strategy))
+
+    def replay(self):
+        """
+        Replay the deltas on a copy of the base board.
+        Output: An iterator over the (board, box, strategy) of each change, the board being the same dictionary, updated
+                in place.
+        """
+        sudoku = self.base.copy()
+        for box, value, strategy in self.deltas:
+            if sudoku[box] != value:
+                sudoku[box] = value
+                yield sudoku, box, strategy
+
+
+# Log of the solve in progress, if its assignments are recorded (see recording)
+current_log = None
+
+
+@contextmanager
+def recording(log):
+    """
+    Record the assignments made in the context into a log, or none of them if the log is None.
+    """
+    global current_log
+    previous_log, current_log = current_log, log
+    try:
+        yield log
+    finally:
+        current_log = previous_log
+
+
+def assign_value(sudoku, box, value, trail=None, strategy=None):
     """
     Please use this function to update your values dictionary!
-    Assigns a value to a given box. If it updates the board record it.
+    Assigns a value to a given box. If it updates the board record it (when recording), with the name of the
+    strategy which assigned it.
+    If a trail (list) is given, the previous value of the box is appended to it, so that the change can be undone.
     """
+    if trail is not None:
+        trail.append((box, sudoku[box]))
     sudoku[box] = value
-    if len(value) == 1:
-        assignments.append(sudoku.copy())
+    if len(value) == 1 and current_log is not None:
+        current_log.record(box, value, strategy)
+    return sudoku
+
+
+def undo(sudoku, trail, mark):
+    """
+    Undo the changes recorded in a trail, from the most recent one, until its length is back to mark.
+    Input: A sudoku in dictionary form, its trail, and the length of the trail to go back to.
+    Output: The sudoku in dictionary form.
+    """
+    while len(trail) > mark:
+        box, value = trail.pop()
+        sudoku[box] = value
+        if current_log is not None:
+            current_log.record(box, value, 'backtrack')
     return sudoku
 
 
@@ -23,15 +103,14 @@ def cross(a, b):
     return [s + t for s in a for t in b]
 
 
-boxes = cross(rows, cols)
+# The tables of the boxes, units and peers are derived from the index tables of the shared 9x9 diagonal geometry
+boxes = CLASSIC.boxes
 
-row_units = [cross(r, cols) for r in rows]
-column_units = [cross(rows, c) for c in cols]
-square_units = [cross(rs, cs) for rs in ('ABC', 'DEF', 'GHI') for cs in ('123', '456', '789')]
-diagonal_units = [[s + t for s, t in zip(rows, cols)], [s + t for s, t in zip(rows, reversed(cols))]]
-unit_list = row_units + column_units + square_units + diagonal_units
-units = dict((s, [u for u in unit_list if s in u]) for s in boxes)
-peers = dict((s, set(sum(units[s], [])) - {s}) for s in boxes)
+unit_list = [[boxes[i] for i in unit] for unit in CLASSIC.units]
+row_units, column_units, square_units, diagonal_units = unit_list[:9], unit_list[9:18], unit_list[18:27], unit_list[27:]
+units = dict((s, [unit_list[u] for u in CLASSIC.box_units[i]]) for i, s in enumerate(boxes))
+peers = dict((s, set(boxes[peer] for peer in CLASSIC.peers[i])) for i, s in enumerate(boxes))
+box_unit_indices = dict((s, list(CLASSIC.box_units[i])) for i, s in enumerate(boxes))
 
 
 def display(sudoku):
@@ -52,13 +131,13 @@ def display(sudoku):
 def grid_values(grid):
     """
     Convert grid into a dict of {square: char} with '123456789' for empties.
-    Input: A grid in string form.
+    Input: A grid in string form, '.' or '0' marking the empty boxes.
     Output: A grid in dictionary form
             Keys: The boxes, e.g., 'A1'
             Values: The value in each box, e.g., '8'. If the box has no value, then the value will be '123456789'.
     """
     assert (len(grid) == 81)
-    return dict(zip(boxes, ['123456789' if v == '.' else v for v in grid]))
+    return dict(zip(boxes, ['123456789' if v in EMPTY else v for v in grid]))
 
 
 def eliminate(sudoku):
@@ -70,7 +149,7 @@ def eliminate(sudoku):
     """
     for solved_box in [box for box in sudoku.keys() if len(sudoku[box]) == 1]:
         for peer in peers[solved_box]:
-            assign_value(sudoku, peer, sudoku[peer].replace(sudoku[solved_box], ''))
+            assign_value(sudoku, peer, sudoku[peer].replace(sudoku[solved_box], ''), strategy='eliminate')
 
     return sudoku
 
@@ -92,7 +171,8 @@ def naked_twins(sudoku):
         for box1, box2 in twin_boxes:
             digit1, digit2 = sudoku[box1]
             for peer in set(unit) - {box1, box2}:
-                assign_value(sudoku, peer, sudoku[peer].replace(digit1, '').replace(digit2, ''))
+                assign_value(sudoku, peer, sudoku[peer].replace(digit1, '').replace(digit2, ''),
+                             strategy='naked_twins')
 
     return sudoku
 
@@ -108,31 +188,62 @@ def only_choice(sudoku):
         for digit in digits:
             candidates = [box for box in unit if digit in sudoku[box]]
             if len(candidates) == 1:
-                assign_value(sudoku, candidates[0], digit)
+                assign_value(sudoku, candidates[0], digit, strategy='only_choice')
 
     return sudoku
 
 
-def reduce_puzzle(sudoku):
+def reduce_puzzle(sudoku, trail=None):
     """
-    Iterate eliminate() and only_choice(). If at some point, there is a box with no available values, return False.
-    If the sudoku is solved, return the sudoku.
-    If after an iteration of both functions, the sudoku remains the same, return the sudoku.
-    Input: A sudoku in dictionary form.
+    Propagate the constraints of eliminate(), naked_twins() and only_choice() until nothing changes, driven by a
+    worklist: the values of newly solved boxes are eliminated from their peers only, and only the units containing a
+    box whose values changed are checked again for naked twins and only choices.
+    If at some point, there is a box with no available values, or a digit that fits nowhere in a unit, return False.
+    Input: A sudoku in dictionary form, and optionally a trail recording the changes (see assign_value).
     Output: The resulting sudoku in dictionary form.
     """
-    stalled = False
-    while not stalled:
-        solved_values_before = len([box for box, values in sudoku.items() if len(values) == 1])
-        sudoku = eliminate(sudoku)
-        sudoku = naked_twins(sudoku)
-        sudoku = only_choice(sudoku)
-        solved_values_after = len([box for box in sudoku.keys() if len(sudoku[box]) == 1])
-        # If no new values were added, stop the loop.
-        stalled = (solved_values_before == solved_values_after)
-        # Sanity check, return False if there is a box with zero available values:
-        if len([box for box in sudoku.keys() if len(sudoku[box]) == 0]):
-            return False
+    solved_boxes = deque(box for box in boxes if len(sudoku[box]) == 1)
+    dirty_units = set(range(len(unit_list)))
+
+    def update(box, value, strategy):
+        """Narrow the values of a box, and schedule the propagation of the change. Return False if none is left."""
+        if value == sudoku[box]:
+            return True
+        assign_value(sudoku, box, value, trail, strategy)
+        if len(value) == 1:
+            solved_boxes.append(box)
+        dirty_units.update(box_unit_indices[box])
+        return len(value) > 0
+
+    while solved_boxes or dirty_units:
+        # Eliminate the value of a solved box from its peers
+        if solved_boxes:
+            box = solved_boxes.popleft()
+            digit = sudoku[box]
+            for peer in peers[box]:
+                if digit in sudoku[peer] and not update(peer, sudoku[peer].replace(digit, ''), 'eliminate'):
+                    return False
+            continue
+
+        unit = unit_list[dirty_units.pop()]
+
+        # Naked twins
+        bivalent_boxes = [box for box in unit if len(sudoku[box]) == 2]
+        for box1, box2 in combinations(bivalent_boxes, 2):
+            if sudoku[box1] == sudoku[box2] and len(sudoku[box1]) == 2:
+                digit1, digit2 = sudoku[box1]
+                for peer in unit:
+                    if peer != box1 and peer != box2 and \
+                            not update(peer, sudoku[peer].replace(digit1, '').replace(digit2, ''), 'naked_twins'):
+                        return False
+
+        # Only choice
+        for digit in digits:
+            candidates = [box for box in unit if digit in sudoku[box]]
+            if not candidates:
+                return False
+            if len(candidates) == 1 and not update(candidates[0], digit, 'only_choice'):
+                return False
 
     return sudoku
 
@@ -140,48 +251,92 @@ def reduce_puzzle(sudoku):
 def search(sudoku):
     """
     Using depth-first search and propagation, create a search tree and solve the sudoku.
+    The sudoku is modified in place: the changes made in a branch are recorded in a trail, and undone when
+    backtracking, instead of copying the sudoku for each branch.
     Input: A sudoku in dictionary form.
     Output: The resulting sudoku in dictionary form, or False if there is not solution
     """
-    sudoku = reduce_puzzle(sudoku)
-    if not sudoku:  # No solution
-        return False
+    trail = []
+    for _ in search_solutions(sudoku, trail):
+        return sudoku
+    undo(sudoku, trail, 0)
+    return False
+
+
+def search_solutions(sudoku, trail):
+    """
+    Propagate the constraints and search the subtree of the current branch for all its solutions.
+    Input: A sudoku in dictionary form, and the trail of the changes made since the beginning of the search.
+    Output: An iterator over the solutions, each being the sudoku itself while it is solved (to be copied if kept).
+            The search resumes from it when the next solution is requested.
+    """
+    if not reduce_puzzle(sudoku, trail):  # No solution
+        return
 
     unfilled_boxes = [box for box in boxes if len(sudoku[box]) > 1]
     if len(unfilled_boxes) == 0:  # Solved
-        return sudoku
+        yield sudoku
+        return
 
     # Choose one of the unfilled boxes with the fewest possibilities
-    _, chosen_box = min(len(sudoku[unfilled_box]) for unfilled_box in unfilled_boxes)
+    chosen_box = min(unfilled_boxes, key=lambda box: len(sudoku[box]))
 
-    # Now use recursion to solve each one of the resulting sudokus, and if one returns a value (not False),
-    # return that answer!
+    # Try each digit in turn, undoing the changes of the branch once it is explored
     for digit in sudoku[chosen_box]:
-        new_sudoku = sudoku.copy()
-        assign_value(new_sudoku, chosen_box, digit)
-        solution = search(new_sudoku)
-        if solution:
-            return solution
+        mark = len(trail)
+        assign_value(sudoku, chosen_box, digit, trail, 'search')
+        yield from search_solutions(sudoku, trail)
+        undo(sudoku, trail, mark)
+
+
+def count_solutions(grid, limit=2, engine='propagation'):
+    """
+    Count the solutions of a grid, stopping the search as soon as limit of them are found: with the default limit,
+    checking that a puzzle has a unique solution costs about two solves rather than a full enumeration.
+    Args:
+        grid(string): a string representing a sudoku grid.
+        limit(int): the maximal number of solutions to count, or None to count all of them.
+        engine(string): 'propagation' for the dictionary engine of this module, or the name of one of the ENGINES
+    Returns:
+        The number of solutions, at most limit.
+    """
+    if engine != 'propagation':
+        return import_module(ENGINES[engine]).count_solutions(grid, limit)
+    count = 0
+    for _ in search_solutions(grid_values(grid), []):
+        count += 1
+        if count == limit:
+            break
+    return count
 
 
-def solve(grid):
+def solve(grid, engine='propagation', log=None):
     """
     Find the solution to a Sudoku grid.
     Args:
         grid(string): a string representing a sudoku grid.
             Example: '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
+        engine(string): 'propagation' for the dictionary engine of this module, or the name of one of the ENGINES
+        log(AssignmentLog): if given, the assignments of the propagation engine are recorded into it
     Returns:
         The dictionary representation of the final sudoku grid. False if no solution exists.
     """
-    return search(grid_values(grid))
+    if engine == 'propagation':
+        sudoku = grid_values(grid)
+        if log is not None:
+            log.start(sudoku)
+        with recording(log):
+            return search(sudoku)
+    return import_module(ENGINES[engine]).solve(grid)
 
 
 if __name__ == '__main__':
     diag_sudoku_grid = '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
-    display(solve(diag_sudoku_grid))
+    assignment_log = AssignmentLog()
+    display(solve(diag_sudoku_grid, log=assignment_log))
 
     try:
         from visualize import visualize_assignments
-        visualize_assignments(assignments)
+        visualize_assignments(assignment_log)
     except:
         print('We could not visualize your board due to a pygame issue. Not a problem! It is not a requirement.')
@@ -0,0 +1,185 @@
+"""
+Streaming trace of a solve of the propagation engine, and headless exporters of traces to JSON or animated images.
+
+A trace is written while solving, event by event, in JSON lines:
+- a header {"format": "sudoku-trace", "version": 1, "start": {box: values}} with the board the solve started from
+- one [box, value, strategy] event per assignment, in order, the strategy being 'eliminate', 'naked_twins',
+  'only_choice', 'search', or 'backtrack' for the values restored when the search backtracks
+Neither writing nor exporting a trace keeps full-board snapshots: readers apply the events to a single board.
+
+The JSON exporter needs nothing but the standard library. The animated image exporter needs Pillow, which is optional.
+
+Example:
+    python solve_trace.py record '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3' \\
+        trace.jsonl
+    python solve_trace.py export trace.jsonl trace.json
+    python solve_trace.py export trace.jsonl trace.gif --every 5
+"""
+import argparse
+import json
+
+from solution import rows, cols, solve
+
+FORMAT = 'sudoku-trace'
+VERSION = 1
+
+# Colors of the boxes just assigned, by strategy
+STRATEGY_COLORS = {
+    'eliminate': (200, 230, 255),
+    'naked_twins': (255, 220, 160),
+    'only_choice': (200, 255, 200),
+    'search': (255, 255, 150),
+    'backtrack': (255, 190, 190),
+}
+
+
+class TraceWriter(object):
+    """
+    Log of the assignments of a solve (see solution.recording) writing them to a text stream as they are made.
+    """
+
+    def __init__(self, file):
+        self.file = file
+        self.events = 0
+
+    def __len__(self):
+        return self.events
+
+    def start(self, sudoku):
+        """Write the header of the trace of a solve starting from a board."""
+        self.file.write(json.dumps({'format': FORMAT, 'version': VERSION, 'start': sudoku}) + '\n')
+        self.events = 0
+
+    def record(self, box, value, strategy=None):
+        self.file.write(json.dumps([box, value, strategy]) + '\n')
+        self.events += 1
+
+
+def read_trace(file):
+    """
+    Input: A text stream of a trace.
+    Output: The board the solve started from, and an iterator over the (box, value, strategy) events, read from the
+            stream as they are consumed.
+    """
+    header = json.loads(file.readline())
+    if header.get('format') != FORMAT or header.get('version') != VERSION:
+        raise ValueError('Not a version {} {} file'.format(VERSION, FORMAT))
+    events = (tuple(json.loads(line)) for line in file if line.strip())
+    return header['start'], events
+
+
+def replay(file):
+    """
+    Replay a trace on the board it started from.
+    Input: A text stream of a trace.
+    Output: An iterator over the (board, box, strategy) of each change, the board being the same dictionary, updated in
+            place.
+    """
+    sudoku, events = read_trace(file)
+    for box, value, strategy in events:
+        if sudoku[box] != value:
+            sudoku[box] = value
+            yield sudoku, box, strategy
+
+
+def export_json(file, output):
+    """
+    Export a trace as a single JSON document {"format", "version", "start", "events"}, written event by event.
+    Input: A text stream of a trace, and the output text stream.
+    Output: The number of events.
+    """
+    start, events = read_trace(file)
+    output.write('{{"format": {}, "version": {}, "start": {}, "events": ['.format(json.dumps(FORMAT), VERSION,
+                                                                                json.dumps(start)))
+    count = 0
+    for event in events:
+        output.write((', ' if count else '') + json.dumps(event))
+        count += 1
+    output.write(']}\n')
+    return count
+
+
+def render(sudoku, highlighted=None, strategy=None, cell_size=40):
+    """
+    Draw a board with Pillow: the solved boxes with their digit, and the highlighted box in the color of its strategy.
+    Output: The PIL image.
+    """
+    from PIL import Image, ImageDraw
+
+    image = Image.new('RGB', (9 * cell_size + 1, 9 * cell_size + 1), 'white')
+    draw = ImageDraw.Draw(image)
+    for r, row in enumerate(rows):
+        for c, col in enumerate(cols):
+            box = row + col
+            left, top = c * cell_size, r * cell_size
+            if box == highlighted:
+                draw.rectangle([left, top, left + cell_size, top + cell_size],
+                               fill=STRATEGY_COLORS.get(strategy, (220, 220, 220)))
+            if len(sudoku[box]) == 1:
+                draw.text((left + cell_size // 2 - 3, top + cell_size // 2 - 6), sudoku[box], fill='black')
+    for i in range(10):
+        width = 3 if i % 3 == 0 else 1
+        draw.line([(i * cell_size, 0), (i * cell_size, 9 * cell_size)], fill='black', width=width)
+        draw.line([(0, i * cell_size), (9 * cell_size, i * cell_size)], fill='black', width=width)
+    return image
+
+
+def export_image(file, path, every=1, max_frames=1000, duration=100):
+    """
+    Export a trace as an animated image (GIF, or any animated format of Pillow, from the extension of the path).
+    Only the rendered frames are kept in memory, and at most max_frames of them.
+    Input: A text stream of a trace, the path of the image, the number of changes per frame, the maximal number of
+           frames, and the duration of a frame in milliseconds.
+    Output: The number of frames.
+    """
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        raise RuntimeError('Exporting animated images requires Pillow (pip install Pillow): export to JSON instead')
+
+    frames = []
+    sudoku = None
+    for n, (sudoku, box, strategy) in enumerate(replay(file)):
+        if n % every == 0 and len(frames) < max_frames - 1:
+            frames.append(render(sudoku, box, strategy))
+    if sudoku is None:
+        file.seek(0)
+        sudoku, _ = read_trace(file)
+    frames.append(render(sudoku))  # Final board
+    frames[0].save(path, save_all=True, append_images=frames[1:], duration=duration, loop=0)
+    return len(frames)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Record and export traces of Sudoku solves.')
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+    record = commands.add_parser('record', help='solve a grid with the propagation engine and write its trace')
+    record.add_argument('grid', help='grid in string form')
+    record.add_argument('trace', help='trace file to write')
+    export = commands.add_parser('export', help='export a trace to JSON (.json) or to an animated image (.gif)')
+    export.add_argument('trace', help='trace file to read')
+    export.add_argument('output', help='file to write, whose extension sets the format')
+    export.add_argument('--every', type=int, default=1, help='number of changes per frame of an image')
+    export.add_argument('--max-frames', type=int, default=1000, help='maximal number of frames of an image')
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        with open(args.trace, 'w') as file:
+            writer = TraceWriter(file)
+            solved = solve(args.grid, log=writer)
+        print('{} events written to {}{}'.format(len(writer), args.trace, '' if solved else ' (no solution)'))
+    elif args.output.endswith('.json'):
+        with open(args.trace) as file, open(args.output, 'w') as output:
+            print('{} events exported to {}'.format(export_json(file, output), args.output))
+    else:
+        with open(args.trace) as file:
+            try:
+                frames = export_image(file, args.output, args.every, args.max_frames)
+            except RuntimeError as error:
+                parser.error(str(error))
+        print('{} frames exported to {}'.format(frames, args.output))
+
+
+if __name__ == '__main__':
+    main()
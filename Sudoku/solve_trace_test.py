@@ -0,0 +1,70 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+
+import solution
+import solve_trace
+from fixtures import sparse_grid
+
+try:
+    import PIL
+except ImportError:
+    PIL = None
+
+
+def record(grid):
+    """Output: The text of the trace of the solve of a grid, and the solution."""
+    stream = io.StringIO()
+    writer = solve_trace.TraceWriter(stream)
+    sudoku = solution.solve(grid, log=writer)
+    return stream.getvalue(), sudoku, len(writer)
+
+
+class TestSolveTrace(unittest.TestCase):
+
+    def test_replay(self):
+        text, sudoku, nb_events = record(sparse_grid)
+        start, events = solve_trace.read_trace(io.StringIO(text))
+        self.assertEqual(start, solution.grid_values(sparse_grid))
+        events = list(events)
+        self.assertEqual(len(events), nb_events)
+        self.assertTrue({strategy for _, _, strategy in events} <= set(solve_trace.STRATEGY_COLORS))
+        self.assertIn('search', {strategy for _, _, strategy in events})
+        for board, box, strategy in solve_trace.replay(io.StringIO(text)):
+            pass
+        self.assertEqual(board, sudoku)
+
+    def test_export_json(self):
+        text, sudoku, nb_events = record(sparse_grid)
+        output = io.StringIO()
+        self.assertEqual(solve_trace.export_json(io.StringIO(text), output), nb_events)
+        document = json.loads(output.getvalue())
+        board = document['start']
+        for box, value, strategy in document['events']:
+            board[box] = value
+        self.assertEqual(board, sudoku)
+
+    def test_not_a_trace(self):
+        with self.assertRaises(ValueError):
+            solve_trace.read_trace(io.StringIO('{"format": "other"}\n'))
+
+    @unittest.skipIf(PIL is None, 'Pillow is not installed')
+    def test_export_image(self):
+        text, _, _ = record(sparse_grid)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'trace.gif')
+            frames = solve_trace.export_image(io.StringIO(text), path, every=10, max_frames=20)
+            self.assertLessEqual(frames, 20)
+            self.assertTrue(os.path.getsize(path) > 0)
+
+    @unittest.skipIf(PIL is not None, 'Pillow is installed')
+    def test_export_image_without_pillow(self):
+        text, _, _ = record(sparse_grid)
+        with self.assertRaises(RuntimeError):
+            solve_trace.export_image(io.StringIO(text), 'trace.gif')
+
+
+if __name__ == '__main__':
+    unittest.main()
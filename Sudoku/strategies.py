@@ -0,0 +1,207 @@
+"""
+Pipeline of propagation strategies on sudokus in bitmask form (see bitboard.py), for any geometry.
+
+Besides the strategies of bitboard.py (eliminate, only_choice, naked_twins), this module implements
+- naked_triples: three boxes of a unit whose candidates are among the same three digits
+- hidden_pairs / hidden_triples: two (three) digits that only fit in the same two (three) boxes of a unit
+- pointing_pairs: the candidates of a digit in a square all lie on the same line (row, column or diagonal)
+- box_line: the candidates of a digit on a line all lie in the same square
+the latter two removing the digit from the rest of the line (square).
+
+A Pipeline applies its strategies in order, cheapest first: a strategy is only tried when all the previous ones are
+stalled, and the pipeline starts over from the first one whenever a strategy removes a candidate. It counts the
+calls, the removed candidates and the time of each strategy, so that the strategies which do not pay for themselves
+can be left out.
+"""
+from collections import OrderedDict
+from functools import lru_cache
+from itertools import combinations
+from timeit import default_timer
+
+import bitboard
+from bitboard import CLASSIC
+
+
+def naked_subsets(cells, geometry, size):
+    """
+    Eliminate the candidates of size boxes of a unit whose candidates are among size digits from the other boxes of
+    the unit.
+    """
+    popcount = geometry.popcount
+    for unit in geometry.units:
+        small = [i for i in unit if 1 < popcount[cells[i]] <= size]
+        for subset in combinations(small, size):
+            mask = 0
+            for i in subset:
+                mask |= cells[i]
+            if popcount[mask] == size:
+                for peer in unit:
+                    if peer not in subset:
+                        cells[peer] &= ~mask
+    return cells
+
+
+def hidden_subsets(cells, geometry, size):
+    """
+    Restrict the candidates of the boxes of a unit in which size digits only fit to these digits.
+    """
+    popcount = geometry.popcount
+    for unit in geometry.units:
+        # The boxes of the unit (as a mask of their positions in it) where each digit fits
+        places = {}
+        for position, i in enumerate(unit):
+            mask = cells[i]
+            while mask:
+                digit = mask & -mask
+                mask ^= digit
+                places[digit] = places.get(digit, 0) | 1 << position
+        digits = [digit for digit, positions in places.items() if 1 < popcount[positions] <= size]
+        for subset in combinations(digits, size):
+            positions, digits_mask = 0, 0
+            for digit in subset:
+                positions |= places[digit]
+                digits_mask |= digit
+            if popcount[positions] == size:
+                for position, i in enumerate(unit):
+                    if positions >> position & 1:
+                        cells[i] &= digits_mask
+    return cells
+
+
+@lru_cache(maxsize=None)
+def intersections(geometry):
+    """
+    Input: A geometry.
+    Output: The lists of the (square, rest of the line) and (line, rest of the square) pairs of box indices of every
+            square and line (row, column or diagonal) sharing at least two boxes.
+    """
+    square_units = [set(unit) for unit in geometry.units[2 * geometry.size:3 * geometry.size]]
+    line_units = [set(unit) for unit in geometry.units[:2 * geometry.size] + geometry.units[3 * geometry.size:]]
+    pointing, claiming = [], []
+    for square in square_units:
+        for line in line_units:
+            if len(square & line) > 1:
+                pointing.append((tuple(square - line), tuple(line - square)))
+                claiming.append((tuple(line - square), tuple(square - line)))
+    return pointing, claiming
+
+
+def locked_candidates(cells, pairs):
+    """
+    For each pair (outside, rest) of the boxes of a unit outside its intersection with another unit, and of the rest
+    of the other unit: eliminate from the rest the digits of the intersection that do not fit outside of it.
+    """
+    for outside, rest in pairs:
+        # The digits of the unit found outside of the intersection: the others are locked in it
+        outside_digits = 0
+        for i in outside:
+            outside_digits |= cells[i]
+        for i in rest:
+            cells[i] &= outside_digits
+    return cells
+
+
+def naked_triples(cells, geometry=CLASSIC):
+    return naked_subsets(cells, geometry, 3)
+
+
+def hidden_pairs(cells, geometry=CLASSIC):
+    return hidden_subsets(cells, geometry, 2)
+
+
+def hidden_triples(cells, geometry=CLASSIC):
+    return hidden_subsets(cells, geometry, 3)
+
+
+def pointing_pairs(cells, geometry=CLASSIC):
+    return locked_candidates(cells, intersections(geometry)[0])
+
+
+def box_line(cells, geometry=CLASSIC):
+    return locked_candidates(cells, intersections(geometry)[1])
+
+
+# Every strategy, in increasing order of cost
+STRATEGIES = OrderedDict([
+    ('eliminate', bitboard.eliminate),
+    ('only_choice', bitboard.only_choice),
+    ('naked_twins', bitboard.naked_twins),
+    ('pointing_pairs', pointing_pairs),
+    ('box_line', box_line),
+    ('hidden_pairs', hidden_pairs),
+    ('naked_triples', naked_triples),
+    ('hidden_triples', hidden_triples),
+])
+BASIC = ['eliminate', 'only_choice', 'naked_twins']
+
+
+class StrategyStats(object):
+    """Counters of a strategy: calls, candidates removed, and time spent in seconds."""
+
+    def __init__(self):
+        self.calls = 0
+        self.eliminated = 0
+        self.seconds = 0.
+
+
+class Pipeline(object):
+    """Propagation by a list of strategies, and depth-first search on top of it."""
+
+    def __init__(self, names=None, geometry=CLASSIC):
+        """
+        Input: The names of the strategies of STRATEGIES to apply, in order (all of them by default), and the geometry.
+        """
+        self.names = list(STRATEGIES) if names is None else list(names)
+        self.strategies = [STRATEGIES[name] for name in self.names]
+        self.geometry = geometry
+        self.stats = OrderedDict((name, StrategyStats()) for name in self.names)
+        self.nodes = 0
+
+    def count_candidates(self, cells):
+        popcount = self.geometry.popcount
+        return sum(popcount[mask] for mask in cells)
+
+    def reduce(self, cells):
+        """
+        Apply the strategies until none of them removes a candidate.
+        Input: A sudoku in bitmask form, modified in place.
+        Output: The resulting sudoku in bitmask form, or False if a box has no candidate left.
+        """
+        stats = list(self.stats.values())
+        candidates = self.count_candidates(cells)
+        k = 0
+        while k < len(self.strategies):
+            start = default_timer()
+            self.strategies[k](cells, self.geometry)
+            remaining = self.count_candidates(cells)
+            stats[k].seconds += default_timer() - start
+            stats[k].calls += 1
+            stats[k].eliminated += candidates - remaining
+            if 0 in cells:
+                return False
+            if remaining < candidates:
+                candidates, k = remaining, 0
+            else:
+                k += 1
+        return cells
+
+    def search(self, cells):
+        """
+        Using depth-first search and the propagation of the pipeline, solve the sudoku.
+        Input: A sudoku in bitmask form.
+        Output: The solved sudoku in bitmask form, or False if there is no solution.
+        """
+        def reduce(cells, geometry):
+            self.nodes += 1
+            return self.reduce(cells)
+
+        return bitboard.search(cells, self.geometry, reduce=reduce)
+
+    def solve(self, grid):
+        """
+        Find the solution to a Sudoku grid with the strategies of the pipeline.
+        Input: A grid in string form.
+        Output: The dictionary representation of the final sudoku grid, or False if no solution exists.
+        """
+        cells = self.search(bitboard.parse(grid, self.geometry))
+        return bitboard.to_dict(cells, self.geometry) if cells else False
@@ -0,0 +1,69 @@
+import unittest
+
+import bitboard
+import strategies
+from fixtures import hard_grids, is_solution
+
+
+def cells_without(digit, boxes):
+    """Output: A sudoku in bitmask form with every candidate, except digit in the given boxes."""
+    cells = [bitboard.ALL_DIGITS] * 81
+    for box in boxes:
+        cells[bitboard.INDEX[box]] &= ~bitboard.DIGIT_MASKS[digit]
+    return cells
+
+
+class TestStrategies(unittest.TestCase):
+
+    def test_pointing_pairs(self):
+        # In the top left square, 1 only fits in row A
+        cells = strategies.pointing_pairs(cells_without('1', ['B1', 'B2', 'B3', 'C1', 'C2', 'C3']))
+        for box in ['A4', 'A5', 'A9']:
+            self.assertNotIn('1', bitboard.CANDIDATES[cells[bitboard.INDEX[box]]])
+        self.assertIn('1', bitboard.CANDIDATES[cells[bitboard.INDEX['A1']]])
+        self.assertIn('1', bitboard.CANDIDATES[cells[bitboard.INDEX['D1']]])
+
+    def test_box_line(self):
+        # In row E, 1 only fits in the middle square
+        cells = strategies.box_line(cells_without('1', ['E1', 'E2', 'E3', 'E7', 'E8', 'E9']))
+        for box in ['D4', 'F6']:
+            self.assertNotIn('1', bitboard.CANDIDATES[cells[bitboard.INDEX[box]]])
+        self.assertIn('1', bitboard.CANDIDATES[cells[bitboard.INDEX['E5']]])
+
+    def test_hidden_pairs(self):
+        # In row A, 1 and 2 only fit in A1 and A2
+        cells = cells_without('1', ['A3', 'A4', 'A5', 'A6', 'A7', 'A8', 'A9'])
+        cells = [mask & ~bitboard.DIGIT_MASKS['2'] if 2 <= i < 9 else mask for i, mask in enumerate(cells)]
+        cells = strategies.hidden_pairs(cells)
+        self.assertEqual(bitboard.CANDIDATES[cells[bitboard.INDEX['A1']]], '12')
+        self.assertEqual(bitboard.CANDIDATES[cells[bitboard.INDEX['A2']]], '12')
+
+    def test_naked_triples(self):
+        cells = [bitboard.ALL_DIGITS] * 81
+        for box, candidates in [('A1', '12'), ('A2', '23'), ('A3', '13')]:
+            cells[bitboard.INDEX[box]] = sum(bitboard.DIGIT_MASKS[digit] for digit in candidates)
+        cells = strategies.naked_triples(cells)
+        self.assertEqual(bitboard.CANDIDATES[cells[bitboard.INDEX['A9']]], '456789')
+        self.assertEqual(bitboard.CANDIDATES[cells[bitboard.INDEX['B2']]], '456789')
+        self.assertEqual(bitboard.CANDIDATES[cells[bitboard.INDEX['D1']]], bitboard.CANDIDATES[bitboard.ALL_DIGITS])
+
+    def test_pipeline(self):
+        basic, advanced = strategies.Pipeline(strategies.BASIC), strategies.Pipeline()
+        for grid in hard_grids:
+            self.assertTrue(is_solution(basic.solve(grid), grid))
+            self.assertTrue(is_solution(advanced.solve(grid), grid))
+        self.assertLess(advanced.nodes, basic.nodes)
+        self.assertTrue(all(stats.calls > 0 for stats in advanced.stats.values()))
+        self.assertGreater(advanced.stats['box_line'].eliminated, 0)
+
+    def test_counters(self):
+        pipeline = strategies.Pipeline()
+        cells = bitboard.parse(hard_grids[0])
+        before = sum(bitboard.POPCOUNT[mask] for mask in cells)
+        cells = pipeline.reduce(cells)
+        removed = sum(stats.eliminated for stats in pipeline.stats.values())
+        self.assertEqual(removed, before - sum(bitboard.POPCOUNT[mask] for mask in cells))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+"""
+Vectorized propagation of many diagonal sudokus at once with NumPy.
+
+A batch of N sudokus is an (N, 81) uint16 array of candidate masks, in the bitmask form of bitboard.py. Elimination,
+hidden singles (only choice) and naked pairs (naked twins) are applied to all the sudokus with array operations on
+precomputed unit index matrices, until none of them changes. The sudokus that propagation alone does not
+solve are handed to the scalar search of bitboard.py.
+"""
+import numpy as np
+
+import bitboard
+
+NB_BOXES = len(bitboard.PEERS)
+BLOCK_SIZE = 1024  # number of sudokus propagated together, small enough for their arrays to stay in cache
+
+# (units, 9) matrix of the boxes of each unit
+UNIT_MATRIX = np.array(bitboard.UNITS, dtype=np.intp)
+NB_UNITS, UNIT_SIZE = UNIT_MATRIX.shape
+PAIRS = [(i, j) for i in range(UNIT_SIZE) for j in range(i + 1, UNIT_SIZE)]
+
+# (81, max units per box) matrices of the units of each box, and of the slots (unit * 9 + position in the unit) of
+# the box in them, padded with an extra unit / slot
+BOX_UNITS = [[(unit, bitboard.UNITS[unit].index(box)) for unit in bitboard.CLASSIC.box_units[box]]
+             for box in range(NB_BOXES)]
+MAX_UNITS = max(len(units) for units in BOX_UNITS)
+UNIT_INDEX_MATRIX = np.full((NB_BOXES, MAX_UNITS), NB_UNITS, dtype=np.intp)
+SLOT_MATRIX = np.full((NB_BOXES, MAX_UNITS), NB_UNITS * UNIT_SIZE, dtype=np.intp)
+for box, units in enumerate(BOX_UNITS):
+    for k, (unit, position) in enumerate(units):
+        UNIT_INDEX_MATRIX[box, k] = unit
+        SLOT_MATRIX[box, k] = unit * UNIT_SIZE + position
+
+POPCOUNT = np.array(bitboard.POPCOUNT, dtype=np.uint8)
+ALL_DIGITS = np.uint16(bitboard.ALL_DIGITS)
+# Character of the digit of each solved mask
+DIGIT_CHARS = np.frombuffer(''.join(candidates if len(candidates) == 1 else '.'
+                                    for candidates in bitboard.CANDIDATES).encode(), dtype=np.uint8)
+
+
+def parse_batch(grids):
+    """
+    Input: A list of grids in string form.
+    Output: The (N, 81) uint16 array of their candidate masks.
+    """
+    return np.array([bitboard.parse(grid) for grid in grids], dtype=np.uint16).reshape(len(grids), NB_BOXES)
+
+
+def gather_units(unit_values, fill):
+    """
+    Input: (N, units) values computed for each unit, and the value of the padding unit.
+    Output: (N, 81, max units per box) values of the units of each box.
+    """
+    padded = np.empty((len(unit_values), NB_UNITS + 1), dtype=unit_values.dtype)
+    padded[:, :NB_UNITS] = unit_values
+    padded[:, NB_UNITS] = fill
+    return padded[:, UNIT_INDEX_MATRIX]
+
+
+def scatter_and(cells, unit_masks):
+    """
+    AND each box of a batch with the masks computed for it in each of its units, in place.
+    Input: (N, 81) candidate masks, and (N, units, 9) masks to apply to the boxes of each unit.
+    """
+    padded = np.empty((len(cells), NB_UNITS * UNIT_SIZE + 1), dtype=np.uint16)
+    padded[:, :-1] = unit_masks.reshape(len(cells), -1)
+    padded[:, -1] = ALL_DIGITS
+    cells &= np.bitwise_and.reduce(padded[:, SLOT_MATRIX], axis=2)
+
+
+def propagate_step(cells):
+    """
+    Apply elimination, hidden singles and naked pairs once to a batch, in place.
+    Input: (N, 81) candidate masks.
+    Output: (N,) boolean array, True for the sudokus found to have no solution.
+    """
+    # Elimination: remove the values of the solved boxes of its units from each unsolved box
+    solved = POPCOUNT[cells] == 1
+    unit_solved = np.where(solved, cells, 0)[:, UNIT_MATRIX]
+    unit_values = np.bitwise_or.reduce(unit_solved, axis=2)
+    # Two solved boxes of a unit with the same value
+    dead = (POPCOUNT[unit_values] < solved[:, UNIT_MATRIX].sum(axis=2)).any(axis=1)
+    eliminated = np.bitwise_or.reduce(gather_units(unit_values, 0), axis=2)
+    cells &= np.where(solved, ALL_DIGITS, ~eliminated)
+
+    # Hidden singles: digits found in exactly one box of a unit
+    unit_cells = cells[:, UNIT_MATRIX]
+    once = np.zeros(unit_cells.shape[:2], dtype=np.uint16)
+    twice = np.zeros_like(once)
+    for k in range(UNIT_SIZE):
+        twice |= once & unit_cells[:, :, k]
+        once |= unit_cells[:, :, k]
+    hidden_singles = (once & ~twice)[:, :, np.newaxis]
+    scatter_and(cells, np.where(unit_cells & hidden_singles, hidden_singles, ALL_DIGITS))
+    dead |= (once != ALL_DIGITS).any(axis=1)
+
+    # Naked pairs: two boxes of a unit with the same two candidates
+    unit_cells = cells[:, UNIT_MATRIX]
+    bivalent = POPCOUNT[unit_cells] == 2
+    eliminated = np.zeros_like(unit_cells)
+    for i, j in PAIRS:
+        pair = np.where(bivalent[:, :, i] & (unit_cells[:, :, i] == unit_cells[:, :, j]), unit_cells[:, :, i], 0)
+        eliminated |= pair[:, :, np.newaxis]
+        # The twins themselves keep their candidates
+        eliminated[:, :, i] &= ~pair
+        eliminated[:, :, j] &= ~pair
+    scatter_and(cells, ~eliminated)
+
+    return dead | (cells == 0).any(axis=1)
+
+
+def propagate(cells, max_steps=100):
+    """
+    Propagate the constraints of a batch until no sudoku changes.
+    Input: (N, 81) candidate masks, modified in place, and the maximal number of steps.
+    Output: (N,) boolean array, True for the sudokus found to have no solution.
+    """
+    dead = np.zeros(len(cells), dtype=bool)
+    active = np.arange(len(cells))
+    for _ in range(max_steps):
+        batch = cells[active]
+        before = batch.copy()
+        dead[active] |= propagate_step(batch)
+        cells[active] = batch
+        changed = (batch != before).any(axis=1) & ~dead[active]
+        active = active[changed]
+        if len(active) == 0:
+            break
+    return dead
+
+
+def solve_batch(grids, as_dict=True):
+    """
+    Solve a batch of sudokus: propagate all of them with array operations, then search the stalled ones.
+    Input: A list of grids in string form, and whether to return the solutions in dictionary or string form.
+    Output: The list of their solutions (False for the grids without solution).
+    """
+    cells = parse_batch(grids)
+    dead = np.zeros(len(cells), dtype=bool)
+    for start in range(0, len(cells), BLOCK_SIZE):
+        dead[start:start + BLOCK_SIZE] = propagate(cells[start:start + BLOCK_SIZE])
+    solved = (POPCOUNT[cells] == 1).all(axis=1)
+    solved_grids = DIGIT_CHARS[cells]
+
+    solutions = []
+    for i in range(len(cells)):
+        if dead[i]:
+            solutions.append(False)
+            continue
+        if solved[i]:
+            solution = solved_grids[i].tobytes().decode()
+        else:
+            row = bitboard.search(cells[i].tolist())
+            if not row:
+                solutions.append(False)
+                continue
+            solution = ''.join(bitboard.CANDIDATES[mask] for mask in row)
+        solutions.append(dict(zip(bitboard.boxes, solution)) if as_dict else solution)
+    return solutions
@@ -0,0 +1,39 @@
+import unittest
+
+import numpy as np
+
+import bitboard
+import vectorized
+from benchmark import load_puzzles
+from fixtures import broken_diagonal, contradiction, hard_grids, is_solution
+from solution_test import TestDiagonalSudoku
+
+
+class TestVectorized(unittest.TestCase):
+
+    def test_solve_batch(self):
+        grids = load_puzzles('easy') + hard_grids + [TestDiagonalSudoku.diagonal_grid]
+        for grid, solution in zip(grids, vectorized.solve_batch(grids)):
+            self.assertTrue(is_solution(solution, grid))
+        self.assertEqual(vectorized.solve_batch([TestDiagonalSudoku.diagonal_grid])[0],
+                         TestDiagonalSudoku.solved_diag_sudoku)
+
+    def test_contradictions(self):
+        self.assertEqual(vectorized.solve_batch([contradiction, broken_diagonal]), [False, False])
+
+    def test_propagation(self):
+        """The batch propagation is at least as strong as the scalar one, and never removes a solution"""
+        grids = load_puzzles('hard')
+        cells = vectorized.parse_batch(grids)
+        dead = vectorized.propagate(cells)
+        self.assertFalse(dead.any())
+        for grid, row in zip(grids, cells.tolist()):
+            scalar = bitboard.reduce_puzzle(bitboard.parse(grid))
+            solution = bitboard.search(bitboard.parse(grid))
+            self.assertTrue(all(mask & value for mask, value in zip(row, solution)))
+            self.assertLessEqual(sum(bitboard.POPCOUNT[mask] for mask in row),
+                                 sum(bitboard.POPCOUNT[mask] for mask in scalar))
+
+
+if __name__ == '__main__':
+    unittest.main()